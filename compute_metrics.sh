@@ -4,73 +4,32 @@
 # Arguments:
 # - $1: The file containing the bugs to untangle.
 # - $2: The directory where the results are stored and repositories checked out.
+# - $3: Optional number of worker processes. Defaults to the number of CPUs.
 # Writes aggregated results to untangling-eval/metrics.csv.
 
 set -o errexit    # Exit immediately if a command exits with a non-zero status
 set -o nounset    # Exit if script tries to use an uninitialized variable
 set -o pipefail   # Produce a failure status if any command in the pipeline fails
 
-DEBUG=
-# DEBUG=YES
-
-if [ $# -ne 2 ] ; then
-    echo 'usage: compute_metrics.sh <bugs_file> <out_dir>'
+if [ $# -ne 2 ] && [ $# -ne 3 ] ; then
+    echo 'usage: compute_metrics.sh <bugs_file> <out_dir> [workers]'
     exit 1
 fi
 
 export bugs_file="$1" # The file containing the bugs to untangle.
 export out_dir="$2" # The directory where the results are stored and repositories checked out.
+workers="${3:-$(nproc)}"
 
 if ! [ -f "$bugs_file" ]; then
     echo "$0: file ${bugs_file} not found. Exiting."
     exit 1
 fi
-export workdir="${out_dir}/repositories"
-export metrics_dir="${out_dir}/metrics" # Path containing the commit metrics.
-export logs_dir="${out_dir}/logs" # Path containing the commit metrics.
-
-mkdir -p "$workdir"
-mkdir -p "${metrics_dir}"
-mkdir -p "${logs_dir}"
-
-if [ -n "${DEBUG}" ] ; then
-  echo "Contents of ${logs_dir}:"
-  ls -al "${logs_dir}"
-fi
-echo ""
-
-generate_commit_metrics() {
-  local project="$1"
-  local vid="$2"
-  export repository="${workdir}/${project}_${vid}"
-  local log_file="${logs_dir}/${project}_${vid}_metrics.log"
-  START="$(date +%s.%N)"  # Record start time for bug commit metrics generation
-  
-  if [ -n "${DEBUG}" ] ; then
-    echo "about  to call: ./src/bash/main/get_metrics_for_d4j_bug.sh $project $vid $out_dir $repository > $log_file"
-  fi
-  ./src/bash/main/get_metrics_for_d4j_bug.sh "$project" "$vid" "$out_dir" "$repository" > "$log_file" 2>&1
-  ret_code=$?
-  metrics_status_string="$([ $ret_code -ne 0 ] && echo "FAIL" || echo "OK")"
-  END="$(date +%s.%N)"
-  # Must use `bc` because the computation is on floating-point numbers.
-  ELAPSED="$(echo "$END - $START" | bc)"
-  printf "%-20s %s %.0fs [%s] \n" "${project}_${vid}" "${metrics_status_string}" "${ELAPSED}" "$log_file"
-}
-
-export -f generate_commit_metrics
-parallel --colsep "," generate_commit_metrics {} < "$bugs_file"
-
-if [ -n "${DEBUG}" ] ; then
-  echo "Contents of logs_dir ${logs_dir}:"
-  ls -al "${logs_dir}"
-  echo "Contents of metrics_dir ${metrics_dir}:"
-  ls -al "${metrics_dir}"
-fi
 
-metrics_results="${out_dir}/metrics.csv"
+SCRIPTDIR="$(cd "$(dirname "$0")" && pwd -P)"
+set -o allexport
+. "$SCRIPTDIR"/check-environment.sh
+set +o allexport
 
-echo "project,vid,files_updated,hunks,average_hunk_size,code_changed_lines,tangled_lines,tangled_hunks" > "$metrics_results"
-cat "${metrics_dir}"/*.csv >> "$metrics_results"
-echo ""
-echo "Commit metrics were aggregated and saved in ${metrics_results}"
+# Computes the metrics of all the bugs in one Python process. Bugs whose repository
+# does not exist are checked out first, like in get_metrics_for_d4j_bug.sh.
+python3 -m src.python.main.pipeline.batch_metrics d4j "$bugs_file" "$out_dir" --workers "$workers"
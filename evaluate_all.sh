@@ -18,9 +18,17 @@ export PYTHONHASHSEED=0         # Make Flexeme deterministic
 export bugs_file="$1" # Path to the file containing the bugs to untangle and evaluate.
 export out_dir="$2" # Path to the directory where the results are stored and repositories checked out.
 
-# Run the 5_bug example and write output files to /e2e
-./generate_artifacts.sh "$bugs_file" "$out_dir"
-./compute_metrics.sh "$bugs_file" "$out_dir"
-./generate_ground_truth.sh "$bugs_file" "$out_dir"
-./decompose.sh "$bugs_file" "$out_dir"
-./score.sh "$bugs_file" "$out_dir"
+SCRIPTDIR="$(cd "$(dirname "$0")" && pwd -P)"
+set -o allexport
+. "$SCRIPTDIR"/check-environment.sh
+set +o allexport
+
+java_version="$(java -version 2>&1 | awk -F '"' '/version/ {print $2}' | cut -c1-3)"
+if [ "$java_version" != "1.8" ] ; then
+    echo "$0: please use Java 8 instead of ${java_version}"
+    exit 1
+fi
+
+# Run the stages of generate_artifacts.sh, compute_metrics.sh, generate_ground_truth.sh,
+# decompose.sh and score.sh for each bug in one Python worker process.
+python3 -m src.python.main.pipeline.evaluate "$bugs_file" "$out_dir"
@@ -7,7 +7,7 @@
 
 # Results are outputted to evaluation/<D4J_bug> respective subfolder.
 # Writes parsed decomposition results to smartcommit.csv and flexeme.csv for each bug in evaluation/<D4J_bug>.
-# Writes Rand Index scores computed to evaluation/decomposition_scores.csv.
+# Writes Rand Index scores computed to decomposition_scores.csv and to evaluation/<D4J_bug>/scores.csv.
 
 set -o errexit    # Exit immediately if a command exits with a non-zero status
 set -o nounset    # Exit if script tries to use an uninitialized variable
@@ -28,6 +28,7 @@ export out_dir="$2" # The directory where the results are stored and repositorie
 
 
 export out_file="${out_dir}/decomposition_scores.csv" # Aggregated results.
+export scores_cache_file="${out_dir}/decomposition_scores_cache.json" # Fingerprint and score of each commit and tool.
 export workdir="${out_dir}/repositories"
 export evaluation_dir="${out_dir}/evaluation"
 export decomposition_dir="${out_dir}/decomposition"
@@ -60,8 +61,9 @@ score_bug(){
 export -f score_bug
 parallel --colsep "," score_bug {} < "$bugs_file"
 
-if ! cat "${evaluation_dir}"/*/scores.csv > "$out_file" ; then
-  echo "No \"scores.csv\" files found under ${evaluation_dir}."
+# Score all bugs in one Python process.
+if ! python3 -m src.python.main.batch_untangling_score --evaluation "$evaluation_dir" --commits-file "$bugs_file" --out-file "$out_file" --workers "$(nproc)" --commit-scores --cache "$scores_cache_file" ; then
+  echo "No bug could be scored under ${evaluation_dir}."
   find "${evaluation_dir}"
   exit 1
 fi
@@ -7,7 +7,7 @@
 #   defects4j checkout -p Lang -v 1b -w /tmp/lang_1_buggy
 #   cd /tmp/lang_1_buggy
 #   clean-defects4j-repo.sh
-#   # Result is in /tmp/lang_1_buggy_cleaned
+#   # The cleaned commits are added to /tmp/lang_1_buggy
 #
 # The clone's HEAD should be on the last checkout in the repository (this is the
 # case if you haven't run `git checkout` in that directory), and there should be
@@ -76,44 +76,19 @@ read -r v1 v2 <<< "$(print_revision_ids "$project" "$vid")"
 v3="$(git rev-parse HEAD)"      # Buggy version
 
 olddir="$(pwd)"
-newdir="$olddir"_cleaned
-tmpdir="/tmp/clean-defects4j-repo-$(basename "$olddir")"
-
-# Reset $newdir to the current state of the repository, even if it already exists.
-rm -rf "$newdir"
-cp -Rp "$olddir" "$newdir"
-
-# Adds a new commit to the git clone in $newdir.
-add_cleaned_commit () {
-  sha="$1"
-  msg="$2"
-
-  ## Using these two commands is a bit more paranoid.
-  rm -rf "$tmpdir"
-  cp -Rp "$newdir" "$tmpdir"
-
-  cd "$tmpdir"
-  git checkout -q "$sha"
-  "$SCRIPTDIR"/clean-java-directory.sh
-  rm -rf .git
-  cp -rpf "$newdir/.git" "$tmpdir"
-
-  cd "$newdir"
-  # Delete all files.
-  rm -rf -- ..?* .[!.]* *
-  cp -af "$tmpdir/." "$newdir"
-  git add .
-  git commit -q -m "$msg"
-  rm -rf "tmpdir/.git"
-  cp -rpf .git "$tmpdir"
-}
-
-add_cleaned_commit "$v1" "Cleaned ORIGINAL_REVISION (= cleaned $v1)"
-add_cleaned_commit "$v2" "Cleaned FIXED_VERSION (= cleaned $v2)"
-add_cleaned_commit "$v3" "Cleaned BUGGY_VERSION (= cleaned $v3)"
-
-# Replace the unclean directory by the cleaned directory.
-rm -rf "$olddir"
-mv "$newdir" "$olddir"
+# Reused to check out and clean each revision. Only the revisions are written to it:
+# the cleaned commits are added to the clone with git plumbing, without copying it.
+scratch_dir="${TMPDIR:-/tmp}/clean-defects4j-repo-$(basename "$olddir")"
+trap 'rm -rf "$scratch_dir" "${scratch_dir}.index"' EXIT
+
+. "$SCRIPTDIR"/clean_repo_utils.sh
+
+commit_cleaned_revision "$v1" "$v3" "Cleaned ORIGINAL_REVISION (= cleaned $v1)" "$scratch_dir"
+commit_cleaned_revision "$v2" "$cleaned_commit" "Cleaned FIXED_VERSION (= cleaned $v2)" "$scratch_dir"
+commit_cleaned_revision "$v3" "$cleaned_commit" "Cleaned BUGGY_VERSION (= cleaned $v3)" "$scratch_dir"
+
+# Move the current branch to the last cleaned commit and check it out. Only the
+# files that differ from the buggy version are written.
+git update-ref -m "$(basename "$0")" HEAD "$cleaned_commit"
+git reset -q --hard
 echo "$(basename "$0"): success; result is in ../$(basename "$olddir")"
-cd "$olddir"
@@ -5,6 +5,8 @@
 #  * remove comments
 #  * remove blank lines
 #  * remove trailing whitespace
+# It is equivalent to running clean-java-file.sh on each Java file, but cleans the
+# files in one Python process pool instead of launching a pipeline per file.
 
 set -o errexit    # Exit immediately if a command exits with a non-zero status
 set -o nounset    # Exit if script tries to use an uninitialized variable
@@ -16,4 +18,4 @@ fi
 
 SCRIPTDIR="$(cd "$(dirname "$0")" && pwd -P)"
 
-find . -name '*.java' -exec "$SCRIPTDIR"/clean-java-file.sh {} \;
+python3 "$SCRIPTDIR"/../../python/main/clean_artifacts.py .
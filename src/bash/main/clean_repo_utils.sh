@@ -0,0 +1,52 @@
+#!/bin/bash
+# Collection of shell functions that add "cleaned" commits to a git clone.
+
+# Commits the cleaned version of a revision on top of a parent commit, without copying
+# the clone. The files of the revision are checked out from a temporary index into a
+# scratch directory, cleaned with clean-java-directory.sh, and the cleaned tree is
+# committed with git plumbing. The temporary index records the stat information of the
+# checked out files, so only the Java files changed by the cleaning are hashed again.
+# The working tree, the index, and the refs of the clone are not modified.
+# Must be run at the top level of the clone.
+# Arguments:
+# - $1: The revision to clean.
+# - $2: The parent of the new commit.
+# - $3: The commit message.
+# - $4: The scratch directory. It is emptied and can be reused for the next revision.
+# Sets cleaned_commit to the id of the new commit.
+commit_cleaned_revision () {
+  if [ $# -ne 4 ] ; then
+    echo 'usage: commit_cleaned_revision <Revision> <Parent> <Message> <Scratch Directory>'
+    echo 'example: commit_cleaned_revision abc def "Cleaned abc" /tmp/scratch'
+    exit 1
+  fi
+
+  local revision="$1"
+  local parent="$2"
+  local message="$3"
+  local scratch_dir="$4"
+
+  local script_dir
+  script_dir="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd -P)"
+  local git_dir
+  git_dir="$(git rev-parse --absolute-git-dir)"
+  # The index of the scratch directory, outside of it so that it is not cleaned.
+  local index_file="${scratch_dir}.index"
+
+  rm -rf "$scratch_dir" "$index_file"
+  mkdir -p "$scratch_dir"
+  GIT_INDEX_FILE="$index_file" git read-tree "$revision"
+
+  (
+    cd "$scratch_dir"
+    export GIT_DIR="$git_dir" GIT_WORK_TREE="$scratch_dir" GIT_INDEX_FILE="$index_file"
+    git checkout-index --all --index
+    "$script_dir"/clean-java-directory.sh
+    git diff-files --name-only -z | git update-index -z --remove --stdin
+  )
+
+  local tree
+  tree="$(GIT_INDEX_FILE="$index_file" git write-tree)"
+  cleaned_commit="$(git commit-tree "$tree" -p "$parent" -m "$message")"
+  rm -rf "$index_file"
+}
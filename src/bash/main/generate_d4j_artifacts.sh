@@ -103,13 +103,9 @@ fi
 
 cd "$workdir"
 
-# Generate the whitespace-change-free version, then clean the diffs.
-d4j_diff "$project" "$vid" "$revision_original" "$revision_fixed" "$repository" >> "${diff_dir}/VC.diff"
-python3 "${workdir}/src/python/main/clean_artifacts.py" "${diff_dir}/VC.diff"
-d4j_diff "$project" "$vid" "$revision_original"  "$revision_buggy" "$repository" >> "${diff_dir}/NBF.diff"
-python3 "${workdir}/src/python/main/clean_artifacts.py" "${diff_dir}/NBF.diff"
-d4j_diff "$project" "$vid" "$revision_buggy"  "$revision_fixed" "$repository" >> "${diff_dir}/BF.diff"
-python3 "${workdir}/src/python/main/clean_artifacts.py" "${diff_dir}/BF.diff"
+# Generate the whitespace-change-free diffs, clean them, and parse them for the metrics
+# and the ground truth, in one Python process.
+python3 -m src.python.main.d4j_diffs "$project" "$vid" "$repository" "$diff_dir" "$revision_original" "$revision_buggy" "$revision_fixed"
 
 code=$?
 if [ $code -eq 0 ]
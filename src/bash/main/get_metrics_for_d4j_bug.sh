@@ -51,7 +51,7 @@ metrics_csv="${metrics_dir}/${project}_${vid}.csv"
 if [ -f "$metrics_csv" ]; then
     echo 'Calculating metrics .................................................. CACHED'
 else
-    if python3 src/python/main/diff_metrics.py "${project}" "${vid}" "${repository}" > "$metrics_csv"
+    if python3 -m src.python.main.diff_metrics "${project}" "${vid}" "${repository}" > "$metrics_csv"
     then
         echo 'Calculating metrics .................................................. OK'
     else
@@ -67,7 +67,7 @@ fi
 #if [ -f "$whitespace_statistics_csv" ]; then
 #    echo 'Calculating whitespace statistics .................................................. CACHED'
 #else
-#    if python3 src/python/main/summary_statistics.py "$project" "$vid" "$repository" "whitespace" > "$whitespace_statistics_csv"
+#    if python3 -m src.python.main.summary_statistics "$project" "$vid" "$repository" "whitespace" > "$whitespace_statistics_csv"
 #    then
 #        echo 'Calculating whitespace statistics .................................................. OK'
 #    else
@@ -79,7 +79,7 @@ fi
 #if [ -f "$clean_statistics_csv" ]; then
 #    echo 'Calculating clean statistics .................................................. CACHED'
 #else
-#    if python3 src/python/main/summary_statistics.py "$project" "$vid" "$repository" "clean" > "$clean_statistics_csv"
+#    if python3 -m src.python.main.summary_statistics "$project" "$vid" "$repository" "clean" > "$clean_statistics_csv"
 #    then
 #        echo 'Calculating clean statistics .................................................. OK'
 #    else
@@ -41,43 +41,18 @@ revision_buggy=$(git rev-parse HEAD~1)
 SCRIPTDIR="$(cd "$(dirname "$0")" && pwd -P)"
 
 olddir="$(pwd)"
-newdir="$olddir"_cleaned
-tmpdir="/tmp/clean-lltc4j-repo-$(basename "$olddir")"
+# Reused to check out and clean each revision. Only the revisions are written to it:
+# the cleaned commits are added to the clone with git plumbing, without copying it.
+scratch_dir="${TMPDIR:-/tmp}/clean-lltc4j-repo-$(basename "$olddir")"
+trap 'rm -rf "$scratch_dir" "${scratch_dir}.index"' EXIT
 
-# Reset $newdir to the current state of the repository, even if it already exists.
-rm -rf "$newdir"
-cp -Rp "$olddir" "$newdir"
+. "$SCRIPTDIR"/../clean_repo_utils.sh
 
-# Adds a new commit to the git clone in $newdir.
-add_cleaned_commit () {
-  sha="$1"
-  msg="$2"
+commit_cleaned_revision "$revision_buggy" "$revision_fixed" "Cleaned Buggy REVISION (= cleaned $revision_buggy)" "$scratch_dir"
+commit_cleaned_revision "$revision_fixed" "$cleaned_commit" "Cleaned Fixed REVISION (= cleaned $revision_fixed)" "$scratch_dir"
 
-  ## Using these two commands is a bit more paranoid.
-  rm -rf "$tmpdir"
-  cp -Rp "$newdir" "$tmpdir"
-
-  cd "$tmpdir"
-  git checkout -q "$sha"
-  "$SCRIPTDIR"/../clean-java-directory.sh
-  rm -rf .git
-  cp -rpf "$newdir/.git" "$tmpdir"
-
-  cd "$newdir"
-  # Delete all files.
-  rm -rf -- ..?* .[!.]* *
-  cp -af "$tmpdir/." "$newdir"
-  git add .
-  git commit -q -m "$msg"
-  rm -rf "tmpdir/.git"
-  cp -rpf .git "$tmpdir"
-}
-
-add_cleaned_commit "$revision_buggy" "Cleaned Buggy REVISION (= cleaned $revision_buggy)"
-add_cleaned_commit "$revision_fixed" "Cleaned Fixed REVISION (= cleaned $revision_fixed)"
-
-# Replace the unclean directory by the cleaned directory.
-rm -rf "$olddir"
-mv "$newdir" "$olddir"
+# Move the current branch to the last cleaned commit and check it out. Only the
+# files that differ from the fixed version are written.
+git update-ref -m "$(basename "$0")" HEAD "$cleaned_commit"
+git reset -q --hard
 echo "$(basename "$0"): success; result is in $olddir)"
-cd "$olddir"
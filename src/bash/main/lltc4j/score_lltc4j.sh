@@ -22,6 +22,7 @@ export commits_file="$1" # The file containing the commits to score.
 export results_dir="$2" # The directory where the results are stored and repositories checked out.
 
 export aggregate_scores_file="${results_dir}/decomposition_scores.csv" # Aggregated results.
+export scores_cache_file="${results_dir}/decomposition_scores_cache.json" # Fingerprint and score of each commit and tool.
 export workdir="${results_dir}/repositories"
 export evaluation_root_dir="${results_dir}/evaluation"
 export decomposition_dir="${results_dir}/decomposition"
@@ -35,36 +36,16 @@ mkdir -p "$logs_dir"
 SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd -P)"
 . "$SCRIPT_DIR/lltc4j_util.sh"
 
-score_bug(){
-  local vcs_url="$1"
-  local commit_hash="$2"
+# Lists the project name and short commit hash of each commit, ignoring the CSV header.
+commits_ids_file="$(mktemp)"
+trap 'rm -f "$commits_ids_file"' EXIT
+tail -n+2 "$commits_file" | while IFS="," read -r vcs_url commit_hash _ ; do
+  echo "$(get_project_name_from_url "$vcs_url"),$(get_short_commit_hash "$commit_hash")"
+done > "$commits_ids_file"
 
-  local project_name
-  project_name="$(get_project_name_from_url "$vcs_url")"
-
-  local short_commit_hash
-  short_commit_hash="${commit_hash:0:6}"
-
-  local evaluation_dir
-  evaluation_dir="${evaluation_root_dir}/${project_name}_${short_commit_hash}"
-  mkdir -p "$evaluation_dir"
-
-  START="$(date +%s.%N)"  # Record start time for bug scoring
-
-  python3 src/python/main/untangling_score.py "$evaluation_dir" "${project_name}" "${short_commit_hash}" > "${evaluation_dir}/scores.csv" 2> "${logs_dir}/${project_name}_${short_commit_hash}_score.log"
-  ret_code=$?
-  scoring_status_string="$([ $ret_code -ne 0 ] && echo "FAIL" || echo "OK")"
-  END="$(date +%s.%N)"
-  ELAPSED="$(echo "$END - $START" | bc)" # Must use `bc` because the computation is on floating-point numbers.
-  printf "%-20s %s (time: %.0fs) [%s]\n" "${project_name}_${short_commit_hash}" "${scoring_status_string}" "${ELAPSED}" "${logs_dir}/${project_name}_${short_commit_hash}_score.log"
-}
-
-export -f score_bug
-# Reads the commits file, ignoring the CSV header, and score each commit in parallel.
-tail -n+2 "$commits_file" | parallel --colsep "," score_bug {}
-
-if ! cat "${evaluation_root_dir}"/*/scores.csv > "$aggregate_scores_file" ; then
-  echo "No \"scores.csv\" files found under ${evaluation_root_dir}."
+# Score all commits in one Python process.
+if ! python3 -m src.python.main.batch_untangling_score --evaluation "$evaluation_root_dir" --commits-file "$commits_ids_file" --out-file "$aggregate_scores_file" --workers "$(nproc)" --commit-scores --cache "$scores_cache_file" 2> "${logs_dir}/score.log" ; then
+  echo "No commit could be scored under ${evaluation_root_dir}. See ${logs_dir}/score.log."
   find "${evaluation_root_dir}"
   exit 1
 fi
@@ -87,5 +87,5 @@ convert_untangling_output_to_csv() {
 
   # TODO: This path is used several times in this file. Create a function to dynamically retrieve it.
   local flexeme_graph_file="${untangling_output_dir}/flexeme.dot"
-  python3 src/python/main/flexeme_results_to_csv.py "$flexeme_graph_file" "$untangling_export_file"
+  python3 -m src.python.main.flexeme_results_to_csv "$flexeme_graph_file" "$untangling_export_file"
 }
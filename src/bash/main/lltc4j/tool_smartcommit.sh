@@ -64,5 +64,5 @@ convert_untangling_output_to_csv() {
   local results_dir="${untangling_output_dir}/$project_name/$commit_hash"
 
   # TODO: Don't assume that the script is called from the root directory.
-  python3 src/python/main/smartcommit_results_to_csv.py "${results_dir}" "${untangling_export_file}"
+  python3 -m src.python.main.smartcommit_results_to_csv "${results_dir}" "${untangling_export_file}"
 }
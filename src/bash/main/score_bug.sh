@@ -1,10 +1,7 @@
 #!/bin/bash
-# Translates SmartCommit results (JSON files) and Flexeme graphs
-# (.dot files) in decomposition/D4J_bug for one D4J bug file to the
-# line level. Each line is labelled with the group it belongs to and
-# this is reported in a readable CSV file. Then, calculates the Rand
-# Index for untangling results of 3 methods: SmartCommit, Flexeme, and
-# File-based.
+# Untangles one D4J bug file with the file-based approach. The Rand
+# Index of the untangling results of 3 methods: SmartCommit, Flexeme,
+# and File-based is then calculated for all bugs at once by score.sh.
 # Arguments:
 # - $1: D4J Project name.
 # - $2: D4J Bug Id.
@@ -12,8 +9,7 @@
 # - $4: Directory where the repo is checked out.
 
 # Results are outputted to evaluation/<D4J_bug> respective subfolder.
-# Writes parsed untangling results to smartcommit.csv and flexeme.csv for each bug in /evaluation/<D4J_bug>
-# Writes Rand Index scores computed to evaluation/<D4J_bug>/decomposition_scores.csv
+# Writes file-based untangling results to file_untangling.csv in /evaluation/<D4J_bug>
 
 set -o errexit    # Exit immediately if a command exits with a non-zero status
 set -o nounset    # Exit if script tries to use an uninitialized variable
@@ -34,7 +30,7 @@ evaluation_dir="${out_dir}/evaluation/${project}_${vid}"
 truth_csv="${evaluation_dir}/truth.csv"
 
 echo ""
-echo "Calculating Rand Index score for project $project, bug $vid, repository $repository"
+echo "Untangling with file-based approach for project $project, bug $vid, repository $repository"
 
 # If the D4J bug does not exist, this means the tools have yet been run on the bug file's VC commit.
 if [ ! -d "${repository}" ] ; then
@@ -63,8 +59,3 @@ else
       exit 1                # Return exit code 1 to mark this run as FAIl when called in score.sh
   fi
 fi
-
-# Compute untangling score
-echo -ne 'Computing untangling scores ..........................................\r'
-python3 src/python/main/untangling_score.py "$evaluation_dir" "${project}" "${vid}" > "${evaluation_dir}/scores.csv"
-echo 'Computing untangling scores .......................................... OK'
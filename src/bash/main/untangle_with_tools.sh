@@ -128,7 +128,7 @@ if [ -f "$smartcommit_result_out" ] && [ $regenerate_results = false ]; then
   echo 'Parsing SmartCommit results .......................................... CACHED'
 else
   echo 'Parsing SmartCommit results ..........................................'
-  if python3 src/python/main/smartcommit_results_to_csv.py "${smartcommit_untangling_dir}/${project}_${vid}/${commit}" "$smartcommit_result_out"
+  if python3 -m src.python.main.smartcommit_results_to_csv "${smartcommit_untangling_dir}/${project}_${vid}/${commit}" "$smartcommit_result_out"
   then
       echo 'Parsing SmartCommit results .......................................... OK'
   else
@@ -145,7 +145,7 @@ if [ -f "$flexeme_result_out" ] && [ $regenerate_results == false ]; then
   echo -ne 'Parsing Flexeme results .............................................. CACHED\r'
 else
   echo 'Parsing Flexeme results ..............................................'
-  if python3 src/python/main/flexeme_results_to_csv.py "$flexeme_graph_file" "$flexeme_result_out"
+  if python3 -m src.python.main.flexeme_results_to_csv "$flexeme_graph_file" "$flexeme_result_out"
   then
       echo 'Parsing Flexeme results .............................................. OK'
   else
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+"""
+Benchmarks the cleaning of a diff, streamed line by line and parsed into a PatchSet.
+
+The diffs are synthetic: each file has hunks of 20 changed lines, a quarter of
+them comments or imports and some of them cancelling each other out.
+
+Command Line Args:
+    sizes: Optional number of changed lines in the diff. Defaults to 10000, 100000, and 1000000.
+Prints:
+    The time taken and the peak memory allocated to clean each diff, in seconds and MiB.
+
+Run from the repository root with `python3 -m src.python.benchmark.bench_clean_artifacts`.
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from src.python.main.clean_artifacts import patchset_clean_diff, stream_clean_diff
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+LINES_PER_HUNK = 20
+HUNKS_PER_FILE = 50
+
+
+def generate_diff(size, diff_file):
+    """
+    Write a synthetic diff with `size` changed lines to diff_file.
+    """
+    hunks = size // LINES_PER_HUNK
+    half = LINES_PER_HUNK // 2
+    with open(diff_file, "w", encoding="latin-1") as diff:
+        for hunk in range(hunks):
+            if hunk % HUNKS_PER_FILE == 0:
+                path = f"src/main/java/File{hunk // HUNKS_PER_FILE}.java"
+                diff.write(f"diff --git a/{path} b/{path}\n")
+                diff.write("index 8422d40..e2c9801 100644\n")
+                diff.write(f"--- a/{path}\n+++ b/{path}\n")
+            start = (hunk % HUNKS_PER_FILE) * 100 + 1
+            diff.write(f"@@ -{start},{half + 1} +{start},{half + 1} @@\n")
+            diff.write(" context();\n")
+            for i in range(half):
+                if i % 4 == 0:
+                    diff.write(f"-// comment {i}\n+import java.util.List{i};\n")
+                elif i % 4 == 1:
+                    diff.write(f"-same({hunk});\n+same({hunk});\n")
+                else:
+                    diff.write(f"-removed({i});\n+added({i});\n")
+
+
+def measure(clean, diff_file, cleaned_diff_file):
+    """
+    Return the time taken and the peak memory allocated by cleaning diff_file.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    clean(diff_file, cleaned_diff_file)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def main():
+    """
+    Implement the logic of the script. See the module docstring.
+    """
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+
+    with tempfile.TemporaryDirectory() as tmp:
+        diff_file = os.path.join(tmp, "VC.diff")
+        cleaned_diff_file = os.path.join(tmp, "VC_clean.diff")
+        for size in sizes:
+            generate_diff(size, diff_file)
+            for clean in [stream_clean_diff, patchset_clean_diff]:
+                elapsed, peak = measure(clean, diff_file, cleaned_diff_file)
+                print(f"{clean.__name__},{size},{elapsed:.3f},{peak:.1f}")
+
+
+if __name__ == "__main__":
+    main()
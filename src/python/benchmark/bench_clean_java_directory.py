@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+"""
+Benchmarks cleaning the Java files of a directory with clean-java-file.sh on each file,
+as clean-java-directory.sh used to do, and in Python with clean_java_directory.
+
+The directory is synthetic: each Java file has a license header, Javadoc, line
+comments, and blank lines around 200 lines of code.
+
+Command Line Args:
+    sizes: Optional number of Java files in the directory. Defaults to 100 and 1000.
+Prints:
+    The time taken to clean the directory with the shell pipeline (if cpp is installed),
+    with one Python process, and with a process per CPU, in seconds.
+
+Run from the repository root with `python3 -m src.python.benchmark.bench_clean_java_directory`.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+
+from src.python.main.clean_artifacts import clean_java_directory
+
+DEFAULT_SIZES = [100, 1000]
+LINES_PER_FILE = 200
+FILES_PER_PACKAGE = 50
+CLEAN_JAVA_FILE = os.path.join(
+    os.path.dirname(__file__), "..", "..", "bash", "main", "clean-java-file.sh"
+)
+
+
+def generate_java_directory(directory, files):
+    """
+    Write `files` synthetic Java files under directory, in packages of FILES_PER_PACKAGE files.
+    """
+    for i in range(files):
+        package_dir = os.path.join(directory, f"p{i // FILES_PER_PACKAGE}")
+        os.makedirs(package_dir, exist_ok=True)
+        with open(os.path.join(package_dir, f"C{i}.java"), "w") as java_file:
+            java_file.write("/*\n * Licensed under the Apache License.\n */\n\n")
+            java_file.write("import java.util.List;\n\n")
+            java_file.write(f"/**\n * Class {i}.\n */\npublic class C{i} {{\n")
+            for j in range(LINES_PER_FILE):
+                if j % 10 == 0:
+                    java_file.write(f"\n    // Step {j}.\n")
+                java_file.write(
+                    f'    String s{j} = "a // b"; /* value */ int x{j} = {j};  \n'
+                )
+            java_file.write("}\n")
+
+
+def clean_with_shell(directory):
+    """
+    Clean the directory by running clean-java-file.sh on each Java file.
+    """
+    subprocess.run(
+        ["find", ".", "-name", "*.java", "-exec", CLEAN_JAVA_FILE, "{}", ";"],
+        cwd=directory,
+        check=True,
+    )
+
+
+def main():
+    """
+    Implement the logic of the script. See the module docstring.
+    """
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    cleaners = [
+        ("python", lambda directory: clean_java_directory(directory, workers=1)),
+        ("processes", lambda directory: clean_java_directory(directory)),
+    ]
+    if shutil.which("cpp"):
+        cleaners.insert(0, ("shell", clean_with_shell))
+
+    for size in sizes:
+        for name, clean in cleaners:
+            with tempfile.TemporaryDirectory() as tmp:
+                generate_java_directory(tmp, size)
+                elapsed = timeit.timeit(lambda: clean(tmp), number=1)
+                print(f"{name},{size},{elapsed:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+"""
+Benchmarks concatenating the untangled lines of an evaluation directory.
+
+The evaluation directory is synthetic: each commit has a ground truth and the results
+of SmartCommit, Flexeme, and the file-based untangling, with 50 changed lines each.
+The tools miss a fraction of the lines and report a few lines outside of the ground truth.
+
+Command Line Args:
+    sizes: Optional number of commits in the evaluation directory. Defaults to 500 and 2000.
+Prints:
+    The time taken to concatenate the untangled lines with one thread and with a
+    thread per CPU, in seconds.
+
+Run from the repository root with
+`python3 -m src.python.benchmark.bench_concatenate_untangled_lines`.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import timeit
+
+from src.python.main.analysis.concatenate_untangled_lines import (
+    concatenate_untangled_lines_for_dataset,
+)
+
+DEFAULT_SIZES = [500, 2000]
+LINES_PER_COMMIT = 50
+
+
+def generate_evaluation_dir(
+    evaluation_dir, commits, seed=0, tools=("smartcommit", "flexeme", "filename")
+):
+    """
+    Generate a synthetic evaluation directory with one folder per commit, with the
+    ground truth and the results of the given tools.
+    """
+    rng = random.Random(seed)
+    for i in range(commits):
+        commit_dir = os.path.join(evaluation_dir, f"P{i % 10}_{i}")
+        os.makedirs(commit_dir)
+        lines = [
+            f"F{j % 5}.java,{j}," if j % 2 else f"F{j % 5}.java,,{j}"
+            for j in range(LINES_PER_COMMIT)
+        ]
+        with open(os.path.join(commit_dir, "truth.csv"), "w") as file:
+            file.write("file,source,target,group\n")
+            for line in lines:
+                file.write(f"{line},{rng.choice(['fix', 'other'])}\n")
+        for tool in tools:
+            with open(os.path.join(commit_dir, f"{tool}.csv"), "w") as file:
+                file.write("file,source,target,group\n")
+                for line in lines + [f"G.java,{LINES_PER_COMMIT},"]:
+                    if rng.random() < 0.9:
+                        file.write(f"{line},{rng.randrange(3)}\n")
+
+
+def main():
+    """
+    Implement the logic of the script. See the module docstring.
+    """
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            generate_evaluation_dir(tmp, size)
+            for name, workers in [("sequential", 1), ("threads", os.cpu_count())]:
+                elapsed = timeit.timeit(
+                    lambda: concatenate_untangled_lines_for_dataset(tmp, workers),
+                    number=1,
+                )
+                print(f"{name},{size},{elapsed:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+"""
+Benchmarks counting the tangled hunks of an original diff, from PatchSets and from ParsedPatches.
+
+The diffs are synthetic (see bench_clean_artifacts.generate_diff): the bug-fixing
+diff is the first half of the original diff, and many lines are duplicated
+across hunks.
+
+Command Line Args:
+    sizes: Optional number of changed lines in the original diff. Defaults to 10000, 50000, and 100000.
+Prints:
+    The time taken to count the tangled hunks, without parsing the diffs, in seconds.
+
+Run from the repository root with `python3 -m src.python.benchmark.bench_diff_metrics`.
+"""
+
+import os
+import sys
+import tempfile
+import timeit
+
+from unidiff import PatchSet
+
+from src.python.benchmark.bench_clean_artifacts import generate_diff
+from src.python.main.diff_metrics import count_parsed_tangled_hunks, count_tangled_hunks
+from src.python.main.parsed_patch import parse_patch
+
+DEFAULT_SIZES = [10_000, 50_000, 100_000]
+
+
+def main():
+    """
+    Implement the logic of the script. See the module docstring.
+    """
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+
+    with tempfile.TemporaryDirectory() as tmp:
+        original_file = os.path.join(tmp, "VC.diff")
+        fix_file = os.path.join(tmp, "BF.diff")
+        for size in sizes:
+            generate_diff(size, original_file)
+            generate_diff(size // 2, fix_file)
+            original_diff = PatchSet.from_filename(original_file, encoding="latin-1")
+            fix_diff = PatchSet.from_filename(fix_file, encoding="latin-1")
+            elapsed = timeit.timeit(
+                lambda: count_tangled_hunks(original_diff, fix_diff), number=1
+            )
+            print(f"count_tangled_hunks,{size},{elapsed:.3f}")
+
+            parsed_original = parse_patch(original_diff)
+            parsed_fix = parse_patch(fix_diff)
+            elapsed = timeit.timeit(
+                lambda: count_parsed_tangled_hunks(parsed_original, parsed_fix),
+                number=1,
+            )
+            print(f"count_parsed_tangled_hunks,{size},{elapsed:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+"""
+Benchmarks the translation of Flexeme PDGs to the line level.
+
+The PDGs are synthetic: half of the nodes are changed, each spanning 1 to 3
+lines of one of 20 files, and the changed nodes are spread over 5 groups.
+
+Command Line Args:
+    sizes: Optional number of nodes in the PDG. Defaults to 1000, 10000, and 100000.
+Prints:
+    The time taken to read the nodes of each PDG from a DOT file with scan_dot_nodes
+    and, for PDGs of at most 1000 nodes, with pydot. Then, the time taken to
+    translate the PDG and write the CSV file. All times are in seconds.
+
+Run from the repository root with `python3 -m src.python.benchmark.bench_flexeme_results_to_csv`.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import timeit
+
+import networkx as nx
+
+from src.python.main.flexeme_results_to_csv import (
+    changed_nodes_to_dataframe,
+    export_csv,
+    read_nodes,
+)
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+MAX_PYDOT_SIZE = 1_000
+FILES = 20
+GROUPS = 5
+
+
+def generate_nodes(size, seed=0):
+    """
+    Generate the (node, data) pairs of a synthetic PDG with `size` nodes, with
+    attributes quoted like pydot reads them.
+    """
+    rnd = random.Random(seed)
+    nodes = []
+    for node in range(size):
+        data = {"label": f'"{rnd.randrange(GROUPS)}: statement{node}"'}
+        if node % 2 == 0:
+            start = rnd.randint(1, 1000)
+            data["color"] = rnd.choice(["green", "red"])
+            data["span"] = f'"{start}-{start + rnd.randrange(3)}"'
+            data["filepath"] = f'"src/main/java/File{rnd.randrange(FILES)}.java"'
+        nodes.append((str(node), data))
+    return nodes
+
+
+def write_dot(nodes, dot_file):
+    """
+    Write the nodes to dot_file, with control and data edges between consecutive nodes.
+    """
+    with open(dot_file, "w") as file:
+        file.write("digraph {\n")
+        for node, data in nodes:
+            attributes = ", ".join(f"{key}={value}" for key, value in data.items())
+            file.write(f"{node} [{attributes}];\n")
+        for node in range(len(nodes) - 1):
+            file.write(f'{node} -> {node + 1}  [key=0, label="ctrl", style=dotted];\n')
+            file.write(f'{node} -> {node + 1}  [key=1, label="x", style=solid];\n')
+        file.write("}\n")
+
+
+def main():
+    """
+    Implement the logic of the script. See the module docstring.
+    """
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dot_file = os.path.join(tmp, "flexeme.dot")
+        output_file = os.path.join(tmp, "flexeme.csv")
+        for size in sizes:
+            write_dot(generate_nodes(size), dot_file)
+            elapsed = timeit.timeit(lambda: read_nodes(dot_file), number=1)
+            print(f"scan_dot_nodes,{size},{elapsed:.3f}")
+            if size <= MAX_PYDOT_SIZE:
+                elapsed = timeit.timeit(
+                    lambda: nx.nx_pydot.read_dot(dot_file), number=1
+                )
+                print(f"read_dot,{size},{elapsed:.3f}")
+
+            nodes = read_nodes(dot_file)
+            elapsed = timeit.timeit(
+                lambda: export_csv(output_file, changed_nodes_to_dataframe(nodes)),
+                number=1,
+            )
+            print(f"flexeme_results_to_csv,{size},{elapsed:.3f}")
+
+
+if __name__ == "__main__":
+    main()
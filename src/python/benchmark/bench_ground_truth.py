@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+"""
+Benchmarks the alignment of the original diff lines with the bug-fixing and
+non bug-fixing diff lines used to build the ground truth.
+
+The diffs are synthetic: the lines of the original diff are randomly split
+between the bug-fixing and non bug-fixing diffs. A fraction of the lines are
+duplicated, a fraction of the lines are tangled, and the bug-fixing lines are
+out of order.
+
+Command Line Args:
+    sizes: Optional number of changed lines in the original diff. Defaults to 10000 and 50000.
+Prints:
+    The time taken to align each diff, in seconds.
+
+Run from the repository root with `python3 -m src.python.benchmark.bench_ground_truth`.
+"""
+
+import random
+import sys
+import timeit
+
+from src.python.main.ground_truth import align_diff_lines
+
+DEFAULT_SIZES = [10_000, 50_000]
+
+
+def generate_diff_lines(size, seed=0):
+    """
+    Generate the string representation of the changed lines of synthetic original,
+    bug-fixing and non bug-fixing diffs.
+    """
+    rng = random.Random(seed)
+    original_lines = []
+    fix_lines = []
+    nonfix_lines = []
+    for i in range(size):
+        # Duplicated lines force the alignment to look past the head of the queues.
+        value = (
+            f"statement{rng.randrange(size // 10 + 1)};"
+            if i % 5 == 0
+            else f"statement_{i};"
+        )
+        line = f"{rng.choice('+-')}    {value}\n"
+        original_lines.append(line)
+        if i % 50 == 0:
+            # Tangled line: the fix and the non-fix differ only by their indentation.
+            fix_lines.append(line)
+            nonfix_lines.append(f"{line[0]}  {value}\n")
+        elif rng.random() < 0.3:
+            fix_lines.append(line)
+        else:
+            nonfix_lines.append(line)
+    # Out of order bug-fixing lines are matched by looking up their first occurrence.
+    rng.shuffle(fix_lines)
+    return original_lines, fix_lines, nonfix_lines
+
+
+def main():
+    """
+    Implement the logic of the script. See the module docstring.
+    """
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+
+    for size in sizes:
+        original_lines, fix_lines, nonfix_lines = generate_diff_lines(size)
+        elapsed = timeit.timeit(
+            lambda: align_diff_lines(original_lines, fix_lines, nonfix_lines),
+            number=1,
+        )
+        print(f"align_diff_lines,{size},{elapsed:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+"""
+Benchmarks scoring the untangling results of an evaluation directory from scratch,
+and incrementally after the results of one tool changed.
+
+The evaluation directory is synthetic (see bench_concatenate_untangled_lines.py).
+The Flexeme results are then re-generated for a tenth of the commits, and for all of them.
+
+Command Line Args:
+    sizes: Optional number of commits in the evaluation directory. Defaults to 500 and 2000.
+Prints:
+    The time taken to score all the commits without a cache, to score them again when
+    nothing changed, and to score them again after each change of the Flexeme results,
+    in seconds.
+
+Run from the repository root with `python3 -m src.python.benchmark.bench_incremental_scores`.
+"""
+
+import os
+import sys
+import tempfile
+import timeit
+
+from src.python.benchmark.bench_concatenate_untangled_lines import (
+    generate_evaluation_dir,
+)
+from src.python.main.batch_untangling_score import score_commits
+
+DEFAULT_SIZES = [500, 2000]
+TOOLS = ("smartcommit", "flexeme", "file_untangling")
+
+
+def main():
+    """
+    Implement the logic of the script. See the module docstring.
+    """
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            evaluation_dir = os.path.join(tmp, "evaluation")
+            generate_evaluation_dir(evaluation_dir, size, tools=TOOLS)
+            commits = [tuple(name.split("_")) for name in os.listdir(evaluation_dir)]
+            cache_file = os.path.join(tmp, "scores_cache.json")
+
+            def score(cache=None):
+                return score_commits(evaluation_dir, commits, cache_file=cache)
+
+            elapsed = timeit.timeit(score, number=1)
+            print(f"full,{size},{elapsed:.3f}")
+            score(cache_file)
+            elapsed = timeit.timeit(lambda: score(cache_file), number=1)
+            print(f"unchanged,{size},{elapsed:.3f}")
+
+            # Re-run Flexeme on a tenth of the commits, then on all of them.
+            names = sorted(os.listdir(evaluation_dir))
+            for seed, (name, rerun) in enumerate(
+                [("subset", names[::10]), ("one_tool", names)], start=1
+            ):
+                with tempfile.TemporaryDirectory() as other:
+                    generate_evaluation_dir(other, size, seed=seed, tools=["flexeme"])
+                    for commit in rerun:
+                        os.replace(
+                            os.path.join(other, commit, "flexeme.csv"),
+                            os.path.join(evaluation_dir, commit, "flexeme.csv"),
+                        )
+                elapsed = timeit.timeit(lambda: score(cache_file), number=1)
+                print(f"{name},{size},{elapsed:.3f}")
+
+
+if __name__ == "__main__":
+    main()
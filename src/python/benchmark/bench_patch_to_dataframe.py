@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+"""
+Benchmarks the conversion of the changed lines of a patch into a DataFrame.
+
+The patches are synthetic: each file has hunks of 20 changed lines, half
+removed and half added, separated by context lines.
+
+Command Line Args:
+    sizes: Optional number of changed lines in the patch. Defaults to 1000, 10000, and 100000.
+Prints:
+    The time taken to convert each patch, in seconds.
+
+Run from the repository root with `python3 -m src.python.benchmark.bench_patch_to_dataframe`.
+"""
+
+import sys
+import timeit
+
+from unidiff import PatchSet
+
+from src.python.main.patch_to_csv import patch_to_dataframe
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+LINES_PER_HUNK = 20
+HUNKS_PER_FILE = 50
+
+
+def generate_patch(size):
+    """
+    Generate a synthetic patch with `size` changed lines.
+    """
+    diff = []
+    hunks = size // LINES_PER_HUNK
+    for hunk in range(hunks):
+        if hunk % HUNKS_PER_FILE == 0:
+            path = f"src/main/java/File{hunk // HUNKS_PER_FILE}.java"
+            diff.append(f"--- a/{path}\n+++ b/{path}\n")
+        start = (hunk % HUNKS_PER_FILE) * 100 + 1
+        half = LINES_PER_HUNK // 2
+        diff.append(f"@@ -{start},{half + 1} +{start},{half + 1} @@\n")
+        diff.append(" context();\n")
+        diff.extend(f"-removed({i});\n" for i in range(half))
+        diff.extend(f"+added({i});\n" for i in range(half))
+    return PatchSet.from_string("".join(diff))
+
+
+def main():
+    """
+    Implement the logic of the script. See the module docstring.
+    """
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+
+    for size in sizes:
+        patch = generate_patch(size)
+        elapsed = timeit.timeit(lambda: patch_to_dataframe(patch), number=1)
+        print(f"patch_to_dataframe,{size},{elapsed:.3f}")
+
+
+if __name__ == "__main__":
+    main()
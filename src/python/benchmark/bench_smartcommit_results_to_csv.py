@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+"""
+Benchmarks the translation of SmartCommit results to the line level.
+
+The results are synthetic: each file has 10 hunks of up to 8 changed lines,
+and the hunks are spread over one group per 4 files.
+
+Command Line Args:
+    sizes: Optional number of files in the results. Defaults to 100, 500, and 1000.
+Prints:
+    The time taken to read the results and generate the line-level decomposition, in seconds.
+
+Run from the repository root with `python3 -m src.python.benchmark.bench_smartcommit_results_to_csv`.
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import timeit
+
+from src.python.main.smartcommit_results_to_csv import generate_csv, read_results
+
+DEFAULT_SIZES = [100, 500, 1000]
+HUNKS_PER_FILE = 10
+FILES_PER_GROUP = 4
+
+
+def generate_results(size, result_dir, seed=0):
+    """
+    Write synthetic SmartCommit results for `size` files to result_dir.
+    """
+    rnd = random.Random(seed)
+    diff_dir = os.path.join(result_dir, "diffs")
+    groups_dir = os.path.join(result_dir, "generated_groups")
+    os.makedirs(diff_dir)
+    os.makedirs(groups_dir)
+
+    hunk_ids = []
+    for file in range(size):
+        path = f"src/main/java/File{file}.java"
+        file_id = f"file{file}"
+        hunks = {}
+        for hunk in range(HUNKS_PER_FILE):
+            start = hunk * 100 + 1
+            removed = rnd.randint(0, 4)
+            added = rnd.randint(0 if removed else 1, 4)
+            raw_diffs = [f"@@ -{start},{removed + 1} +{start},{added + 1} @@"]
+            raw_diffs.append(" context();")
+            raw_diffs.extend(f"-removed({i});" for i in range(removed))
+            raw_diffs.extend(f"+added({i});" for i in range(added))
+            hunks[str(hunk)] = {
+                "diffHunkID": f"h{hunk}",
+                "currentHunk": {"startLine": start, "endLine": start + added},
+                "rawDiffs": raw_diffs,
+            }
+            hunk_ids.append(f"{file_id}:h{hunk}")
+        with open(os.path.join(diff_dir, f"{file_id}.json"), "w") as file_io:
+            json.dump(
+                {
+                    "currentRelativePath": path,
+                    "fileID": file_id,
+                    "rawHeaders": [
+                        f"diff --git a/{path} b/{path}",
+                        "index 8422d40..e2c9801 100644",
+                        f"--- a/{path}",
+                        f"+++ b/{path}",
+                    ],
+                    "diffHunksMap": hunks,
+                },
+                file_io,
+            )
+
+    rnd.shuffle(hunk_ids)
+    groups = max(size // FILES_PER_GROUP, 1)
+    for group in range(groups):
+        with open(os.path.join(groups_dir, f"group{group}.json"), "w") as file_io:
+            json.dump(
+                {"groupID": f"group{group}", "diffHunkIDs": hunk_ids[group::groups]},
+                file_io,
+            )
+
+
+def main():
+    """
+    Implement the logic of the script. See the module docstring.
+    """
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as result_dir:
+            generate_results(size, result_dir)
+            diff_dir = os.path.join(result_dir, "diffs")
+            groups_dir = os.path.join(result_dir, "generated_groups")
+            elapsed = timeit.timeit(
+                lambda: generate_csv(read_results(diff_dir), groups_dir), number=1
+            )
+            print(f"smartcommit_results_to_csv,{size},{elapsed:.3f}")
+
+
+if __name__ == "__main__":
+    main()
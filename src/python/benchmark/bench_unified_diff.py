@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+"""
+Benchmarks parsing a diff with unidiff and with unified_diff.
+
+The diffs are synthetic: each file has 50 hunks of 20 changed lines.
+
+Command Line Args:
+    sizes: Optional number of changed lines in the diff. Defaults to 10000, 100000, and 1000000.
+Prints:
+    The time taken to parse the diff with unidiff.PatchSet and with unified_diff, in seconds.
+
+Run from the repository root with `python3 -m src.python.benchmark.bench_unified_diff`.
+"""
+
+import os
+import sys
+import tempfile
+import timeit
+
+from unidiff import PatchSet
+
+from src.python.benchmark.bench_clean_artifacts import generate_diff
+from src.python.main import unified_diff
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+
+def main():
+    """
+    Implement the logic of the script. See the module docstring.
+    """
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+
+    with tempfile.TemporaryDirectory() as tmp:
+        diff_file = os.path.join(tmp, "VC.diff")
+        for size in sizes:
+            generate_diff(size, diff_file)
+            elapsed = timeit.timeit(
+                lambda: PatchSet.from_filename(diff_file, encoding="latin-1"),
+                number=1,
+            )
+            print(f"unidiff,{size},{elapsed:.3f}")
+            elapsed = timeit.timeit(
+                lambda: unified_diff.from_filename(diff_file), number=1
+            )
+            print(f"unified_diff,{size},{elapsed:.3f}")
+
+
+if __name__ == "__main__":
+    main()
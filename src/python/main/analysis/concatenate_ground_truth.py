@@ -7,29 +7,25 @@ Concatenates the ground truth CSV files for an experiment into a single CSV file
 import sys
 import os
 
-import pandas as pd
 import argparse
 
 sys.path.insert(1, os.path.join(sys.path[0], '..'))
 import evaluation_results
+import evaluation_store
 
-def main(results_dir: str):
+def main(results_dir: str, store_dir: str = None, dataset: str = None):
     """
     Implements the script's logic. See module description for details.
+    The ground truth is read from the evaluation store if store_dir is given.
     """
-    ground_truth_files = evaluation_results.retrieve_ground_truth_files(results_dir)
-
-    dfs = []
-    for file in ground_truth_files:
-        truth_df = evaluation_results.read_ground_truth(file)
-        commit_folder = os.path.basename(os.path.dirname(file))
-        project, commit_id = commit_folder.split("_")
-
-        truth_df['project'] = project
-        truth_df['commit_id'] = commit_id
-        dfs.append(truth_df)
-
-    result_df = pd.concat(dfs, ignore_index=True)
+    if store_dir:
+        truth_df = evaluation_store.read_lines(store_dir, dataset, treatments="truth")
+        columns = evaluation_store.LINE_COLUMNS + ["project", "commit_id"]
+        print(truth_df[columns].to_csv(index=False))
+        return
+
+    result_df = evaluation_results.load_ground_truth(results_dir)
+    result_df = result_df[evaluation_results.GROUND_TRUTH_COLUMNS + evaluation_results.COMMIT_COLUMNS]
     print(result_df.to_csv(index=False))
 
 
@@ -40,13 +36,26 @@ if __name__ == "__main__":
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
 
-    parser.add_argument(
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
         "-d",
         "--results-dir",
         help="Path to the directory containing the results for an experiment",
-        required=True,
         metavar="RESULTS_DIR",
     )
 
+    source.add_argument(
+        "-s",
+        "--store",
+        help="Path to the evaluation store containing the ground truth (see evaluation_store.py)",
+        metavar="STORE_DIR",
+    )
+
+    parser.add_argument(
+        "--dataset",
+        help="Dataset of the evaluation store to read. Defaults to all the datasets",
+        metavar="DATASET",
+    )
+
     args = parser.parse_args()
-    main(args.results_dir)
\ No newline at end of file
+    main(args.results_dir, args.store, args.dataset)
\ No newline at end of file
@@ -15,19 +15,34 @@ The CSV file contains the following columns:
 import os
 import sys
 
+import numpy as np
 import pandas as pd
 
+# print_group_counts.py imports this module as a script, outside of the package.
+if __package__:
+    from .. import evaluation_results, evaluation_store
+else:
+    sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    import evaluation_results
+    import evaluation_store
+
 tool_result_filenames = ["flexeme.csv", "smartcommit.csv", "filename.csv"]
 
 column_names_commit = ["treatment", "file", "source", "target", "group"]
 column_names_dataset = ["project", "bug_id"] + column_names_commit
+# The line numbers are floats, as when pandas reads a file with missing line numbers.
+line_dtypes = {"file": str, "source": float, "target": float, "group": str}
 
-def normalize_untangled_lines(truth_df, untangled_lines_df) -> pd.DataFrame:
+def normalize_untangled_lines(truth_df, untangled_lines_df, keys=()) -> pd.DataFrame:
     """
     Normalize the untangled lines to match the ground truth CSV file.
     Specifically, the following changes are made:
     - Untangled lines that are not in the ground truth are removed.
     - Untangled lines that are missing compared to the ground truth are added with the group 'o'.
+
+    Arguments:
+        keys: Columns identifying the commit of each line, when the dataframes contain
+            the lines of several commits.
     """
     if untangled_lines_df is None:
         tool_df = truth_df.copy()
@@ -37,7 +52,7 @@ def normalize_untangled_lines(truth_df, untangled_lines_df) -> pd.DataFrame:
     df = pd.merge(
         truth_df,
         untangled_lines_df,
-        on=["file", "source", "target"],
+        on=[*keys, "file", "source", "target"],
         how="left",
         suffixes=("_truth", "_tool"),
     )
@@ -63,32 +78,44 @@ def concatenate_untangled_lines_for_commit(commit_dir) -> pd.DataFrame:
 
     truth_df = pd.read_csv(truth_path)
 
-    concatenate_df = pd.DataFrame(columns=column_names_commit)
-
+    untangled_lines_dfs = {}
     for tool_result_filename in tool_result_filenames:
         untangled_lines_file = os.path.join(commit_dir, tool_result_filename)
-        if not os.path.exists(untangled_lines_file):
-            untangled_lines_df = None
-        else:
-            untangled_lines_df = pd.read_csv(untangled_lines_file)
-        untangled_lines_normalize_df = normalize_untangled_lines(truth_df, untangled_lines_df)
-        untangled_lines_normalize_df["treatment"] = tool_result_filename.split(".")[0]
-        concatenate_df = pd.concat([concatenate_df, untangled_lines_normalize_df], ignore_index=True)
+        if os.path.exists(untangled_lines_file):
+            untangled_lines_dfs[tool_result_filename] = pd.read_csv(untangled_lines_file)
+    return concatenate_untangled_lines_for_frames(truth_df, untangled_lines_dfs)
 
-    truth_df["treatment"] = "truth"
-    concatenate_df = pd.concat([concatenate_df, truth_df], ignore_index=True)
-    return concatenate_df
 
-def concatenate_untangled_lines_for_dataset(evaluation_dir) -> pd.DataFrame:
+def concatenate_untangled_lines_for_frames(truth_df, untangled_lines_dfs, keys=()) -> pd.DataFrame:
     """
-    Concatenate the untangled lines from all the tools into a single dataframe.
-    Returns a dataframe with the columns specified in column_names_dataset.
+    Concatenate the untangled lines from all the tools and the ground truth, in the
+    order of tool_result_filenames followed by the ground truth.
 
     Arguments:
-        evaluation_dir: Path to the directory containing the subdirectories for each commit.
+        truth_df: The ground truth.
+        untangled_lines_dfs: The untangled lines of each tool, by tool result filename.
+            Tools without results are missing.
+        keys: Columns identifying the commit of each line, when the dataframes contain
+            the lines of several commits.
     """
-    concatenate_df = pd.DataFrame(columns=column_names_dataset)
+    dfs = []
+    for tool_result_filename in tool_result_filenames:
+        untangled_lines_df = untangled_lines_dfs.get(tool_result_filename)
+        untangled_lines_normalize_df = normalize_untangled_lines(truth_df, untangled_lines_df, keys)
+        untangled_lines_normalize_df["treatment"] = tool_result_filename.split(".")[0]
+        dfs.append(untangled_lines_normalize_df)
+
+    truth_df = truth_df.assign(treatment="truth")
+    dfs.append(truth_df)
+    return pd.concat(dfs, ignore_index=True)[[*keys, *column_names_commit]]
 
+
+def list_commit_dirs(evaluation_dir):
+    """
+    Returns the (project, bug_id, commit_dir) triple of each commit in the evaluation
+    directory, whose subdirectories are named <project>_<bug_id>.
+    """
+    commits = []
     for bug_tag in os.listdir(evaluation_dir):
         bug_dir = os.path.join(evaluation_dir, bug_tag)
         if not os.path.isdir(bug_dir):
@@ -104,25 +131,123 @@ def concatenate_untangled_lines_for_dataset(evaluation_dir) -> pd.DataFrame:
             )
             continue
         project, bug_id = split
+        commits.append((project, bug_id, bug_dir))
+    return commits
+
+
+def with_commit_columns(concatenate_df, projects, bug_ids) -> pd.DataFrame:
+    """
+    Replace the 'commit' index of each line by its project and bug id, and order the
+    lines by commit. Returns a dataframe with the columns specified in column_names_dataset,
+    where the columns with few distinct values are categorical.
+    """
+    treatments = [filename.split(".")[0] for filename in tool_result_filenames] + ["truth"]
+    concatenate_df["treatment"] = pd.Categorical(concatenate_df["treatment"], categories=treatments)
+    concatenate_df = concatenate_df.sort_values(["commit", "treatment"], kind="stable", ignore_index=True)
+
+    commit = concatenate_df["commit"].to_numpy(dtype=np.intp)
+    concatenate_df["project"] = pd.Categorical(np.asarray(projects, dtype=object)[commit])
+    concatenate_df["bug_id"] = pd.Categorical(np.asarray(bug_ids, dtype=object)[commit])
+    concatenate_df["group"] = concatenate_df["group"].astype("category")
+    return concatenate_df[column_names_dataset]
+
+
+def concatenate_untangled_lines_for_dataset(evaluation_dir, workers=1) -> pd.DataFrame:
+    """
+    Concatenate the untangled lines from all the tools into a single dataframe.
+    Returns a dataframe with the columns specified in column_names_dataset.
+
+    Arguments:
+        evaluation_dir: Path to the directory containing the subdirectories for each commit.
+        workers: Number of threads reading the CSV files.
+    """
+    commits = list_commit_dirs(evaluation_dir)
+    commit_columns = evaluation_results.COMMIT_COLUMNS
+    commit_index = pd.MultiIndex.from_tuples(
+        [(project, bug_id) for project, bug_id, _ in commits], names=commit_columns
+    )
+
+    # The column 'commit' holds the index of the commit of each line in commits.
+    # Commits without the file are skipped.
+    dfs = {}
+    for filename in ["truth.csv", *tool_result_filenames]:
+        files = [
+            os.path.join(commit_dir, filename)
+            for _, _, commit_dir in commits
+            if os.path.exists(os.path.join(commit_dir, filename))
+        ]
+        df = evaluation_results.read_commit_files(files, workers, dtype=line_dtypes)
+        df["commit"] = commit_index.get_indexer(pd.MultiIndex.from_frame(df[commit_columns]))
+        dfs[filename] = df.drop(columns=commit_columns)
+
+    truth_df = dfs.pop("truth.csv")
+    untangled_lines_dfs = dfs
+    concatenate_df = concatenate_untangled_lines_for_frames(truth_df, untangled_lines_dfs, keys=["commit"])
+    return with_commit_columns(
+        concatenate_df,
+        [project for project, _, _ in commits],
+        [bug_id for _, bug_id, _ in commits],
+    )
+
 
-        untangled_lines_for_commit_df = concatenate_untangled_lines_for_commit(bug_dir)
-        untangled_lines_for_commit_df["project"] = project
-        untangled_lines_for_commit_df["bug_id"] = bug_id
-        concatenate_df = pd.concat([concatenate_df, untangled_lines_for_commit_df], ignore_index=True)
-    return concatenate_df
-def main(evaluation_dir):
+def concatenate_untangled_lines_for_store(store_dir, dataset=None) -> pd.DataFrame:
+    """
+    Like concatenate_untangled_lines_for_dataset, but reads the ground truth and the
+    untangled lines from the evaluation store.
+
+    Arguments:
+        store_dir: Path to the evaluation store (see evaluation_store.py).
+        dataset: Optional dataset of the store to read.
+    """
+    treatments = {filename.split(".")[0]: filename for filename in tool_result_filenames}
+    lines_df = evaluation_store.read_lines(store_dir, dataset, treatments=["truth", *treatments])
+
+    # Number the commits with a ground truth, like the commit folders of an evaluation directory.
+    commits = pd.MultiIndex.from_frame(
+        lines_df.loc[lines_df["treatment"] == "truth", ["project", "commit_id"]]
+    ).unique()
+    lines_df["commit"] = commits.get_indexer(
+        pd.MultiIndex.from_frame(lines_df[["project", "commit_id"]])
+    )
+    lines_df = lines_df[lines_df["commit"] >= 0]
+
+    columns = ["commit", *evaluation_store.LINE_COLUMNS]
+    untangled_lines_dfs = {
+        filename: lines_df.loc[lines_df["treatment"] == treatment, columns]
+        for treatment, filename in treatments.items()
+        if (lines_df["treatment"] == treatment).any()
+    }
+    concatenate_df = concatenate_untangled_lines_for_frames(
+        lines_df.loc[lines_df["treatment"] == "truth", columns],
+        untangled_lines_dfs,
+        keys=["commit"],
+    )
+    return with_commit_columns(
+        concatenate_df, commits.get_level_values(0), commits.get_level_values(1)
+    )
+
+
+def main(evaluation_dir, store_dir=None, dataset=None):
     """
     Implement the logic of the script. See the module docstring for more
     information.
     """
-    concatenate_df = concatenate_untangled_lines_for_dataset(evaluation_dir)
+    if store_dir:
+        concatenate_df = concatenate_untangled_lines_for_store(store_dir, dataset)
+    else:
+        concatenate_df = concatenate_untangled_lines_for_dataset(evaluation_dir)
     print(concatenate_df.to_csv(index=False))
 
 if __name__ == "__main__":
     args = sys.argv[1:]
 
+    if args and args[0] == "--store" and len(args) in (2, 3):
+        main(None, os.path.abspath(args[1]), args[2] if len(args) == 3 else None)
+        sys.exit(0)
+
     if len(args) != 1:
         print("usage: concatenate_untangled_lines.py <path/to/untangling/evaluation/folder>")
+        print("       concatenate_untangled_lines.py --store <path/to/evaluation/store> [dataset]")
         print("example: concatenate_untangled_lines.py untangling-evaluation/evaluation")
         sys.exit(1)
 
@@ -83,7 +83,7 @@ def concatenate_datasets(dataset_dirs: List[str], dataset_name_map: Dict[str, st
         dataset_name_map: A mapping from the dataset directories to the dataset names to use in the dataframe.
     """
     column_names_evaluation = ["dataset"] + column_names_dataset
-    result_df = pd.DataFrame(columns=column_names_evaluation)
+    dfs = []
 
     for dataset_dir in dataset_dirs:
         if dataset_dir is None:
@@ -95,9 +95,11 @@ def concatenate_datasets(dataset_dirs: List[str], dataset_name_map: Dict[str, st
 
         untangled_lines_dataset_df = concatenate_untangled_lines_for_dataset(evaluation_path)
         untangled_lines_dataset_df["dataset"] = dataset_name_map[dataset_dir]
-        result_df = pd.concat([result_df, untangled_lines_dataset_df], ignore_index=True)
+        dfs.append(untangled_lines_dataset_df)
 
-    return result_df
+    if not dfs:
+        return pd.DataFrame(columns=column_names_evaluation)
+    return pd.concat(dfs, ignore_index=True)[column_names_evaluation]
 
 def main(args: argparse.Namespace):
     """
@@ -107,10 +109,10 @@ def main(args: argparse.Namespace):
     concatenated_df = concatenate_datasets([args.d4j, args.lltc4j], dataset_name_map)
 
     # Calculate the number of distinct groups per tool in each commit.
-    group_count_df = concatenated_df.groupby(['dataset', 'project', 'bug_id', 'treatment']).agg(group_count=('group', 'nunique'))
+    group_count_df = concatenated_df.groupby(['dataset', 'project', 'bug_id', 'treatment'], observed=True).agg(group_count=('group', 'nunique'))
 
     # Calculate summary statistics per treatment in each dataset.
-    summary_df = group_count_df.groupby(['dataset', 'treatment']).agg(['min', 'max', 'median', 'std'])
+    summary_df = group_count_df.groupby(['dataset', 'treatment'], observed=True).agg(['min', 'max', 'median', 'std'])
 
     summary_df = prettify_summary(summary_df)
     print(summary_df.style
@@ -16,10 +16,10 @@ def main(args: argparse.Namespace):
     dataset_name_map = {args.d4j: "Defects4J", args.lltc4j: "LLTC4J"}
     concatenated_df = concatenate_datasets([args.d4j, args.lltc4j], dataset_name_map)
 
-    group_size_df = concatenated_df.groupby(['dataset', 'project', 'bug_id', 'treatment', 'group']).size()
+    group_size_df = concatenated_df.groupby(['dataset', 'project', 'bug_id', 'treatment', 'group'], observed=True).size()
 
     # Group by 'treatment' and calculate summary statistics
-    summary_df = group_size_df.groupby(['dataset', 'treatment']).agg(['min', 'max', 'median', 'std'])
+    summary_df = group_size_df.groupby(['dataset', 'treatment'], observed=True).agg(['min', 'max', 'median', 'std'])
 
     summary_df = prettify_summary(summary_df)
 
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+
+"""
+Calculates the untangling scores of every commit of an evaluation directory
+in one Python process, instead of starting one untangling_score.py process
+per commit. See untangling_score.py for the scores.
+
+Commits that cannot be scored (e.g., missing ground truth, no bug-fixing
+changes) are reported on stderr and skipped.
+
+Command Line Args:
+    - evaluation: Directory containing one <project>_<commit_id> subfolder per commit.
+    - commits-file: CSV file without header listing the project and the commit id of each commit to score.
+    - out-file: The CSV file where the scores are written. The rows of the scored commits
+      are replaced or inserted, and the rows of the other commits are kept, so that scoring
+      a subset of the commits updates the scores of all the commits.
+    - workers: Optional number of worker processes. Defaults to 1, which scores in the current process.
+    - commit-scores: Also write the scores of each commit to scores.csv in its subfolder.
+    - cache: Optional JSON file recording the fingerprint of the inputs of each (commit, tool)
+      pair and its score. Only the tools whose ground truth, results, or scoring script
+      changed since the last run are scored again, e.g., after re-running Flexeme on a
+      few commits; the other scores are copied from the cache.
+Returns:
+    The out-file, with the scores of each commit sorted by subfolder name. The rows of the
+    commits of commits-file that cannot be scored are removed.
+    CSV header: none. Columns: project,vid,smartcommit_score,flexeme_score,file_untangling_score
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from os import path
+
+from . import untangling_score
+from .pipeline.cache import file_digest
+from .untangling_score import (
+    TOOL_CSV,
+    calculate_score_for_tool,
+    format_scores,
+    read_tool_results,
+    read_truth,
+    score_commit,
+)
+
+
+def read_commits(commits_file):
+    """
+    Returns the (project, commit id) pairs listed in commits_file, sorted by subfolder name.
+    """
+    with open(commits_file, newline="") as file:
+        commits = [(row[0], row[1]) for row in csv.reader(file) if row]
+    return sorted(commits, key=lambda commit: f"{commit[0]}_{commit[1]}")
+
+
+def report_unscorable(evaluation_dir, error):
+    """
+    Reports on stderr why the commit whose results are in evaluation_dir cannot be scored.
+    """
+    if isinstance(error, FileNotFoundError):
+        print(
+            f"{path.basename(evaluation_dir)}: Ground truth file not found: {error.filename}",
+            file=sys.stderr,
+        )
+    else:
+        print(f"{path.basename(evaluation_dir)}: {error}", file=sys.stderr)
+
+
+def score_commit_dir(evaluation_dir):
+    """
+    Returns the scores of the commit whose results are in evaluation_dir, or
+    None if the commit cannot be scored.
+    """
+    try:
+        return score_commit(evaluation_dir)
+    except (FileNotFoundError, ValueError) as e:
+        report_unscorable(evaluation_dir, e)
+    return None
+
+
+def tool_fingerprints(evaluation_dir, script):
+    """
+    Returns the fingerprint of the inputs of the score of each tool of a commit: the
+    content of its ground truth, of the results of the tool, and of the scoring script,
+    whose digest is script.
+    """
+    truth_file = path.join(evaluation_dir, "truth.csv")
+    truth = file_digest(truth_file) if path.exists(truth_file) else None
+
+    fingerprints = {}
+    for tool_csv in TOOL_CSV:
+        tool_file = path.join(evaluation_dir, tool_csv)
+        tool = file_digest(tool_file) if path.exists(tool_file) else None
+        fingerprints[tool_csv] = hashlib.sha256(
+            json.dumps([truth, tool, script]).encode()
+        ).hexdigest()
+    return fingerprints
+
+
+def score_commit_incrementally(evaluation_dir, cached, script):
+    """
+    Scores the tools of a commit whose fingerprint is not the one in its cache entry.
+
+    Args:
+        evaluation_dir: The directory containing the results of the commit.
+        cached: The cache entry of the commit, mapping each tool to its fingerprint and score.
+        script: The digest of the scoring script.
+    Returns:
+        The scores of the commit, or None if the commit cannot be scored, and its new
+        cache entry.
+    """
+    fingerprints = tool_fingerprints(evaluation_dir, script)
+    entry = {
+        tool_csv: cached[tool_csv]
+        for tool_csv, fingerprint in fingerprints.items()
+        if tool_csv in cached and cached[tool_csv][0] == fingerprint
+    }
+    stale_tools = [tool_csv for tool_csv in TOOL_CSV if tool_csv not in entry]
+    if stale_tools:
+        try:
+            truth_df = read_truth(evaluation_dir)
+        except (FileNotFoundError, ValueError) as e:
+            report_unscorable(evaluation_dir, e)
+            return None, {}
+        for tool_csv in stale_tools:
+            score = calculate_score_for_tool(
+                truth_df, read_tool_results(evaluation_dir, tool_csv)
+            )
+            entry[tool_csv] = [fingerprints[tool_csv], score]
+    return [entry[tool_csv][1] for tool_csv in TOOL_CSV], entry
+
+
+def read_cache(cache_file):
+    """
+    Returns the cache entries of each commit subfolder, or no entry if there is no cache.
+    """
+    try:
+        with open(cache_file) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def write_cache(cache_file, entries):
+    """
+    Writes the cache entries atomically.
+    """
+    tmp_file = f"{cache_file}.tmp"
+    with open(tmp_file, "w") as file:
+        json.dump(entries, file, indent=2, sort_keys=True)
+    os.replace(tmp_file, cache_file)
+
+
+def score_commits(evaluation_root, commits, workers=1, cache_file=None):
+    """
+    Scores the commits and returns the CSV row of each scored commit.
+
+    Args:
+        evaluation_root: Directory containing one <project>_<commit_id> subfolder per commit.
+        commits: The (project, commit id) pairs to score.
+        workers: The number of worker processes. With 1 worker, the commits are scored in the current process.
+        cache_file: Optional cache of the scores of each tool (see the module docstring).
+    Returns:
+        A list of (project, commit id, row) tuples, in the order of commits.
+    """
+    names = [f"{project}_{commit_id}" for project, commit_id in commits]
+    evaluation_dirs = [path.join(evaluation_root, name) for name in names]
+    if cache_file:
+        cache = read_cache(cache_file)
+        cached = [cache.get(name, {}) for name in names]
+        script = file_digest(untangling_score.__file__)
+        function = score_commit_incrementally
+        arguments = [evaluation_dirs, cached, repeat(script)]
+    else:
+        function, arguments = score_commit_dir, [evaluation_dirs]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(function, *arguments, chunksize=8))
+    else:
+        results = [function(*argument) for argument in zip(*arguments)]
+
+    if cache_file:
+        # The entries of commits that are not scored in this run are kept.
+        cache.update((name, entry) for name, (_, entry) in zip(names, results) if entry)
+        write_cache(cache_file, cache)
+        scores = [tool_scores for tool_scores, _ in results]
+    else:
+        scores = results
+
+    return [
+        (project, commit_id, format_scores(project, commit_id, tool_scores))
+        for (project, commit_id), tool_scores in zip(commits, scores)
+        if tool_scores is not None
+    ]
+
+
+def read_scores(out_file):
+    """
+    Returns the rows of the scores file by (project, commit id), or no row if there is
+    no scores file.
+    """
+    try:
+        with open(out_file) as file:
+            lines = file.read().splitlines()
+    except FileNotFoundError:
+        return {}
+    return {tuple(line.split(",", 2)[:2]): line for line in lines if line}
+
+
+def write_scores(out_file, commits, rows):
+    """
+    Updates the scores file atomically: the rows of the commits are replaced by their
+    new rows, if any, and the rows of the other commits are kept.
+
+    Args:
+        out_file: The scores file.
+        commits: The (project, commit id) pairs that were scored.
+        rows: The (project, commit id, row) tuples of the scored commits.
+    """
+    scores = read_scores(out_file)
+    for commit in commits:
+        scores.pop(commit, None)
+    scores.update(((project, commit_id), row) for project, commit_id, row in rows)
+
+    tmp_file = f"{out_file}.tmp"
+    with open(tmp_file, "w") as file:
+        file.writelines(
+            scores[commit] + "\n"
+            for commit in sorted(scores, key=lambda commit: f"{commit[0]}_{commit[1]}")
+        )
+    os.replace(tmp_file, out_file)
+
+
+def main(
+    evaluation_root,
+    commits_file,
+    out_file,
+    workers=1,
+    commit_scores=False,
+    cache_file=None,
+):
+    """
+    Implement the logic of the script. See the module docstring.
+    """
+    commits = read_commits(commits_file)
+    rows = score_commits(evaluation_root, commits, workers, cache_file)
+
+    if commit_scores:
+        for project, commit_id, row in rows:
+            scores_file = path.join(
+                evaluation_root, f"{project}_{commit_id}", "scores.csv"
+            )
+            with open(scores_file, "w") as file:
+                file.write(row + "\n")
+
+    write_scores(out_file, commits, rows)
+
+    print(f"Scored {len(rows)} of {len(commits)} commits", file=sys.stderr)
+    if not rows:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog=sys.argv[0],
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+
+    parser.add_argument(
+        "--evaluation",
+        "-e",
+        help="Directory containing one <project>_<commit_id> subfolder per commit",
+        required=True,
+        metavar="EVALUATION_DIR",
+    )
+
+    parser.add_argument(
+        "--commits-file",
+        "-c",
+        help="CSV file without header listing the project and the commit id of each commit",
+        required=True,
+        metavar="COMMITS_FILE",
+    )
+
+    parser.add_argument(
+        "--out-file",
+        "-o",
+        help="CSV file where the scores of all commits are written",
+        required=True,
+        metavar="OUT_FILE",
+    )
+
+    parser.add_argument(
+        "--workers",
+        "-w",
+        help="Number of worker processes",
+        type=int,
+        default=1,
+        metavar="WORKERS",
+    )
+
+    parser.add_argument(
+        "--commit-scores",
+        help="Also write the scores of each commit to scores.csv in its subfolder",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--cache",
+        help="JSON file caching the score of each commit and tool",
+        metavar="CACHE_FILE",
+    )
+
+    args = parser.parse_args()
+    main(
+        args.evaluation,
+        args.commits_file,
+        args.out_file,
+        args.workers,
+        args.commit_scores,
+        args.cache,
+    )
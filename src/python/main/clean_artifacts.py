@@ -5,21 +5,72 @@ unified diff file or Java source code.  A file is considered "clean"
 if it satisfies the criteria listed in ground truth construction in
 README.
 
+Given a directory, the script instead removes the comments, blank lines, and trailing
+whitespace of every Java file in or under it, like clean-java-file.sh does for one file.
+
 Command Line Args:
-    filename: the dsired filename for the unidifed diff (.diff) or Java source code (.java) input
+    filename: the dsired filename for the unidifed diff (.diff) or Java source code (.java) input,
+        or a directory containing Java files
 Returns:
     Creates and writes to the desired file the cleaned input.
 
 """
+
 import fileinput
+import re
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor
 from unidiff import (
     PatchSet,
     LINE_TYPE_CONTEXT,
     LINE_TYPE_REMOVED,
     LINE_TYPE_ADDED,
 )
+from unidiff.constants import (
+    DEV_NULL,
+    LINE_TYPE_EMPTY,
+    LINE_TYPE_NO_NEWLINE,
+    LINE_VALUE_NO_NEWLINE,
+    RE_BINARY_DIFF,
+    RE_DIFF_GIT_DELETED_FILE,
+    RE_DIFF_GIT_HEADER,
+    RE_DIFF_GIT_HEADER_NO_PREFIX,
+    RE_DIFF_GIT_HEADER_URI_LIKE,
+    RE_DIFF_GIT_NEW_FILE,
+    RE_HUNK_BODY_LINE,
+    RE_HUNK_EMPTY_BODY_LINE,
+    RE_HUNK_HEADER,
+    RE_NO_NEWLINE_MARKER,
+    RE_SOURCE_FILENAME,
+    RE_TARGET_FILENAME,
+)
+
+NONCODE_LINE_PREFIXES = ("/*", "*/", "//", "*", "import")
+
+# Only ASCII whitespace: the files are decoded as Latin-1, in which some bytes of
+# multi-byte UTF-8 characters are whitespace.
+JAVA_WHITESPACE = " \t\n\v\f\r"
+
+# The lexical elements of Java source that matter to remove comments like the C
+# preprocessor does. String and character literals end at the end of the line if
+# they are not terminated.
+JAVA_TOKEN = re.compile(
+    r"""(?P<newline>\n)
+    |(?P<space>[ \t\f\v]+)
+    |(?P<line_comment>//[^\n]*)
+    |(?P<block_comment>/\*.*?\*/)
+    |(?P<unterminated_comment>/\*)
+    |(?P<code>"(?:[^"\\\n]|\\[^\n])*"?|'(?:[^'\\\n]|\\[^\n])*'?|[^ \t\f\v\n"'/]+|/)""",
+    re.DOTALL | re.VERBOSE,
+)
+
+
+class UnsupportedDiffError(ValueError):
+    """
+    Raised by the streaming diff cleaner when the diff contains a construct it
+    does not handle. The diff is then cleaned with the PatchSet implementation.
+    """
 
 
 def remove_noncode_lines(patch):
@@ -39,9 +90,6 @@ def remove_noncode_lines(patch):
         The PatchSet Object modified in-place.
 
     """
-    ignore_comments = True
-    ignore_imports = True
-
     for file in patch:
         # Skip non-Java files.
         # lower() is used to catch cases where the extension is in upper case.
@@ -56,14 +104,7 @@ def remove_noncode_lines(patch):
 
         # Skip test files. We need at least one version of the file to be a test
         # file to cover addition, deletion, and modification cases.
-        if (
-            not (
-                file.source_file.lower().endswith(".java")
-                or file.target_file.lower().endswith(".java")
-            )
-            or is_test_file(file.source_file)
-            or is_test_file(file.target_file)
-        ):
+        if not is_code_file(file.source_file, file.target_file):
             file.patch_info = None
             file.source_file = ""
             file.source_timestamp = None
@@ -75,20 +116,32 @@ def remove_noncode_lines(patch):
             for line in hunk:
                 if line.line_type == LINE_TYPE_CONTEXT:
                     continue
-                if ignore_comments and (
-                    line.value.strip().startswith("/*")
-                    or line.value.strip().startswith("*/")
-                    or line.value.strip().startswith("//")
-                    or line.value.strip().startswith("*")
-                ):
-                    line.value = "\n"
-                if ignore_imports and line.value.strip().startswith("import"):
-                    line.value = "\n"
-                if not line.value.strip():
+                if is_noncode_line(line.value):
                     line.value = "\n"
     return patch
 
 
+def is_code_file(source_file, target_file):
+    """
+    Returns True if a file in a diff is a Java source file that is not a test.
+
+    Args:
+        source_file: The source filename of the file in the diff.
+        target_file: The target filename of the file in the diff.
+    """
+    return (
+        source_file.lower().endswith(".java") or target_file.lower().endswith(".java")
+    ) and not (is_test_file(source_file) or is_test_file(target_file))
+
+
+def is_noncode_line(value):
+    """
+    Returns True if the content of a changed line is a comment, an import
+    statement, or whitespace.
+    """
+    return not value.strip() or value.strip().startswith(NONCODE_LINE_PREFIXES)
+
+
 def is_test_file(filename):
     """
     Returns True if the filename is a filename for tests.
@@ -171,11 +224,360 @@ def filter(patch):
     return fixed_info_patch
 
 
-def clean_diff(diff_file):
+class DiffFile:
     """
-    Returns a new diff file, "_clean.diff", where diff is the final cleaned version.
+    The header and the pending hunk of the file currently streamed by the DiffCleaner.
+    """
+
+    __slots__ = [
+        "patch_info",
+        "source_file",
+        "source_timestamp",
+        "target_file",
+        "target_timestamp",
+        "is_binary_file",
+        "has_hunks",
+        "hunk",
+        "is_header_written",
+    ]
+
+    def __init__(
+        self,
+        patch_info,
+        source_file,
+        target_file,
+        source_timestamp=None,
+        target_timestamp=None,
+    ):
+        self.patch_info = patch_info
+        self.source_file = source_file
+        self.source_timestamp = source_timestamp
+        self.target_file = target_file
+        self.target_timestamp = target_timestamp
+        self.is_binary_file = False
+        self.has_hunks = False
+        # The last hunk read, as a tuple (header fields, line types, line values).
+        # It is only written when the next hunk or file starts because trailing
+        # lines can still be appended to it.
+        self.hunk = None
+        self.is_header_written = False
+
+
+class DiffCleaner:
+    """
+    Cleans a unified diff in a single pass over its lines and writes the
+    cleaned diff incrementally, holding at most one hunk in memory.
+
+    The output is identical to cleaning the diff with `filter` on a PatchSet.
+    To guarantee this, the cleaner follows the same parsing rules as unidiff
+    and raises an UnsupportedDiffError for constructs it does not handle (e.g.,
+    binary patches or malformed hunks).
+    """
+
+    def __init__(self, output):
+        self._output = output
+        self._file = None
+        self._patch_info = None
+        # Filename and timestamp of the last '---' line, consumed by the next '+++' line.
+        self._source_file = None
+        self._source_timestamp = None
+
+    def clean(self, lines):
+        """
+        Clean the diff lines and write the result to the output.
+        """
+        lines = iter(lines)
+        for line in lines:
+            git_header = (
+                RE_DIFF_GIT_HEADER.match(line)
+                or RE_DIFF_GIT_HEADER_URI_LIKE.match(line)
+                or RE_DIFF_GIT_HEADER_NO_PREFIX.match(line)
+            )
+            if git_header:
+                self._patch_info = [line]
+                self._source_file = git_header.group("source")
+                self._set_file(
+                    DiffFile(
+                        self._patch_info, self._source_file, git_header.group("target")
+                    )
+                )
+                continue
+
+            if RE_DIFF_GIT_NEW_FILE.match(line):
+                self._check_in_file_header(line)
+                self._file.source_file = DEV_NULL
+                self._patch_info.append(line)
+                continue
+
+            if RE_DIFF_GIT_DELETED_FILE.match(line):
+                self._check_in_file_header(line)
+                self._file.target_file = DEV_NULL
+                self._patch_info.append(line)
+                continue
+
+            source_filename = RE_SOURCE_FILENAME.match(line)
+            if source_filename:
+                self._source_file = source_filename.group("filename")
+                self._source_timestamp = source_filename.group("timestamp")
+                if self._file is not None and self._patch_info is None:
+                    self._set_file(None)
+                elif self._file is not None:
+                    self._file.source_timestamp = self._source_timestamp
+                continue
+
+            target_filename = RE_TARGET_FILENAME.match(line)
+            if target_filename:
+                self._read_target_filename(line, target_filename)
+                continue
+
+            if RE_HUNK_HEADER.match(line):
+                self._patch_info = None
+                if self._file is None:
+                    raise UnsupportedDiffError(f"Unexpected hunk found: {line}")
+                self._read_hunk(line, lines)
+                continue
+
+            if RE_NO_NEWLINE_MARKER.match(line):
+                if self._file is None or self._file.hunk is None:
+                    raise UnsupportedDiffError(f"Unexpected marker: {line}")
+                _, line_types, line_values = self._file.hunk
+                line_types.append(LINE_TYPE_NO_NEWLINE)
+                line_values.append(LINE_VALUE_NO_NEWLINE + "\n")
+                continue
+
+            if line == "\n" and self._file is not None and self._file.has_hunks:
+                _, line_types, line_values = self._file.hunk
+                line_types.append(LINE_TYPE_EMPTY)
+                line_values.append("\n")
+                continue
+
+            self._read_patch_info(line)
+        self._set_file(None)
+
+    def _check_in_file_header(self, line):
+        """
+        Raise an UnsupportedDiffError if the line is not in the header of a file.
+        """
+        if self._file is None or self._patch_info is None:
+            raise UnsupportedDiffError(f"Unexpected file header: {line}")
+
+    def _read_target_filename(self, line, target_filename):
+        """
+        Read a '+++' line, which starts a new file unless it is part of a git header.
+        """
+        target_file = target_filename.group("filename")
+        target_timestamp = target_filename.group("timestamp")
+        if self._file is None:
+            if self._source_file is None:
+                raise UnsupportedDiffError(f"Target without source: {line}")
+            self._set_file(
+                DiffFile(
+                    self._patch_info,
+                    self._source_file,
+                    target_file,
+                    self._source_timestamp,
+                    target_timestamp,
+                )
+            )
+            self._patch_info = None
+            self._source_file = None
+            self._source_timestamp = None
+        elif self._file.target_file != target_file or self._file.has_hunks:
+            raise UnsupportedDiffError(f"Target without source: {line}")
+        else:
+            self._file.target_timestamp = target_timestamp
+
+    def _read_patch_info(self, line):
+        """
+        Read a line that is not part of a hunk nor a filename header.
+        """
+        if self._patch_info is None:
+            self._set_file(None)
+            self._patch_info = []
+
+        binary_diff = RE_BINARY_DIFF.match(line)
+        if binary_diff:
+            self._source_file = binary_diff.group("source_filename")
+            self._patch_info.append(line)
+            if self._file is None:
+                target_file = binary_diff.group("target_filename") or self._source_file
+                self._set_file(
+                    DiffFile(self._patch_info, self._source_file, target_file)
+                )
+            self._file.is_binary_file = True
+            self._patch_info = None
+            self._set_file(None)
+            return
+
+        if line == "GIT binary patch\n":
+            raise UnsupportedDiffError("Binary patches are not supported")
+
+        self._patch_info.append(line)
+
+    def _read_hunk(self, header, lines):
+        """
+        Read the lines of a hunk and keep it as the pending hunk of the current file.
+        """
+        source_start, source_length, target_start, target_length, section_header = (
+            RE_HUNK_HEADER.match(header).groups()
+        )
+        source_start = int(source_start)
+        target_start = int(target_start)
+        source_length = 1 if source_length is None else int(source_length)
+        target_length = 1 if target_length is None else int(target_length)
+        if source_length == 0 and target_length == 0:
+            raise UnsupportedDiffError(f"Empty hunk: {header}")
+
+        source_end = source_start + source_length
+        target_end = target_start + target_length
+        source_line_no = source_start
+        target_line_no = target_start
+        line_types = []
+        line_values = []
+        for line in lines:
+            body_line = RE_HUNK_BODY_LINE.match(line) or RE_HUNK_EMPTY_BODY_LINE.match(
+                line
+            )
+            if not body_line:
+                raise UnsupportedDiffError(f"Hunk diff line expected: {line}")
+
+            line_type = body_line.group("line_type") or LINE_TYPE_CONTEXT
+            if line_type == LINE_TYPE_ADDED:
+                target_line_no += 1
+            elif line_type == LINE_TYPE_REMOVED:
+                source_line_no += 1
+            elif line_type == LINE_TYPE_CONTEXT:
+                target_line_no += 1
+                source_line_no += 1
+
+            if source_line_no > source_end or target_line_no > target_end:
+                raise UnsupportedDiffError("Hunk is longer than expected")
+
+            line_types.append(line_type)
+            line_values.append(body_line.group("value"))
+
+            if source_line_no == source_end and target_line_no == target_end:
+                break
+
+        if source_line_no < source_end or target_line_no < target_end:
+            raise UnsupportedDiffError("Hunk is shorter than expected")
+
+        self._write_hunk(self._file)
+        self._file.has_hunks = True
+        self._file.hunk = (
+            (source_start, target_start, section_header),
+            line_types,
+            line_values,
+        )
+
+    def _set_file(self, diff_file):
+        """
+        Finish the current file and start the given one.
+        """
+        previous_file = self._file
+        self._file = diff_file
+        if previous_file is None:
+            return
+
+        self._write_hunk(previous_file)
+        if not previous_file.is_header_written and is_code_file(
+            previous_file.source_file, previous_file.target_file
+        ):
+            self._write_file_header(previous_file)
+
+    def _write_file_header(self, diff_file):
+        """
+        Write the patch info and the filenames of the file.
+        """
+        diff_file.is_header_written = True
+        if diff_file.patch_info is not None:
+            self._output.write("".join(diff_file.patch_info))
+        if not diff_file.is_binary_file and diff_file.has_hunks:
+            self._output.write(
+                "--- %s%s\n"
+                % (
+                    diff_file.source_file,
+                    (
+                        "\t" + diff_file.source_timestamp
+                        if diff_file.source_timestamp
+                        else ""
+                    ),
+                )
+            )
+            self._output.write(
+                "+++ %s%s\n"
+                % (
+                    diff_file.target_file,
+                    (
+                        "\t" + diff_file.target_timestamp
+                        if diff_file.target_timestamp
+                        else ""
+                    ),
+                )
+            )
+
+    def _write_hunk(self, diff_file):
+        """
+        Clean and write the pending hunk of the file. The file header is written
+        before its first hunk.
+        """
+        if diff_file.hunk is None:
+            return
+        (source_start, target_start, section_header), line_types, line_values = (
+            diff_file.hunk
+        )
+        diff_file.hunk = None
+        if not is_code_file(diff_file.source_file, diff_file.target_file):
+            return
+
+        # Same as remove_noncode_lines.
+        for i, line_type in enumerate(line_types):
+            if line_type != LINE_TYPE_CONTEXT and is_noncode_line(line_values[i]):
+                line_values[i] = "\n"
+
+        # Same as cancel_out_diff.
+        i = 0
+        while i < len(line_types) - 1:
+            if (
+                LINE_TYPE_CONTEXT not in (line_types[i], line_types[i + 1])
+                and line_values[i].strip() == line_values[i + 1].strip()
+                and line_types[i] != line_types[i + 1]
+            ):
+                line_values[i] = "\n"
+                line_values[i + 1] = "\n"
+                i += 2
+                continue
+            i += 1
+
+        # Same as fix_hunk_info.
+        context_length = line_types.count(LINE_TYPE_CONTEXT)
+        source_length = context_length + line_types.count(LINE_TYPE_REMOVED)
+        target_length = context_length + line_types.count(LINE_TYPE_ADDED)
+
+        if not diff_file.is_header_written:
+            self._write_file_header(diff_file)
+        if source_length == 0 and target_length == 0:
+            return
+        self._output.write(
+            f"@@ -{source_start},{source_length} +{target_start},{target_length} @@ {section_header}\n"
+        )
+        self._output.writelines(map(str.__add__, line_types, line_values))
+
+
+def stream_clean_diff(diff_file, cleaned_diff_file):
+    """
+    Clean the diff file with a DiffCleaner and write the result to cleaned_diff_file.
+    """
+    with open(diff_file, "r", encoding="latin-1") as diff, open(
+        cleaned_diff_file, "w", encoding="latin-1"
+    ) as cleaned_diff:
+        DiffCleaner(cleaned_diff).clean(diff)
+
+
+def patchset_clean_diff(diff_file, cleaned_diff_file):
+    """
+    Clean the diff file by parsing it into a PatchSet and write the result to cleaned_diff_file.
     """
-    cleaned_diff_file = os.path.splitext(diff_file)[0] + "_clean.diff"
     patch = PatchSet.from_filename(filename=diff_file, encoding="latin-1")
     patch = filter(patch)
     cleaned_patch = []
@@ -209,6 +611,19 @@ def clean_diff(diff_file):
         file.writelines(cleaned_patch)
 
 
+def clean_diff(diff_file):
+    """
+    Returns a new diff file, "_clean.diff", where diff is the final cleaned version.
+    The diff is streamed line by line. Diffs that cannot be streamed are parsed into a PatchSet instead.
+    """
+    cleaned_diff_file = os.path.splitext(diff_file)[0] + "_clean.diff"
+    try:
+        stream_clean_diff(diff_file, cleaned_diff_file)
+    except UnsupportedDiffError as e:
+        print(f"Cleaning {diff_file} with PatchSet: {e}", file=sys.stderr)
+        patchset_clean_diff(diff_file, cleaned_diff_file)
+
+
 def clean_source_code(java_file):
     """
     Remove comments, import statements, and empty lines from the Java source code.
@@ -228,6 +643,125 @@ def clean_source_code(java_file):
             print(line, end="")
 
 
+def strip_java_comments(source):
+    """
+    Returns the Java source without comments, blank lines, and trailing whitespace.
+
+    This is equivalent to the pipeline of clean-java-file.sh, i.e., to
+    `cpp -fpreprocessed -dD -E` followed by the removal of the lines starting with '#'
+    or '//', of the trailing whitespace, and of the blank lines. Like the preprocessor,
+    a comment or a run of whitespace between two tokens of a line becomes one space,
+    and the first token of a line is indented by its column.
+
+    Raises:
+        ValueError: If a comment is not terminated.
+    """
+    source = source.replace("\r\n", "\n").replace("\r", "\n")
+    lines = []
+    line = []
+    line_start = 0
+    is_space_before = False
+    for token in JAVA_TOKEN.finditer(source):
+        kind = token.lastgroup
+        if kind == "code":
+            if line:
+                line.append(" " if is_space_before else "")
+            else:
+                line.append(" " * (token.start() - line_start))
+            line.append(token.group())
+            is_space_before = False
+        elif kind == "newline" or (kind == "block_comment" and "\n" in token.group()):
+            lines.append("".join(line))
+            line = []
+            line_start = source.rfind("\n", 0, token.end()) + 1
+            is_space_before = kind == "block_comment"
+        elif kind == "unterminated_comment":
+            raise ValueError("Unterminated comment")
+        else:
+            is_space_before = True
+    lines.append("".join(line))
+
+    cleaned_lines = []
+    for line in lines:
+        line = line.rstrip(JAVA_WHITESPACE)
+        stripped = line.lstrip(JAVA_WHITESPACE)
+        if stripped and not stripped.startswith(("#", "//")):
+            cleaned_lines.append(f"{line}\n")
+    return "".join(cleaned_lines)
+
+
+def clean_java_file(java_file):
+    """
+    Removes the comments, blank lines, and trailing whitespace of a Java file in place.
+    The file is only written if its content changes.
+
+    Returns:
+        True if the file changed.
+    Raises:
+        ValueError: If a comment is not terminated. The file is not modified.
+    """
+    with open(java_file, "r", encoding="latin-1", newline="") as file:
+        source = file.read()
+    cleaned = strip_java_comments(source)
+    if cleaned == source:
+        return False
+    with open(java_file, "w", encoding="latin-1", newline="") as file:
+        file.write(cleaned)
+    return True
+
+
+def find_java_files(directory):
+    """
+    Returns the Java files in or under the directory, except in .git directories.
+    """
+    java_files = []
+    for root, dirs, files in os.walk(directory):
+        if ".git" in dirs:
+            dirs.remove(".git")
+        java_files.extend(
+            os.path.join(root, name) for name in files if name.endswith(".java")
+        )
+    return java_files
+
+
+def clean_java_file_or_report(java_file):
+    """
+    Cleans the Java file, or reports on stderr why it cannot be cleaned.
+    Returns True if the file changed.
+    """
+    try:
+        return clean_java_file(java_file)
+    except ValueError as e:
+        print(f"{java_file}: {e}", file=sys.stderr)
+    return False
+
+
+def clean_java_directory(directory, workers=None):
+    """
+    Cleans every Java file in or under the directory like clean-java-file.sh,
+    in a pool of worker processes. Files that cannot be cleaned are reported on stderr
+    and left unchanged.
+
+    Args:
+        directory: The directory to clean, e.g., a checked out revision.
+        workers: The number of worker processes. Defaults to the number of CPUs. With 1
+            worker, the files are cleaned in the current process.
+    Returns:
+        The number of files that changed.
+    """
+    java_files = find_java_files(directory)
+    workers = workers or os.cpu_count()
+    if workers > 1 and len(java_files) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            changed = executor.map(
+                clean_java_file_or_report,
+                java_files,
+                chunksize=max(1, len(java_files) // (4 * workers)),
+            )
+            return sum(changed)
+    return sum(map(clean_java_file_or_report, java_files))
+
+
 def main():
     """
     Implement the logic of the script. See the module docstring.
@@ -235,12 +769,14 @@ def main():
     args = sys.argv[1:]
 
     if len(args) != 1:
-        print("usage: src/clean_diff.py <filename>")
+        print("usage: src/clean_diff.py <filename | directory>")
         sys.exit(1)
 
     filename = args[0]
 
-    if filename.endswith(".java"):
+    if os.path.isdir(filename):
+        clean_java_directory(filename)
+    elif filename.endswith(".java"):
         clean_source_code(filename)
     elif filename.endswith(".diff"):
         clean_diff(filename)
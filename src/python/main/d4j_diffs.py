@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+
+"""
+Generates the diffs of a Defects4J bug in one process: the VC, NBF, and BF diffs,
+their cleaned versions (<name>_clean.diff, see clean_artifacts.py), and the
+ParsedPatch of each of the six diffs (<name>.parsed, see parsed_patch.py), which
+ground_truth.py and diff_metrics.py read instead of parsing the diffs again.
+
+The three diffs are generated concurrently by d4j_diff (see d4j_utils.sh), and each
+one is cleaned and parsed as soon as it is written.
+
+Command Line Args:
+    project: D4J project name.
+    vid: D4J bug id.
+    repository: Path to the clone of the bug.
+    diff_dir: Directory where the diffs are written.
+    revision_original: The original revision (buggy version in version control).
+    revision_buggy: The buggy revision (original revision with the non bug-fixing changes).
+    revision_fixed: The fixed revision.
+Writes:
+    VC.diff, NBF.diff, BF.diff, their cleaned versions, and their ParsedPatches in diff_dir.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from . import clean_artifacts, parsed_patch
+
+BASH_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "bash", "main")
+)
+
+# Runs d4j_diff from d4j_utils.sh with the arguments of the command.
+D4J_DIFF = f'. "{os.path.join(BASH_DIR, "d4j_utils.sh")}" && d4j_diff "$@"'
+
+DIFFS = ["VC.diff", "NBF.diff", "BF.diff"]
+CLEAN_DIFFS = ["VC_clean.diff", "NBF_clean.diff", "BF_clean.diff"]
+
+
+def write_diff(project, vid, repository, diff_file, revision_before, revision_after):
+    """
+    Writes the diff between two revisions of the clone of a Defects4J bug, then its
+    cleaned version and the ParsedPatch of both.
+
+    Raises:
+        subprocess.CalledProcessError: If d4j_diff fails.
+    """
+    with open(diff_file, "w") as file:
+        subprocess.run(
+            ["bash", "-c", D4J_DIFF, "d4j_diff", project, vid]
+            + [revision_before, revision_after, repository],
+            stdout=file,
+            stderr=sys.stderr,
+            check=True,
+        )
+    clean_artifacts.clean_diff(diff_file)
+    parsed_patch.write_parsed_diff(diff_file)
+    parsed_patch.write_parsed_diff(os.path.splitext(diff_file)[0] + "_clean.diff")
+
+
+def generate_diffs(
+    project,
+    vid,
+    repository,
+    diff_dir,
+    revision_original,
+    revision_buggy,
+    revision_fixed,
+):
+    """
+    Writes the diffs of a Defects4J bug, their cleaned versions, and their
+    ParsedPatches to diff_dir. See the module docstring.
+
+    Raises:
+        subprocess.CalledProcessError: If a diff cannot be generated.
+    """
+    os.makedirs(diff_dir, exist_ok=True)
+    revisions = [
+        (revision_original, revision_fixed),
+        (revision_original, revision_buggy),
+        (revision_buggy, revision_fixed),
+    ]
+    sys.stdout.flush()
+    sys.stderr.flush()
+    with ThreadPoolExecutor(max_workers=len(DIFFS)) as executor:
+        futures = [
+            executor.submit(
+                write_diff,
+                project,
+                vid,
+                repository,
+                os.path.join(diff_dir, diff),
+                revision_before,
+                revision_after,
+            )
+            for diff, (revision_before, revision_after) in zip(DIFFS, revisions)
+        ]
+        for future in futures:
+            future.result()
+
+
+def main(
+    project,
+    vid,
+    repository,
+    diff_dir,
+    revision_original,
+    revision_buggy,
+    revision_fixed,
+):
+    """
+    Implement the logic of the script. See the module docstring.
+    """
+    generate_diffs(
+        project,
+        vid,
+        repository,
+        diff_dir,
+        revision_original,
+        revision_buggy,
+        revision_fixed,
+    )
+    print(f"Generated {', '.join(DIFFS)} and their cleaned versions in {diff_dir}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog=sys.argv[0],
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("project", help="D4J project name", metavar="PROJECT")
+    parser.add_argument("vid", help="D4J bug id", metavar="VID")
+    parser.add_argument(
+        "repository", help="Path to the clone of the bug", metavar="REPOSITORY"
+    )
+    parser.add_argument(
+        "diff_dir", help="Directory where the diffs are written", metavar="DIFF_DIR"
+    )
+    parser.add_argument(
+        "revision_original", help="The original revision", metavar="ORIGINAL"
+    )
+    parser.add_argument("revision_buggy", help="The buggy revision", metavar="BUGGY")
+    parser.add_argument("revision_fixed", help="The fixed revision", metavar="FIXED")
+
+    args = parser.parse_args()
+    main(
+        args.project,
+        args.vid,
+        args.repository,
+        args.diff_dir,
+        args.revision_original,
+        args.revision_buggy,
+        args.revision_fixed,
+    )
@@ -24,22 +24,59 @@ Returns:
     {d4j_project,d4j_bug_id,files_updated,test_files_updated,hunks,average_hunk_size,lines_updated,tangled_hunks_count,tangled_lines_count}
 """
 import sys
+from collections import Counter
 from os import path
 
+import numpy as np
 from unidiff import PatchSet
 from unidiff.constants import LINE_TYPE_CONTEXT
 
+# diff_metrics.py can be run as a script, outside of the package.
+if __package__:
+    from .parsed_patch import ParsedPatch, load_diff
+else:
+    from parsed_patch import ParsedPatch, load_diff
+
+
+def iter_lines_in_hunk(hunk):
+    """
+    Yield the unidiff Line objects of the given hunk, in order.
+    Only the non-blank added (+) or removed (-) lines are yielded.
+    """
+    for line in hunk:
+        if line.line_type != LINE_TYPE_CONTEXT and line.value.strip():
+            yield line
+
+
+def iter_hunks_in_patch(patch):
+    """
+    Yield the hunks of the given patch, in order.
+    A hunk is represented as a list of its non-blank added (+) or removed (-) unidiff Line objects.
+    We ignore empty hunks.
+    """
+    for file in patch:
+        for hunk in file:
+            lines_in_hunk = list(iter_lines_in_hunk(hunk))
+            if len(lines_in_hunk) > 0:
+                yield lines_in_hunk
+
+
+def iter_lines_in_patch(patch):
+    """
+    Yield the non-blank added (+) or removed (-) unidiff Line objects of the given
+    patch, in order, without building the hunks.
+    """
+    for file in patch:
+        for hunk in file:
+            yield from iter_lines_in_hunk(hunk)
+
 
 def get_lines_in_hunk(hunk):
     """
     Return an ordered list of all unidiff Lines objects in the given hunk.
     All unidiff Line objects must be non-empty and must be either an added (+) or removed (-) line.
     """
-    changed_lines = []
-    for line in hunk:
-        if line.line_type != LINE_TYPE_CONTEXT and line.value.strip():
-            changed_lines.append(line)
-    return changed_lines
+    return list(iter_lines_in_hunk(hunk))
 
 
 def get_hunks_in_patch(patch):
@@ -49,13 +86,7 @@ def get_hunks_in_patch(patch):
     All unidiff Line objects must not be blank and must be either an added (+) or removed (-) line.
     We ignore empty hunks.
     """
-    hunks = []
-    for file in patch:
-        for hunk in file:
-            lines_in_hunk = get_lines_in_hunk(hunk)
-            if len(lines_in_hunk) > 0:
-                hunks.append(lines_in_hunk)
-    return hunks
+    return list(iter_hunks_in_patch(patch))
 
 
 def lines_in_patch(patch):
@@ -65,13 +96,61 @@ def lines_in_patch(patch):
     All unidiff Line Objects must be must not be blank and must be
     either an added (+) or removed (-) line.
     """
-    result = []
-    for file in patch:
-        for hunk in file:
-            lines_in_hunk = get_lines_in_hunk(hunk)
-            for line in lines_in_hunk:
-                result.append(line)
-    return result
+    return list(iter_lines_in_patch(patch))
+
+
+class PatchStats:
+    """
+    The size of a diff, computed in a single walk over its lines.
+
+    Attributes:
+        files: The number of files in the diff.
+        test_files: The number of files whose path ends with "Test.java".
+        hunks: The number of hunks with at least one non-blank changed line.
+        changed_lines: The number of non-blank added (+) or removed (-) lines.
+    """
+
+    def __init__(self, files=0, test_files=0, hunks=0, changed_lines=0):
+        self.files = files
+        self.test_files = test_files
+        self.hunks = hunks
+        self.changed_lines = changed_lines
+
+    @classmethod
+    def from_patch(cls, patch: PatchSet):
+        """
+        Returns the PatchStats of a unidiff.PatchSet or of a unified_diff.Patch.
+        """
+        stats = cls()
+        for file in patch:
+            stats.files += 1
+            if file.path.endswith("Test.java"):
+                stats.test_files += 1
+            for hunk in file:
+                lines_in_hunk = sum(1 for _ in iter_lines_in_hunk(hunk))
+                if lines_in_hunk > 0:
+                    stats.hunks += 1
+                    stats.changed_lines += lines_in_hunk
+        return stats
+
+    @classmethod
+    def from_parsed_patch(cls, parsed: ParsedPatch):
+        """
+        Returns the PatchStats of a ParsedPatch, from its tables.
+        """
+        return cls(
+            files=parsed.file_count(),
+            test_files=sum(file.endswith("Test.java") for file in parsed.files),
+            hunks=parsed.hunk_count(),
+            changed_lines=parsed.line_count(),
+        )
+
+    def average_hunk_size(self):
+        """
+        Returns the average number of changed lines per hunk, or an empty string if
+        the diff has no hunks, as written in the metrics CSV.
+        """
+        return (self.changed_lines / self.hunks) if self.hunks != 0 else ""
 
 
 def count_tangled_hunks(original_diff: PatchSet, fix_diff: PatchSet):
@@ -83,21 +162,35 @@ def count_tangled_hunks(original_diff: PatchSet, fix_diff: PatchSet):
     Returns:
         the number of tangles hunks.
     """
+    # Find the fix lines of the original diff by matching diff line strings.
+    # TODO: Ideal to use object identity here, but for now opt for identity
+    # by string representation instead; possible for this to be error prone.
+    fix_diff_lines = Counter(str(line) for line in iter_lines_in_patch(fix_diff))
+    hunks_VC = (
+        [str(line) for line in hunk] for hunk in iter_hunks_in_patch(original_diff)
+    )
+    return count_hunks_with_fix_lines(hunks_VC, fix_diff_lines)
+
+
+def count_hunks_with_fix_lines(hunks, fix_diff_lines: Counter):
+    """
+    Count the hunks that contain both fix lines and non-fix lines.
+
+    Args:
+        hunks: the fingerprints (e.g., string or hash) of the lines of each hunk of the original diff.
+        fix_diff_lines: the number of occurrences of each fingerprint in the bug-fixing diff.
+            A line of a hunk is a fix line if its fingerprint occurs in the bug-fixing diff,
+            however many times it occurs in the hunk.
+    """
     tangled_hunks_count = 0
-    hunks_VC = get_hunks_in_patch(original_diff)  # List of hunks
-    # Obtain string representations of all Line Objects
-    fix_diff_lines_str = [str(line) for line in lines_in_patch(fix_diff)]
-    if len(fix_diff_lines_str) > 0 or len(
-        fix_diff_lines_str
-    ) != count_changed_source_code_lines(original_diff):
-        for hunk in hunks_VC:
-            # Find all fix lines in the hunk by matching diff line strings.
-            # TODO: Ideal to use object identity here, but for now opt for identity
-            # by string representation instead; possible for this to be error prone.
-            fix_lines_VC = [line for line in hunk if str(line) in fix_diff_lines_str]
-            if len(fix_lines_VC) == 0 or len(fix_lines_VC) == len(hunk):
-                continue  # The hunk is purely bug-fixing or non bug-fixing
-            tangled_hunks_count += 1
+    for hunk in hunks:
+        fix_lines_count = 0
+        for line in hunk:
+            if fix_diff_lines[line] > 0:
+                fix_lines_count += 1
+        if fix_lines_count == 0 or fix_lines_count == len(hunk):
+            continue  # The hunk is purely bug-fixing or non bug-fixing
+        tangled_hunks_count += 1
     return tangled_hunks_count
 
 
@@ -114,8 +207,7 @@ def count_changed_source_code_lines(patch):
         count <Integer>: The number of changed diff lines in the diff file
 
     """
-    flat_patch = lines_in_patch(patch)
-    return len(flat_patch)
+    return sum(1 for _ in iter_lines_in_patch(patch))
 
 
 def count_tangled_lines(original_diff, bug_fix_diff, nonfix_diff):
@@ -124,17 +216,26 @@ def count_tangled_lines(original_diff, bug_fix_diff, nonfix_diff):
 
     As tangled lines are duplicated, we return the count divided by 2.
     """
-    all_lines_count = count_changed_source_code_lines(original_diff)
-    fix_lines_count = count_changed_source_code_lines(bug_fix_diff)
-    nonfix_lines_count = count_changed_source_code_lines(nonfix_diff)
+    return tangled_lines_from_counts(
+        count_changed_source_code_lines(original_diff),
+        count_changed_source_code_lines(bug_fix_diff),
+        count_changed_source_code_lines(nonfix_diff),
+    )
 
+
+def tangled_lines_from_counts(all_lines_count, fix_lines_count, nonfix_lines_count):
+    """
+    Return the number of tangled lines given the number of changed lines in the
+    original, bug-fixing, and non bug-fixing diffs.
+
+    Raises:
+        ValueError: If the number of tangled diff lines is not even.
+    """
     tangled_lines_count = fix_lines_count + nonfix_lines_count - all_lines_count
     if tangled_lines_count % 2 != 0:
-        print(
-            f"The number of tangled diff lines is not even: {tangled_lines_count}.",
-            file=sys.stderr,
+        raise ValueError(
+            f"The number of tangled diff lines is not even: {tangled_lines_count}."
         )
-        sys.exit(1)
     # For unified original diff to have no tangled line, this must hold true:
     # changed_lines_count(VC) = changed_lines_count(BF) + changed_lines_count(BF)
     tangled_lines_count = tangled_lines_count / 2
@@ -142,28 +243,51 @@ def count_tangled_lines(original_diff, bug_fix_diff, nonfix_diff):
     return max(tangled_lines_count, 0)
 
 
+def count_parsed_tangled_hunks(original_diff: ParsedPatch, fix_diff: ParsedPatch):
+    """
+    Count the number of tangled hunks in a Version Control diff, like count_tangled_hunks,
+    but matching the lines of parsed patches by their hash.
+    """
+    is_fix_line = original_diff.lines_in(fix_diff)
+    fix_lines_count = np.bincount(
+        original_diff.line_hunk[is_fix_line], minlength=len(original_diff.hunk_file)
+    )
+    hunk_sizes = original_diff.hunk_sizes()
+    # A hunk is tangled if it contains both fix lines and non-fix lines.
+    return int(np.count_nonzero((fix_lines_count > 0) & (fix_lines_count < hunk_sizes)))
+
+
 def tangle_counts(repository):
     """
     Returns "tangled_lines_count,tangled_hunks_count".
     """
+    original_diff = load_diff(path.join(repository, "diff", "VC_clean.diff"))
+    fix_diff = load_diff(path.join(repository, "diff", "BF_clean.diff"))
+    nonfix_diff = load_diff(path.join(repository, "diff", "NBF_clean.diff"))
 
-    original_diff = PatchSet.from_filename(
-        path.join(repository, "diff", "VC_clean.diff"),
-        encoding="latin-1",
-    )
-    fix_diff = PatchSet.from_filename(
-        path.join(repository, "diff", "BF_clean.diff"), encoding="latin-1"
+    tangled_lines_count = tangled_lines_from_counts(
+        original_diff.line_count(), fix_diff.line_count(), nonfix_diff.line_count()
     )
-    nonfix_diff = PatchSet.from_filename(
-        path.join(repository, "diff", "NBF_clean.diff"), encoding="latin-1"
-    )
-
-    tangled_lines_count = count_tangled_lines(original_diff, fix_diff, nonfix_diff)
-    tangled_hunks_count = count_tangled_hunks(original_diff, fix_diff)
+    tangled_hunks_count = count_parsed_tangled_hunks(original_diff, fix_diff)
 
     return tangled_lines_count, tangled_hunks_count
 
 
+def commit_metrics(project, vid, repository):
+    """
+    Returns the CSV row of the metrics of the diffs generated in <repository>/diff,
+    without a line terminator.
+    """
+    stats = PatchStats.from_parsed_patch(
+        load_diff(path.join(repository, "diff", "VC_clean.diff"))
+    )
+    tangled_lines_count, tangled_hunks_count = tangle_counts(repository)
+    return (
+        f"{project},{vid},{stats.files},{stats.hunks},{stats.average_hunk_size()},"
+        f"{stats.changed_lines},{tangled_lines_count},{tangled_hunks_count}"
+    )
+
+
 def main():
     """
     Implement the logic of the script. See the module docstring.
@@ -178,19 +302,11 @@ def main():
     vid = args[1]
     repository = args[2]
 
-    clean_original_diff = PatchSet.from_filename(
-        path.join(repository, "diff", "VC_clean.diff"), encoding="latin-1"
-    )
-
-    files_updated = len(clean_original_diff)
-    hunks_count = len(get_hunks_in_patch(clean_original_diff))
-    code_changed_lines = len(lines_in_patch(clean_original_diff))
-    average_hunk_size = (code_changed_lines / hunks_count) if hunks_count != 0 else ""
-    tangled_lines_count, tangled_hunks_count = tangle_counts(repository)
-    print(
-        f"{project},{vid},{files_updated},{hunks_count},{average_hunk_size},"
-        f"{code_changed_lines},{tangled_lines_count},{tangled_hunks_count}"
-    )
+    try:
+        print(commit_metrics(project, vid, repository))
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -28,10 +28,30 @@ Returns:
 """
 import sys
 
-from unidiff import PatchSet
-from unidiff.constants import LINE_TYPE_CONTEXT
+# diff_metrics_lltc4j.py can be run as a script, outside of the package.
+if __package__:
+    from . import unified_diff
+    from .diff_metrics import PatchStats
+else:
+    import unified_diff
+    from diff_metrics import PatchStats
 
-from diff_metrics import get_hunks_in_patch, lines_in_patch
+
+def commit_metrics(patch_file, project_name, commit_hash):
+    """
+    Returns the CSV row of the metrics of the diff in patch_file, without a line terminator.
+    """
+    diff = unified_diff.from_filename(patch_file)
+
+    # Generate diff metrics on clean VC diff
+    stats = PatchStats.from_patch(diff)
+    files_updated = stats.files - stats.test_files  # Not including tests.
+
+    return (
+        f"{project_name},{commit_hash},{files_updated}"
+        f"{stats.hunks},{stats.average_hunk_size()},{stats.changed_lines}"
+        f"0,0"  # TODO: No tangled lines/hunks for now. Used to be tangle_counts(repository_path)
+    )
 
 
 def main():
@@ -50,40 +70,7 @@ def main():
     project_name = args[1]
     commit_hash = args[2]
 
-    diff = PatchSet.from_filename(
-        patch_file,
-        encoding="latin-1",
-    )
-
-    # Count the number of changed lines in the unclean VC diff
-    all_changed_lines = 0
-    test_files_updated = 0
-    files_updated = 0  # The number of files updated, not including tests.
-    for file in diff:
-        if file.path.endswith("Test.java"):
-            test_files_updated += 1
-        else:
-            files_updated += 1
-        for hunk in file:
-            for line in hunk:
-                # A diff line contains an indicator ('+': added to modified
-                # program, '-': removed from original program, ' ': unchanged
-                # from original to modified program) and a line value (i.e. the
-                # textual content of the source code line).
-                if line.line_type == LINE_TYPE_CONTEXT:
-                    continue
-                all_changed_lines += 1
-
-    # Generate diff metrics on clean VC diff
-    hunks_count = len(get_hunks_in_patch(diff))
-    code_changed_lines = len(lines_in_patch(diff))
-    average_hunk_size = (code_changed_lines / hunks_count) if hunks_count != 0 else ""
-
-    print(
-        f"{project_name},{commit_hash},{files_updated}"
-        f"{hunks_count},{average_hunk_size},{code_changed_lines}"
-        f"0,0"  # TODO: No tangled lines/hunks for now. Used to be tangle_counts(repository_path)
-    )
+    print(commit_metrics(patch_file, project_name, commit_hash))
 
 
 if __name__ == "__main__":
@@ -2,7 +2,9 @@
 Utilities to read data from the evaluation results.
 """
 
+import io
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 import pandas as pd
@@ -18,6 +20,9 @@ TANGLED_LEVELS = [
 ]
 
 GROUND_TRUTH_COLUMNS = ["file", "source", "target", "group"]
+# Types of the columns of the ground truth and of the tool untangling CSV files.
+GROUND_TRUTH_DTYPES = {"file": str, "source": "Int64", "target": "Int64", "group": str}
+COMMIT_COLUMNS = ["project", "commit_id"]
 PERFORMANCE_COLUMNS = [
     "project",
     "commit_id",
@@ -105,3 +110,118 @@ def retrieve_ground_truth_files(results_dir: str) -> List[str]:
                 ground_truth_files.append(os.path.join(root, file))
 
     return ground_truth_files
+
+
+def find_commit_files(
+    results_dir: str, file_name: str = "truth.csv", max_depth: int = 2
+) -> List[str]:
+    """
+    Finds the files named file_name in results_dir and in its subdirectories up to
+    max_depth levels below it, e.g., <results_dir>/evaluation/<commit>/truth.csv.
+    Unlike retrieve_ground_truth_files, the deeper directories, such as the checked
+    out repositories, are not visited. The files are sorted.
+    """
+    files = []
+    directories = [results_dir]
+    for _ in range(max_depth + 1):
+        subdirectories = []
+        for directory in directories:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(entry.path)
+                    elif entry.name == file_name and entry.is_file():
+                        files.append(entry.path)
+        directories = subdirectories
+
+    return sorted(files)
+
+
+def commit_of(file: str) -> List[str]:
+    """
+    Returns the project and the commit id of a file in a commit folder named
+    <project>_<commit_id>.
+    """
+    return os.path.basename(os.path.dirname(file)).split("_")
+
+
+def _read_text(file: str) -> str:
+    with open(file) as f:
+        return f.read()
+
+
+def read_commit_files(
+    files: List[str], workers: int = None, dtype: dict = None
+) -> pd.DataFrame:
+    """
+    Reads the CSV files of the commits, e.g., the ground truth files, into a single
+    dataframe. The columns project and commit_id identify the commit folder of each
+    line, and the columns are typed with dtype (defaults to GROUND_TRUTH_DTYPES).
+
+    The files are read concurrently by a pool of workers threads (defaults to the
+    ThreadPoolExecutor default), and parsed together, which is much faster than
+    parsing thousands of small files one by one.
+    """
+    dtype = GROUND_TRUTH_DTYPES if dtype is None else dtype
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        texts = list(executor.map(_read_text, files))
+
+    # The files are grouped by header in case their columns are not in the same order.
+    rows_by_header = {}
+    for index, text in enumerate(texts):
+        if not text:
+            continue
+        header, *rows = text.splitlines()
+        rows_by_header.setdefault(header, []).extend(
+            f"{index},{row}" for row in rows if row
+        )
+
+    dfs = [
+        pd.read_csv(
+            io.StringIO("\n".join([f"file_index,{header}", *rows])),
+            dtype=dtype,
+        )
+        for header, rows in rows_by_header.items()
+    ]
+    if dfs:
+        df = pd.concat(dfs, ignore_index=True).sort_values(
+            "file_index", kind="stable", ignore_index=True
+        )
+    else:
+        df = pd.DataFrame(
+            {
+                "file_index": pd.Series(dtype=int),
+                **{
+                    column: pd.Series(dtype=column_dtype)
+                    for column, column_dtype in dtype.items()
+                },
+            }
+        )
+
+    commits = pd.DataFrame(
+        [commit_of(file) for file in files], columns=COMMIT_COLUMNS, dtype=str
+    )
+    df = df.join(commits, on="file_index").drop(columns="file_index")
+    return df[COMMIT_COLUMNS + [c for c in df.columns if c not in COMMIT_COLUMNS]]
+
+
+def split_by_commit(df: pd.DataFrame, files: List[str]):
+    """
+    Yields the (project, commit_id, lines) triple of the commit of each file, where
+    lines are the rows of df read from the file (see read_commit_files), without the
+    project and commit_id columns.
+    """
+    lines = df[[column for column in df.columns if column not in COMMIT_COLUMNS]]
+    indices = df.groupby(COMMIT_COLUMNS, sort=False).indices if len(df) else {}
+    for file in files:
+        project, commit_id = commit_of(file)
+        rows = indices.get((project, commit_id), [])
+        yield project, commit_id, lines.take(rows).reset_index(drop=True)
+
+
+def load_ground_truth(results_dir: str, workers: int = None) -> pd.DataFrame:
+    """
+    Loads the ground truth of all the commits in results_dir into a single dataframe
+    with the columns project, commit_id, file, source, target, and group.
+    """
+    return read_commit_files(find_commit_files(results_dir), workers)
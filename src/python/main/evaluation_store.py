@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+
+"""
+An optional columnar store of the changed lines of the evaluation results.
+
+The evaluation directory of a dataset contains one folder per commit,
+<project>_<commit_id>, with the ground truth (truth.csv) and the untangling of each
+tool (e.g., smartcommit.csv). Reading them back means walking the tree and parsing
+thousands of small CSV files. The store keeps the same lines in Parquet files,
+partitioned by dataset, treatment (i.e., the name of the CSV file without its
+extension), and project. Readers filter on these keys and on the commit without
+reading the other partitions and row groups.
+
+The store has two trees:
+    - <store_dir>/compacted/: One file per partition, written by `convert` and `compact`.
+    - <store_dir>/commits/: One file per commit and treatment, written by the pipeline
+      when a commit is evaluated (see write_commit). The lines of a commit in this
+      tree replace the lines of the same commit and treatment in the compacted tree.
+
+Writers of different commits can run concurrently, but `compact` must not run
+concurrently with them. pyarrow must be installed to use the store.
+
+Command Line Args:
+    convert: Converts the CSV files of an evaluation directory into the compacted tree.
+        --evaluation-dir: The evaluation directory of the dataset.
+        --dataset: The name of the dataset (e.g., d4j).
+        --store: The store directory.
+    compact: Merges the files of the commits tree into the compacted tree.
+        --store: The store directory.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import uuid
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pv
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# The treatments stored, in the order they are read from a commit folder.
+TREATMENTS = ["truth", "smartcommit", "flexeme", "file_untangling", "filename"]
+PARTITION_COLUMNS = ["dataset", "treatment", "project"]
+KEY_COLUMNS = PARTITION_COLUMNS + ["commit_id"]
+LINE_COLUMNS = ["file", "source", "target", "group"]
+
+
+def require_pyarrow():
+    """
+    Raises:
+        ImportError: If pyarrow is not installed.
+    """
+    if pa is None:
+        raise ImportError(
+            "The evaluation store requires pyarrow. Install it with `pip install pyarrow`."
+        )
+
+
+def partitioning():
+    """
+    Returns the Hive partitioning of the store, e.g., dataset=d4j/treatment=truth/project=Lang.
+    """
+    return ds.partitioning(
+        pa.schema([(column, pa.string()) for column in PARTITION_COLUMNS]),
+        flavor="hive",
+    )
+
+
+def file_schema():
+    """
+    Returns the schema of the columns stored in the Parquet files.
+    """
+    return pa.schema(
+        [
+            ("commit_id", pa.string()),
+            ("file", pa.string()),
+            ("source", pa.int32()),
+            ("target", pa.int32()),
+            ("group", pa.string()),
+        ]
+    )
+
+
+def table_schema():
+    """
+    Returns the schema of the lines read from the store, with their keys.
+    """
+    return pa.schema(
+        [(column, pa.string()) for column in PARTITION_COLUMNS] + list(file_schema())
+    )
+
+
+def to_table(df: pd.DataFrame):
+    """
+    Converts changed lines with the key columns into an Arrow table.
+    Line numbers are stored as integers and groups as strings.
+    """
+    df = df.assign(
+        commit_id=df["commit_id"].astype(str),
+        source=pd.to_numeric(df["source"], errors="coerce").astype("Int32"),
+        target=pd.to_numeric(df["target"], errors="coerce").astype("Int32"),
+        group=df["group"].astype(str),
+    )
+    return pa.Table.from_pandas(
+        df[KEY_COLUMNS + LINE_COLUMNS], schema=table_schema(), preserve_index=False
+    )
+
+
+def partition_dir(root, dataset, treatment, project):
+    """
+    Returns the directory of a partition in one of the trees of the store.
+    """
+    return os.path.join(
+        root, f"dataset={dataset}", f"treatment={treatment}", f"project={project}"
+    )
+
+
+def commit_file(store_dir, dataset, treatment, project, commit_id):
+    """
+    Returns the file of the lines of a commit and treatment in the commits tree.
+    """
+    return os.path.join(
+        partition_dir(os.path.join(store_dir, "commits"), dataset, treatment, project),
+        f"{commit_id}.parquet",
+    )
+
+
+def write_commit(store_dir, dataset, treatment, project, commit_id, lines_df):
+    """
+    Writes the changed lines of a commit for a treatment to the commits tree,
+    replacing the previous lines of the commit for this treatment.
+
+    Args:
+        lines_df: The changed lines, with the columns file, source, target, and group.
+    """
+    require_pyarrow()
+    df = lines_df.assign(
+        dataset=dataset, treatment=treatment, project=project, commit_id=commit_id
+    )
+    write_commit_table(store_dir, dataset, treatment, project, commit_id, to_table(df))
+
+
+def write_commit_table(store_dir, dataset, treatment, project, commit_id, lines):
+    """
+    Like write_commit, but the changed lines are an Arrow table.
+    """
+    table = with_keys(lines, commit_id=str(commit_id)).select(
+        ["commit_id"] + LINE_COLUMNS
+    )
+    out_file = commit_file(store_dir, dataset, treatment, project, commit_id)
+    os.makedirs(os.path.dirname(out_file), exist_ok=True)
+    tmp_file = os.path.join(
+        os.path.dirname(out_file), f".{commit_id}.{os.getpid()}.tmp"
+    )
+    pq.write_table(table, tmp_file)
+    os.replace(tmp_file, out_file)
+
+
+def read_csv_lines(csv_file):
+    """
+    Reads the changed lines of a CSV file of a commit (e.g., truth.csv) into an Arrow
+    table with the columns file, source, target, and group.
+    """
+    table = pv.read_csv(
+        csv_file,
+        convert_options=pv.ConvertOptions(
+            column_types={
+                "file": pa.string(),
+                "source": pa.float64(),
+                "target": pa.float64(),
+                "group": pa.string(),
+            },
+            include_columns=LINE_COLUMNS,
+        ),
+    )
+    # Line numbers may have been written as floats by pandas, e.g., 3.0.
+    for column in ["source", "target"]:
+        table = table.set_column(
+            table.schema.get_field_index(column),
+            column,
+            pc.cast(table[column], pa.int32()),
+        )
+    return table
+
+
+def with_keys(lines, **keys):
+    """
+    Returns the table of changed lines preceded by the given key columns, in the
+    order of table_schema.
+    """
+    schema = pa.schema(
+        [
+            field
+            for field in table_schema()
+            if field.name in keys or field.name in LINE_COLUMNS
+        ]
+    )
+    columns = {
+        name: pa.array([value] * lines.num_rows, pa.string())
+        for name, value in keys.items()
+    }
+    columns.update({name: lines[name] for name in LINE_COLUMNS})
+    return pa.table(columns).select(schema.names).cast(schema)
+
+
+def write_commit_csv(store_dir, dataset, commit_dir):
+    """
+    Writes the CSV files of a commit folder, <project>_<commit_id>, to the commits tree.
+    """
+    project, commit_id = os.path.basename(commit_dir).rsplit("_", 1)
+    for treatment in TREATMENTS:
+        csv_file = os.path.join(commit_dir, f"{treatment}.csv")
+        if os.path.exists(csv_file):
+            write_commit_table(
+                store_dir,
+                dataset,
+                treatment,
+                project,
+                commit_id,
+                read_csv_lines(csv_file),
+            )
+
+
+def filter_expression(dataset=None, treatments=None, projects=None, commits=None):
+    """
+    Returns the filter selecting the given keys, or None to select all the lines.
+    Each argument is a value or a list of values; None does not filter.
+    """
+    expression = None
+    for column, values in [
+        ("dataset", dataset),
+        ("treatment", treatments),
+        ("project", projects),
+        ("commit_id", commits),
+    ]:
+        if values is None:
+            continue
+        if isinstance(values, str):
+            values = [values]
+        condition = ds.field(column).isin([str(value) for value in values])
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def read_tree(root, expression):
+    """
+    Returns the lines of one tree of the store selected by the filter expression.
+    """
+    if not os.path.isdir(root):
+        return table_schema().empty_table()
+    dataset = ds.dataset(
+        root,
+        schema=table_schema(),
+        format="parquet",
+        partitioning=partitioning(),
+    )
+    return dataset.to_table(columns=table_schema().names, filter=expression)
+
+
+def read_table(store_dir, expression=None):
+    """
+    Returns the lines of the store selected by the filter expression, as an Arrow
+    table. The lines of the commits tree replace the lines of the same commit and
+    treatment in the compacted tree.
+    """
+    require_pyarrow()
+    compacted = read_tree(os.path.join(store_dir, "compacted"), expression)
+    commits = read_tree(os.path.join(store_dir, "commits"), expression)
+    if commits.num_rows == 0:
+        return compacted
+    replaced = commits.select(KEY_COLUMNS).group_by(KEY_COLUMNS).aggregate([])
+    compacted = compacted.join(replaced, keys=KEY_COLUMNS, join_type="left anti")
+    return pa.concat_tables([compacted.select(table_schema().names), commits])
+
+
+def read_lines(
+    store_dir, dataset=None, treatments=None, projects=None, commits=None
+) -> pd.DataFrame:
+    """
+    Reads the changed lines of the store, filtered on the given keys.
+
+    The dataframe has the following columns:
+        - dataset, treatment, project, commit_id (str)
+        - file (str): Path of the file
+        - source (Int32): Line number when the line is removed, missing otherwise
+        - target (Int32): Line number when the line is added, missing otherwise
+        - group (str): Group of the line
+    """
+    expression = filter_expression(dataset, treatments, projects, commits)
+    table = read_table(store_dir, expression)
+    df = table.to_pandas(types_mapper={pa.int32(): pd.Int32Dtype()}.get)
+    return df.sort_values(KEY_COLUMNS, kind="stable", ignore_index=True)
+
+
+def iter_commits(store_dir, dataset=None, treatments=None):
+    """
+    Yields the (project, commit_id, lines) triple of each commit in the store, where
+    lines maps each treatment of the commit to its changed lines (file, source, target,
+    and group), in the order of the CSV file.
+    """
+    df = read_lines(store_dir, dataset, treatments)
+    # Sorting once and slicing the runs of equal keys is much faster than nested groupbys.
+    df = df.sort_values(["project", "commit_id", "treatment"], kind="stable")
+    keys = df[["project", "commit_id", "treatment"]].to_numpy()
+    lines = df[LINE_COLUMNS].reset_index(drop=True)
+    changes = np.flatnonzero((keys[1:] != keys[:-1]).any(axis=1)) + 1
+    starts = [0, *changes.tolist(), len(keys)] if len(keys) else []
+
+    commit, commit_lines = None, {}
+    for start, end in zip(starts, starts[1:]):
+        project, commit_id, treatment = keys[start]
+        if commit != (project, commit_id):
+            if commit is not None:
+                yield *commit, commit_lines
+            commit, commit_lines = (project, commit_id), {}
+        commit_lines[treatment] = lines.iloc[start:end].reset_index(drop=True)
+    if commit is not None:
+        yield *commit, commit_lines
+
+
+def write_tree(root, table):
+    """
+    Replaces the partitions of a dataset in the compacted tree with the lines of the table.
+    """
+    for dataset in pc.unique(table["dataset"]).to_pylist():
+        dataset_dir = os.path.join(root, f"dataset={dataset}")
+        tmp_dir = os.path.join(root, f".dataset={dataset}.{uuid.uuid4().hex}")
+        rows = table.filter(pc.equal(table["dataset"], dataset))
+        ds.write_dataset(
+            rows.sort_by([(column, "ascending") for column in KEY_COLUMNS]),
+            tmp_dir,
+            format="parquet",
+            partitioning=ds.partitioning(
+                pa.schema([(column, pa.string()) for column in PARTITION_COLUMNS[1:]]),
+                flavor="hive",
+            ),
+            basename_template="part-{i}.parquet",
+            preserve_order=True,
+        )
+        old_dir = f"{tmp_dir}.old"
+        if os.path.exists(dataset_dir):
+            os.replace(dataset_dir, old_dir)
+        os.replace(tmp_dir, dataset_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def convert(evaluation_dir, dataset, store_dir):
+    """
+    Converts the CSV files of an evaluation directory into the compacted tree of the
+    store, replacing the lines of the dataset in the store.
+    """
+    require_pyarrow()
+    tables = []
+    with os.scandir(evaluation_dir) as entries:
+        commit_dirs = sorted(entry.path for entry in entries if entry.is_dir())
+    for commit_dir in commit_dirs:
+        name = os.path.basename(commit_dir)
+        if "_" not in name:
+            print(
+                f"Invalid subdirectory name: {name}."
+                f" Expected to be of the form <project>_<commit_id>.",
+                file=sys.stderr,
+            )
+            continue
+        project, commit_id = name.rsplit("_", 1)
+        for treatment in TREATMENTS:
+            csv_file = os.path.join(commit_dir, f"{treatment}.csv")
+            if os.path.exists(csv_file):
+                tables.append(
+                    with_keys(
+                        read_csv_lines(csv_file),
+                        dataset=dataset,
+                        treatment=treatment,
+                        project=project,
+                        commit_id=commit_id,
+                    )
+                )
+
+    table = pa.concat_tables(tables) if tables else table_schema().empty_table()
+    # The CSV files are the source of truth: the lines of the commits tree are stale.
+    shutil.rmtree(
+        os.path.join(store_dir, "commits", f"dataset={dataset}"), ignore_errors=True
+    )
+    if table.num_rows == 0:
+        shutil.rmtree(
+            os.path.join(store_dir, "compacted", f"dataset={dataset}"),
+            ignore_errors=True,
+        )
+        return
+    write_tree(os.path.join(store_dir, "compacted"), table)
+
+
+def compact(store_dir):
+    """
+    Merges the lines of the commits tree into the compacted tree.
+    """
+    require_pyarrow()
+    commits_root = os.path.join(store_dir, "commits")
+    if not os.path.isdir(commits_root):
+        return
+    for entry in sorted(os.listdir(commits_root)):
+        if not entry.startswith("dataset="):
+            continue
+        dataset = entry[len("dataset=") :]
+        table = read_table(store_dir, filter_expression(dataset=dataset))
+        write_tree(os.path.join(store_dir, "compacted"), table)
+        shutil.rmtree(os.path.join(commits_root, entry))
+
+
+def main():
+    """
+    Implement the logic of the script. See the module docstring.
+    """
+    parser = argparse.ArgumentParser(
+        prog=sys.argv[0],
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert_parser = subparsers.add_parser(
+        "convert", help="Convert an evaluation directory into the store"
+    )
+    convert_parser.add_argument(
+        "--evaluation-dir",
+        help="Directory containing the <project>_<commit_id> folders",
+        required=True,
+        metavar="EVALUATION_DIR",
+    )
+    convert_parser.add_argument(
+        "--dataset",
+        help="Name of the dataset",
+        required=True,
+        metavar="DATASET",
+    )
+    convert_parser.add_argument(
+        "--store", help="Store directory", required=True, metavar="STORE_DIR"
+    )
+
+    compact_parser = subparsers.add_parser(
+        "compact", help="Merge the lines of the evaluated commits"
+    )
+    compact_parser.add_argument(
+        "--store", help="Store directory", required=True, metavar="STORE_DIR"
+    )
+
+    args = parser.parse_args()
+    if args.command == "convert":
+        convert(args.evaluation_dir, args.dataset, args.store)
+    else:
+        compact(args.store)
+
+
+if __name__ == "__main__":
+    main()
@@ -20,17 +20,33 @@ Writes:
 """
 
 import logging
+import re
 import sys
-from io import StringIO
 
 import networkx as nx
+import numpy as np
 import pandas as pd
 
-from parse_utils import export_tool_decomposition_as_csv
+from .parse_utils import export_tool_decomposition_as_csv
 
 UPDATE_ADD = "add"
 UPDATE_REMOVE = "remove"
 
+# Tokens of the DOT language. Comments and whitespace are skipped, and any
+# other character (e.g., HTML strings, '+' concatenation) is unsupported.
+RE_DOT_TOKEN = re.compile(
+    r"""
+    (?P<skip>\s+|//[^\n]*|/\*.*?\*/)
+    |(?P<string>"(?:[^"\\]|\\.)*")
+    |(?P<edgeop>->|--)
+    |(?P<id>[A-Za-z_\x80-\U0010ffff][A-Za-z_0-9\x80-\U0010ffff]*|-?(?:\.[0-9]+|[0-9]+(?:\.[0-9]*)?))
+    |(?P<punct>[{}\[\]=;,:])
+    |(?P<other>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+DOT_PUNCTUATION = ["{", "}", "[", "]", "=", ";", ",", ":", "->", "--"]
+
 
 def main():
     """
@@ -49,7 +65,7 @@ def main():
     output_file = args[1]
 
     try:
-        graph = nx.nx_pydot.read_dot(result_file)
+        convert_results(result_file, output_file)
     except FileNotFoundError:
         # Flexeme doesn't generate a PDG if it doesn't detect multiple groups.
         # In this case, we do not create a CSV file. The untangling score will be
@@ -59,9 +75,222 @@ def main():
             file=sys.stderr,
         )
         sys.exit(1)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+
+def convert_results(result_file, output_file):
+    """
+    Translates the Flexeme PDG in result_file to the line level and writes it to output_file.
+    No file is written if the PDG has no changed nodes.
+
+    Raises:
+        FileNotFoundError: If the PDG file does not exist.
+        ValueError: If the changed nodes have no changed lines.
+    """
+    nodes = read_nodes(result_file)
+    result = changed_nodes_to_dataframe(nodes)
+    if result is not None:
+        # Merge results per line. Might not need to merge results per line
+        #  since the data is calculated using a left join on the truth.
+        export_csv(output_file, result)
+
+
+class UnsupportedDotError(ValueError):
+    """
+    Raised when a DOT file uses syntax that scan_dot_nodes does not support.
+    """
+
+
+def read_nodes(result_file):
+    """
+    Read the nodes of a Flexeme PDG with scan_dot_nodes. Files that cannot be scanned
+    are read with pydot instead.
 
-    result = ""
-    for node, data in graph.nodes(data=True):
+    Args:
+        result_file: The path to the DOT file.
+
+    Returns:
+        The (node, data) pairs of the changed nodes, where data are the attributes of the node.
+    """
+    with open(result_file) as file:
+        dot = file.read()
+    try:
+        return scan_dot_nodes(dot)
+    except UnsupportedDotError as e:
+        print(f"Reading {result_file} with pydot: {e}", file=sys.stderr)
+        return nx.nx_pydot.read_dot(result_file).nodes(data=True)
+
+
+def scan_dot_nodes(dot):
+    """
+    Scan the node statements of the first graph of a DOT file, without building
+    the graph. The attributes are returned like networkx.nx_pydot.read_dot returns
+    them: quoted values keep their quotes, the attributes of a node declared several
+    times are merged, and nodes of subgraphs are ignored.
+
+    Args:
+        dot: The content of the DOT file.
+
+    Returns:
+        The (node, data) pairs of the nodes with a color attribute, in declaration order.
+    """
+    tokens = _tokenize_dot(dot)
+    nodes = {}
+
+    token = _next_token(tokens)
+    if token.lower() == "strict":
+        token = _next_token(tokens)
+    if token.lower() not in ["graph", "digraph"]:
+        raise UnsupportedDotError(f"Expected a graph, found {token}")
+    token = _next_token(tokens)
+    if token != "{":
+        token = _next_token(tokens)
+    if token != "{":
+        raise UnsupportedDotError(f"Expected {{, found {token}")
+
+    token = _next_token(tokens)
+    while token != "}":
+        if token == ";":
+            token = _next_token(tokens)
+            continue
+        if token == "{" or token.lower() == "subgraph":
+            _skip_subgraph(token, tokens)
+            token = _skip_edges(_next_token(tokens), tokens)
+            continue
+        if token in DOT_PUNCTUATION or token.startswith("-"):
+            raise UnsupportedDotError(f"Unexpected token {token}")
+
+        name = token
+        token = _next_token(tokens)
+        if token == "=":
+            # Graph attribute.
+            _next_token(tokens)
+            token = _next_token(tokens)
+            continue
+        if name.lower() in ["graph", "node", "edge"]:
+            # Default attributes.
+            if token != "[":
+                raise UnsupportedDotError(f"Expected [ after {name}")
+            token = _read_attributes(token, tokens, {})
+            continue
+        if token in ["->", "--"]:
+            token = _skip_edges(token, tokens)
+            continue
+        if token == ":":
+            raise UnsupportedDotError(f"Ports are not supported: {name}")
+        if not name.startswith('"') and "." in name:
+            raise UnsupportedDotError(f"Unexpected node {name}")
+
+        name = name.strip('"')
+        attributes = nodes.setdefault(name, {})
+        token = _read_attributes(token, tokens, attributes)
+
+    for name in ["node", "graph", "edge"]:
+        nodes.pop(name, None)
+    return [(node, data) for node, data in nodes.items() if "color" in data]
+
+
+def _tokenize_dot(dot):
+    """
+    Yield the tokens of the DOT content, as strings.
+    """
+    for match in RE_DOT_TOKEN.finditer(dot):
+        kind = match.lastgroup
+        if kind == "skip":
+            continue
+        token = match.group()
+        if kind == "other" or (kind == "string" and "\\\n" in token):
+            raise UnsupportedDotError(f"Unsupported token {token!r}")
+        yield token
+
+
+def _next_token(tokens):
+    """
+    Return the next token, failing at the end of the DOT content.
+    """
+    token = next(tokens, None)
+    if token is None:
+        raise UnsupportedDotError("Unexpected end of graph")
+    return token
+
+
+def _read_attributes(token, tokens, attributes):
+    """
+    Read the attribute lists starting at token into attributes.
+    Returns the token following the attribute lists.
+    """
+    while token == "[":
+        token = _next_token(tokens)
+        while token != "]":
+            key = token
+            if _next_token(tokens) != "=":
+                raise UnsupportedDotError(f"Expected = after {key}")
+            value = _next_token(tokens)
+            if key in DOT_PUNCTUATION or key[0] == '"' or value in DOT_PUNCTUATION:
+                raise UnsupportedDotError(f"Unexpected attribute {key}={value}")
+            attributes[key] = value
+            token = _next_token(tokens)
+            if token == ",":
+                token = _next_token(tokens)
+        token = _next_token(tokens)
+    return token
+
+
+def _skip_subgraph(token, tokens):
+    """
+    Skip the subgraph starting at token, including its nested subgraphs.
+    """
+    if token.lower() == "subgraph":
+        token = _next_token(tokens)
+        if token != "{":
+            token = _next_token(tokens)
+        if token != "{":
+            raise UnsupportedDotError(f"Expected {{, found {token}")
+    depth = 1
+    while depth:
+        token = _next_token(tokens)
+        if token == "{":
+            depth += 1
+        elif token == "}":
+            depth -= 1
+
+
+def _skip_edges(token, tokens):
+    """
+    Skip the edges and their attributes starting at the edge operator token.
+    Returns the token following the edge statement.
+    """
+    while token in ["->", "--"]:
+        token = _next_token(tokens)
+        if token == "{" or token.lower() == "subgraph":
+            _skip_subgraph(token, tokens)
+        elif token in DOT_PUNCTUATION:
+            raise UnsupportedDotError(f"Unexpected edge to {token}")
+        token = _next_token(tokens)
+        if token == ":":
+            raise UnsupportedDotError("Ports are not supported")
+    return _read_attributes(token, tokens, {})
+
+
+def changed_nodes_to_dataframe(nodes):
+    """
+    Label each line of the changed nodes with the group of its node.
+
+    Args:
+        nodes: The (node, data) pairs of the graph, where data are the attributes of the node.
+
+    Returns:
+        A DataFrame with columns file, source, target, and group, with one row per line of
+        each changed node, in node order. None if the graph has no changed nodes.
+    """
+    files = []
+    groups = []
+    span_starts = []
+    span_ends = []
+    is_removed = []
+    for node, data in nodes:
         # Changed nodes are the only nodes with a color attribute.
         if "color" not in data.keys():
             continue
@@ -74,44 +303,48 @@ def main():
             logging.error(f"Attribute 'label' not found in node {node}")
             continue
 
-        group = get_node_label(data)
         span_start, span_end = get_span(data)
-        update_type = get_update_type(data)
-
         file = (
             data["filepath"].replace('"', "")
             if "filepath" in data.keys()
             # then do nothing
             else data["cluster"].replace('"', "")
         )
-        for line in range(span_start, span_end + 1):
-            if update_type == UPDATE_REMOVE:
-                result += f"{file},{line},,{group}\n"
-            elif update_type == UPDATE_ADD:
-                result += f"{file},,{line},{group}\n"
-            else:
-                logging.error(f"Update {update_type} unsupported")
-                continue
-
-        # Merge results per line. Might not need to merge results per line
-        #  since the data is calculated using a left join on the truth.
-        export_csv(output_file, result)
+        files.append(file)
+        groups.append(get_node_label(data))
+        span_starts.append(span_start)
+        span_ends.append(span_end)
+        is_removed.append(get_update_type(data) == UPDATE_REMOVE)
+
+    if not files:
+        return None
+
+    # Expand the span of each node into one row per line.
+    span_starts = np.array(span_starts, dtype=np.int64)
+    span_lengths = np.maximum(np.array(span_ends) - span_starts + 1, 0)
+    row_nodes = np.repeat(np.arange(len(files)), span_lengths)
+    first_rows = np.cumsum(span_lengths) - span_lengths
+    lines = np.arange(len(row_nodes)) - first_rows[row_nodes] + span_starts[row_nodes]
+    removed = np.array(is_removed, dtype=bool)[row_nodes]
+
+    return pd.DataFrame(
+        {
+            "file": np.array(files, dtype=object)[row_nodes],
+            "source": pd.arrays.IntegerArray(lines, ~removed),
+            "target": pd.arrays.IntegerArray(lines, removed),
+            "group": np.array(groups, dtype=object)[row_nodes],
+        }
+    )
 
 
-def export_csv(output_file, result):
+def export_csv(output_file, df):
     """
     Export the results to a CSV file.
 
     Args:
         output_file: The path to the CSV file to be created.
-        result: The string containing the results to be written to the CSV file.
+        df: The DataFrame containing the results to be written to the CSV file.
     """
-    df = pd.read_csv(
-        StringIO(result),
-        names=["file", "source", "target", "group"],
-        na_values="None",
-    )
-    df = df.convert_dtypes()  # Forces pandas to use ints in source and target columns.
     df = df.drop_duplicates()
     export_tool_decomposition_as_csv(df, output_file)
 
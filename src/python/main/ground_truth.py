@@ -27,63 +27,110 @@ import sys
 from collections import deque
 
 import pandas as pd
-from unidiff import PatchSet, LINE_TYPE_CONTEXT
+from unidiff import PatchSet
 
-from .diff_metrics import lines_in_patch
-
-COL_NAMES = ["file", "source", "target"]
+from .parsed_patch import ParsedPatch, load_diff, parse_patch
+from .patch_to_csv import patch_to_dataframe
 
 
 def convert_diff_to_dataframe(patch: PatchSet) -> pd.DataFrame:
     """
-    Converts a PatchSet into a DataFrame and filters out tests, comments, imports, non-Java files.
-    The filtering is done during the conversion to avoid iterating over the patch twice.
+    Converts the non-blank changed lines of a PatchSet into a DataFrame.
 
     The dataframe has the following columns:
-        - file (str): Path of the file
-        - source (int): Line number when the line is removed or changed
-        - target (int): Line number when the line is added or changed
+        - file (category): Path of the file
+        - source (Int32): Line number when the line is removed or changed
+        - target (Int32): Line number when the line is added or changed
     """
-    df = pd.DataFrame(columns=COL_NAMES)
-    for file in patch:
-        for hunk in file:
-            for line in hunk:
-                if line.line_type != LINE_TYPE_CONTEXT and line.value.strip():
-                    entry = pd.DataFrame.from_dict(
-                        {
-                            # Since a line can only be either added or removed,
-                            # one of the two will always be empty.
-                            "file": [file.path],
-                            "source": [line.source_line_no],
-                            "target": [line.target_line_no],
-                        }
-                    )
-                    df = pd.concat([df, entry], ignore_index=True)
-    return df
+    return patch_to_dataframe(patch, ignore_blank_lines=True)
 
 
-def classify_diff_lines(original_diff, fix_diff, nonfix_diff):
+class LineQueue:
     """
-    Tag the correct truth label to each line in original diff.
+    A queue of diff line strings that also supports removing the first
+    occurrence of an arbitrary line, like `collections.deque`, but where every
+    operation runs in amortized constant time.
 
-    Returns a Dataframe, where each row is a diff line with one truth group label
-    - 'fix': A bug-fixing line
-    - 'other': A non bug-fixing line
-    Tangled lines will have two corresponding row entries, as they belong to
-    both groups: one row tagged with 'fix', one tagged with 'other'.
+    The lines are kept in their original order. Each distinct line string is
+    mapped to the ascending positions where it occurs. Removed positions are
+    only marked as deleted and are skipped lazily when they reach the front of
+    the queue or of a position list.
     """
-    # Convert the Original Diff to a Dataframe, since row entries (the diff
-    # lines) can be duplicated in the ground truth dataframe.
-    # This variable holds the output value of the function.
-    ground_truth_df = convert_diff_to_dataframe(original_diff)
 
-    # Generate 3 queues for classification
-    original_lines = deque([str(line) for line in lines_in_patch(original_diff)])
-    fix_lines = deque([str(line) for line in lines_in_patch(fix_diff)])
-    nonfix_lines = deque([str(line) for line in lines_in_patch(nonfix_diff)])
+    def __init__(self, lines):
+        self._lines = list(lines)
+        self._removed = [False] * len(self._lines)
+        self._positions = {}
+        for position, line in enumerate(self._lines):
+            self._positions.setdefault(line, deque()).append(position)
+        self._head = 0
+        self._size = len(self._lines)
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, line):
+        return self._first_position(line) is not None
+
+    def peek(self):
+        """
+        Return the line at the front of the queue, or None if the queue is empty.
+        """
+        while self._head < len(self._lines) and self._removed[self._head]:
+            self._head += 1
+        if self._head == len(self._lines):
+            return None
+        return self._lines[self._head]
+
+    def popleft(self):
+        """
+        Remove the line at the front of the queue.
+        """
+        line = self.peek()
+        if line is None:
+            raise IndexError("pop from an empty LineQueue")
+        self.remove(line)
+
+    def remove(self, line):
+        """
+        Remove the first occurrence of the line from the queue.
+        """
+        position = self._first_position(line)
+        if position is None:
+            raise ValueError(f"{line!r} is not in the LineQueue")
+        self._positions[line].popleft()
+        self._removed[position] = True
+        self._size -= 1
+
+    def _first_position(self, line):
+        """
+        Return the position of the first occurrence of the line that has not
+        been removed yet, or None if there is none.
+        """
+        positions = self._positions.get(line)
+        if not positions:
+            return None
+        while positions and self._removed[positions[0]]:
+            positions.popleft()
+        return positions[0] if positions else None
+
+
+def align_diff_lines(original_lines, fix_lines, nonfix_lines):
+    """
+    Align the lines of the original diff with the lines of the bug-fixing and
+    non bug-fixing diffs. The lines are compared by their string representation.
+
+    Returns a tuple (labels, tangled_lines):
+        - labels: a list with the truth label ('fix', 'other', or 'both') of each original line.
+        - tangled_lines: the indices of the original lines that are tangled, in the
+          order they are found. These lines must also be labelled 'other'.
+    """
+    fix_lines = LineQueue(fix_lines)
+    nonfix_lines = LineQueue(nonfix_lines)
 
     # Placeholder for the truth label
-    ground_truth_df["group"] = ["other" for i in range(len(original_lines))]
+    labels = ["other"] * len(original_lines)
+    tangled_lines = []
 
     i = 0
     # A global mode that indicates if 2 lines are part of tangled fix
@@ -92,17 +139,17 @@ def classify_diff_lines(original_diff, fix_diff, nonfix_diff):
         line = original_lines[i]
         if len(fix_lines) == 0 and len(nonfix_lines) == 0:
             print("This is a bug")
-            return ground_truth_df
-        fix = fix_lines[0] if fix_lines else None
-        nonfix = nonfix_lines[0] if nonfix_lines else None
+            return labels, tangled_lines
+        fix = fix_lines.peek()
+        nonfix = nonfix_lines.peek()
         # Pop each line out of original diff and compare to the 2 heads of fix_lines and nonfix_queues.
         if line == fix and line != nonfix:
             # Line is identical to head of fix_lines, so it is bug-fixing.
-            ground_truth_df.loc[i, "group"] = "fix"
+            labels[i] = "fix"
             fix_lines.popleft()
         elif line == nonfix and line != fix:
             # Line is identical to head of nonfix_lines, so it is non bug-fixing.
-            ground_truth_df.loc[i, "group"] = "other"
+            labels[i] = "other"
             nonfix_lines.popleft()
         elif line not in (nonfix, fix):
             # Line is different from both, so the 2 heads of fix and nonfix are tangled changes.
@@ -116,10 +163,10 @@ def classify_diff_lines(original_diff, fix_diff, nonfix_diff):
                 continue
             # Else, switch truth labeling scheme, always match with first occurrence
             if line in fix_lines:
-                ground_truth_df.loc[i, "group"] = "fix"
+                labels[i] = "fix"
                 fix_lines.remove(line)
             elif line in nonfix_lines:
-                ground_truth_df.loc[i, "group"] = "other"
+                labels[i] = "other"
                 nonfix_lines.remove(line)
             else:
                 # The tangled line may be changes that cancel out in the BF and
@@ -129,23 +176,68 @@ def classify_diff_lines(original_diff, fix_diff, nonfix_diff):
                 i += 1
                 continue
         else:
-            ground_truth_df.loc[i, "group"] = "both"
+            labels[i] = "both"
             print("There is a line tagged both!", file=sys.stderr)
             fix_lines.popleft()
             nonfix_lines.popleft()
-        if line_is_tangled and ground_truth_df.loc[i, "group"] == "fix":
+        if line_is_tangled and labels[i] == "fix":
             # Found the case of a tangled line, this line will have 2 labels,
             # 'fix' and 'other' (2 rows) in the ground truth Dataframe.
-            tangled_line_duplicate_tag = ground_truth_df.loc[[i]].copy()
-            tangled_line_duplicate_tag["group"] = "other"
-            ground_truth_df = pd.concat(
-                [ground_truth_df, tangled_line_duplicate_tag], ignore_index=True
-            )
+            tangled_lines.append(i)
             line_is_tangled = False  # Switch tangled mode off
         i += 1
+    return labels, tangled_lines
+
+
+def classify_diff_lines(original_diff, fix_diff, nonfix_diff):
+    """
+    Tag the correct truth label to each line in original diff.
+
+    Returns a Dataframe, where each row is a diff line with one truth group label
+    - 'fix': A bug-fixing line
+    - 'other': A non bug-fixing line
+    Tangled lines will have two corresponding row entries, as they belong to
+    both groups: one row tagged with 'fix', one tagged with 'other'.
+    """
+    return classify_parsed_diff_lines(
+        parse_patch(original_diff), parse_patch(fix_diff), parse_patch(nonfix_diff)
+    )
+
+
+def classify_parsed_diff_lines(
+    original_diff: ParsedPatch, fix_diff: ParsedPatch, nonfix_diff: ParsedPatch
+):
+    """
+    Tag the correct truth label to each line in original diff. See classify_diff_lines.
+    """
+    # Convert the Original Diff to a Dataframe, since row entries (the diff
+    # lines) can be duplicated in the ground truth dataframe.
+    # This variable holds the output value of the function.
+    ground_truth_df = original_diff.to_dataframe()
+
+    labels, tangled_lines = align_diff_lines(
+        original_diff.lines(), fix_diff.lines(), nonfix_diff.lines()
+    )
+    ground_truth_df["group"] = labels
+
+    if tangled_lines:
+        # Tangled lines are duplicated at the end of the ground truth with the 'other' label.
+        tangled_df = ground_truth_df.iloc[tangled_lines].copy()
+        tangled_df["group"] = "other"
+        ground_truth_df = pd.concat([ground_truth_df, tangled_df], ignore_index=True)
     return ground_truth_df
 
 
+def classify_repository_diffs(repository):
+    """
+    Returns the ground truth of the diffs generated in <repository>/diff.
+    """
+    original_diff = load_diff(os.path.join(repository, "diff", "VC_clean.diff"))
+    bug_fix_diff = load_diff(os.path.join(repository, "diff", "BF.diff"))
+    nonfix_diff = load_diff(os.path.join(repository, "diff", "NBF.diff"))
+    return classify_parsed_diff_lines(original_diff, bug_fix_diff, nonfix_diff)
+
+
 def main():
     """
     Implement the logic of the script. See the module docstring.
@@ -158,18 +250,7 @@ def main():
 
     repository = args[0]
     out_dir = args[1]
-    original_diff = PatchSet.from_filename(
-        os.path.join(repository, "diff", "VC_clean.diff"),
-        encoding="latin-1",
-    )
-    bug_fix_diff = PatchSet.from_filename(
-        os.path.join(repository, "diff", "BF.diff"), encoding="latin-1"
-    )
-    nonfix_diff = PatchSet.from_filename(
-        os.path.join(repository, "diff", "NBF.diff"), encoding="latin-1"
-    )
-
-    ground_truth_df = classify_diff_lines(original_diff, bug_fix_diff, nonfix_diff)
+    ground_truth_df = classify_repository_diffs(repository)
     ground_truth_df.to_csv(out_dir, index=False)
 
 
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+
+"""
+A compact index of the ground truth of the commits of an experiment, with one row
+per commit, so that filters such as select_mixed_changes_scores.py don't have to
+read the ground truth (truth.csv) of every commit.
+
+The ground truth stage of the pipeline writes the summary of each commit next to
+its ground truth, in truth_summary.csv. The index, <results_dir>/truth_index.csv,
+concatenates the summaries. The index records the size and modification time of the
+ground truth of each commit. When the index is missing, or a ground truth was added,
+removed, or rewritten since, the index is rebuilt from the summaries that are up to
+date and from the ground truth of the other commits (e.g., LLTC4J commits).
+
+The index has the columns:
+    - project, commit_id: The commit.
+    - lines: Number of rows of the ground truth.
+    - fix_lines, other_lines: Number of rows in the 'fix' and 'other' groups.
+    - tangled_lines: Number of lines in both groups.
+    - files: Number of files changed.
+    - hunks: Number of blocks of consecutive changed lines in a file. A block of
+      deletions directly followed by additions is one block, like in a diff without
+      context lines.
+    - change_type: 'empty', 'fix', 'other', 'mixed' (both groups), or 'unknown' if
+      some rows are in another group.
+    - truth_size, truth_mtime_ns: The size and modification time of the ground truth
+      file when the commit was indexed.
+
+Command Line Args:
+    results_dir: Directory containing the ground truth of the commits.
+    --workers: Optional number of threads reading the files.
+Writes:
+    <results_dir>/truth_index.csv, rebuilt from scratch.
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from . import evaluation_results
+
+INDEX_FILE = "truth_index.csv"
+SUMMARY_FILE = "truth_summary.csv"
+FIX_LABEL = "fix"
+OTHER_LABEL = "other"
+MIXED_LABEL = "mixed"
+COUNT_COLUMNS = [
+    "lines",
+    "fix_lines",
+    "other_lines",
+    "tangled_lines",
+    "files",
+    "hunks",
+]
+SUMMARY_COLUMNS = COUNT_COLUMNS + ["change_type"]
+INDEX_COLUMNS = evaluation_results.COMMIT_COLUMNS + SUMMARY_COLUMNS
+STAT_COLUMNS = ["truth_size", "truth_mtime_ns"]
+SUMMARY_DTYPES = {
+    **{column: "int64" for column in COUNT_COLUMNS},
+    "change_type": str,
+}
+INDEX_DTYPES = {
+    "project": str,
+    "commit_id": str,
+    **SUMMARY_DTYPES,
+    **{column: "int64" for column in STAT_COLUMNS},
+}
+LINE_KEYS = ["file", "source", "target"]
+
+
+def count_hunks(truth_df: pd.DataFrame) -> pd.Series:
+    """
+    Counts the blocks of consecutive changed lines of each commit of the ground truth.
+    The rows of a commit must be contiguous and in the order of the diff.
+    """
+    commit_columns = evaluation_results.COMMIT_COLUMNS
+    lines_df = truth_df.drop_duplicates(subset=commit_columns + LINE_KEYS)
+    previous_df = lines_df.shift(1)
+
+    is_deletion = lines_df["source"].notna() & lines_df["target"].isna()
+    is_addition = lines_df["target"].notna()
+    was_deletion = is_deletion.shift(1, fill_value=False)
+    was_addition = is_addition.shift(1, fill_value=False)
+
+    same_file = (
+        (lines_df[commit_columns + ["file"]] == previous_df[commit_columns + ["file"]])
+        .all(axis=1)
+        .to_numpy()
+    )
+    continues = (
+        (
+            (
+                was_deletion
+                & is_deletion
+                & (lines_df["source"] == previous_df["source"] + 1)
+            )
+            | (
+                was_addition
+                & is_addition
+                & (lines_df["target"] == previous_df["target"] + 1)
+            )
+            | (was_deletion & is_addition)
+        )
+        .fillna(False)
+        .to_numpy(dtype=bool)
+    )
+
+    starts_hunk = ~(same_file & continues)
+    return (
+        lines_df[commit_columns]
+        .assign(hunks=starts_hunk.astype(np.int64))
+        .groupby(commit_columns)["hunks"]
+        .sum()
+    )
+
+
+def change_types(index_df: pd.DataFrame) -> pd.Series:
+    """
+    Returns the type of changes of each commit of the index. See the module docstring.
+    """
+    return pd.Series(
+        np.select(
+            [
+                index_df["lines"] == 0,
+                index_df["fix_lines"] == index_df["lines"],
+                index_df["other_lines"] == index_df["lines"],
+                index_df["fix_lines"] + index_df["other_lines"] == index_df["lines"],
+            ],
+            ["empty", FIX_LABEL, OTHER_LABEL, MIXED_LABEL],
+            default="unknown",
+        ),
+        index=index_df.index,
+    )
+
+
+def summarize(truth_df: pd.DataFrame, commits=None) -> pd.DataFrame:
+    """
+    Returns the index rows of the commits of a ground truth with the columns
+    project, commit_id, file, source, target, and group.
+
+    Arguments:
+        truth_df: The ground truth of the commits.
+        commits: Optional (project, commit_id) pairs of the commits to summarize, in
+            order. Defaults to the commits in truth_df. Commits without lines are empty.
+    """
+    commit_columns = evaluation_results.COMMIT_COLUMNS
+    truth_df = truth_df.astype({"project": str, "commit_id": str})
+    groups = truth_df.assign(
+        fix_lines=truth_df["group"] == FIX_LABEL,
+        other_lines=truth_df["group"] == OTHER_LABEL,
+    ).groupby(commit_columns)
+
+    index_df = pd.DataFrame(
+        {
+            "lines": groups.size(),
+            "fix_lines": groups["fix_lines"].sum(),
+            "other_lines": groups["other_lines"].sum(),
+            "tangled_lines": truth_df.groupby(commit_columns + LINE_KEYS, dropna=False)[
+                "group"
+            ]
+            .nunique()
+            .gt(1)
+            .groupby(commit_columns)
+            .sum(),
+            "files": groups["file"].nunique(),
+            "hunks": count_hunks(truth_df),
+        }
+    )
+    if commits is not None:
+        index_df = index_df.reindex(
+            pd.MultiIndex.from_tuples(
+                [(project, str(commit_id)) for project, commit_id in commits],
+                names=commit_columns,
+            )
+        )
+    index_df = index_df.fillna(0).astype("int64").reset_index()
+    index_df["change_type"] = change_types(index_df)
+    return index_df[INDEX_COLUMNS]
+
+
+def write_summary(truth_df: pd.DataFrame, project: str, commit_id: str, out_file: str):
+    """
+    Writes the summary of the ground truth of one commit to out_file, i.e., its row
+    of the index without the project and commit_id columns.
+    """
+    summary_df = summarize(
+        truth_df.assign(project=project, commit_id=commit_id), [(project, commit_id)]
+    )
+    summary_df.to_csv(out_file, columns=SUMMARY_COLUMNS, index=False)
+
+
+def is_up_to_date(file: str, reference: str) -> bool:
+    """
+    Returns whether file exists and is not older than reference.
+    """
+    try:
+        return os.stat(file).st_mtime_ns >= os.stat(reference).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def truth_file_stats(truth_files) -> list:
+    """
+    Returns the project, commit id, size, and modification time of each ground truth
+    file, as recorded in the index.
+    """
+    stats = []
+    for truth_file in truth_files:
+        stat = os.stat(truth_file)
+        project, commit_id = evaluation_results.commit_of(truth_file)
+        stats.append((project, commit_id, stat.st_size, stat.st_mtime_ns))
+    return stats
+
+
+def build_index(results_dir: str, workers: int = None) -> pd.DataFrame:
+    """
+    Returns the index of the commits with a ground truth in results_dir, from their
+    summary if it is up to date, and from their ground truth otherwise.
+    """
+    truth_files = evaluation_results.find_commit_files(results_dir)
+    # The files are stated before they are read: a file rewritten in between is
+    # out of date in the index, and is indexed again on the next load.
+    stats = truth_file_stats(truth_files)
+    summary_files = []
+    stale_files = []
+    for truth_file in truth_files:
+        summary_file = os.path.join(os.path.dirname(truth_file), SUMMARY_FILE)
+        if is_up_to_date(summary_file, truth_file):
+            summary_files.append(summary_file)
+        else:
+            stale_files.append(truth_file)
+
+    summaries_df = evaluation_results.read_commit_files(
+        summary_files, workers, dtype=SUMMARY_DTYPES
+    )
+    truth_df = evaluation_results.read_commit_files(stale_files, workers)
+    rebuilt_df = summarize(
+        truth_df, [evaluation_results.commit_of(file) for file in stale_files]
+    )
+
+    # Keep the order of the ground truth files.
+    order = {
+        tuple(evaluation_results.commit_of(file)): i
+        for i, file in enumerate(truth_files)
+    }
+    index_df = pd.concat([summaries_df[INDEX_COLUMNS], rebuilt_df], ignore_index=True)
+    position = [order[key] for key in zip(index_df["project"], index_df["commit_id"])]
+    index_df = index_df.iloc[np.argsort(position, kind="stable")].reset_index(drop=True)
+    for i, column in enumerate(STAT_COLUMNS, start=2):
+        index_df[column] = pd.Series([stat[i] for stat in stats], dtype="int64")
+    return index_df
+
+
+def write_index(results_dir: str, workers: int = None) -> pd.DataFrame:
+    """
+    Rebuilds the index of results_dir, writes it atomically, and returns it.
+    """
+    index_df = build_index(results_dir, workers)
+    index_file = os.path.join(results_dir, INDEX_FILE)
+    tmp_file = f"{index_file}.{os.getpid()}.tmp"
+    index_df.to_csv(tmp_file, index=False)
+    os.replace(tmp_file, index_file)
+    return index_df
+
+
+def is_index_up_to_date(index_df: pd.DataFrame, results_dir: str) -> bool:
+    """
+    Returns whether the index has the same ground truth files as results_dir, with the
+    same size and modification time. Each ground truth file is stated, but not read.
+    """
+    if any(column not in index_df.columns for column in STAT_COLUMNS):
+        return False
+    indexed_stats = list(
+        index_df[evaluation_results.COMMIT_COLUMNS + STAT_COLUMNS].itertuples(
+            index=False, name=None
+        )
+    )
+    truth_files = evaluation_results.find_commit_files(results_dir)
+    return indexed_stats == truth_file_stats(truth_files)
+
+
+def load_index(
+    results_dir: str, workers: int = None, rebuild: bool = False
+) -> pd.DataFrame:
+    """
+    Returns the index of results_dir, rebuilding it if it is missing, out of date,
+    or if rebuild is set.
+    """
+    if not rebuild:
+        try:
+            index_df = pd.read_csv(
+                os.path.join(results_dir, INDEX_FILE), dtype=INDEX_DTYPES
+            )
+        except FileNotFoundError:
+            index_df = None
+        if index_df is not None and is_index_up_to_date(index_df, results_dir):
+            return index_df
+    return write_index(results_dir, workers)
+
+
+def main(results_dir: str, workers: int = None):
+    """
+    Implement the logic of the script. See the module docstring.
+    """
+    index_df = write_index(results_dir, workers)
+    print(f"Indexed {len(index_df)} commits in {os.path.join(results_dir, INDEX_FILE)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog=sys.argv[0],
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+
+    parser.add_argument(
+        "results_dir",
+        help="Directory containing the ground truth of the commits",
+        metavar="RESULTS_DIR",
+    )
+
+    parser.add_argument(
+        "--workers",
+        "-w",
+        help="Number of threads reading the files",
+        type=int,
+        metavar="WORKERS",
+    )
+
+    args = parser.parse_args()
+    main(args.results_dir, args.workers)
@@ -7,6 +7,8 @@ The filtered scores are written to stdout in the same format as the original fil
 Arguments:
     --scores-file. Required argument to specify the file where the decomposition scores are stored.
     --directory. Required argument to specify the root directory where the ground truth CSV files are kept.
+      Their summaries are read from <directory>/truth_index.csv, which is rebuilt if missing or out of date.
+    --rebuild-index. Optional argument to rebuild the index of the ground truth files.
 """
 
 import argparse
@@ -15,6 +17,9 @@ from typing import List
 
 import pandas as pd
 
+from .. import evaluation_store
+from .. import ground_truth_index
+
 MIXED_CHANGE_LABEL = 'mixed'
 FIX_LABEL_CSV = 'fix'
 OTHER_LABEL_CSV = 'other'
@@ -38,23 +43,39 @@ def get_change_type(df: pd.DataFrame) -> str:
     )
 
 
-def find_mixed_commits(root_dir: str) -> List[str]:
+def find_mixed_commits(root_dir: str, rebuild_index: bool = False) -> List[str]:
     """
     Returns a list of commit identifiers that have mixed changes in format <project_name>_<commit_hash>.
+    The ground truth is classified with its index (see ground_truth_index.py), which is rebuilt if it
+    is missing or out of date.
 
     Arguments:
     - dir: Root directory where the CSV ground truth files are stored.
+    - rebuild_index: Rebuild the index even if it is up to date.
+    """
+    index_df = ground_truth_index.load_index(root_dir, rebuild=rebuild_index)
+    unknown_df = index_df[index_df["change_type"] == "unknown"]
+    if not unknown_df.empty:
+        raise ValueError(
+            f"The ground truth of {unknown_df['project'].iloc[0]}_{unknown_df['commit_id'].iloc[0]} contains an unexpected value in the `group` column. Should be `{FIX_LABEL_CSV}` or `{OTHER_LABEL_CSV}`."
+        )
+    mixed_df = index_df[index_df["change_type"] == MIXED_CHANGE_LABEL]
+    return (mixed_df["project"] + "_" + mixed_df["commit_id"]).tolist()
+
+
+def find_mixed_commits_in_store(store_dir: str, dataset: str = None) -> List[str]:
+    """
+    Like find_mixed_commits, but reads the ground truth from the evaluation store.
+
+    Arguments:
+    - store_dir: Directory of the evaluation store (see evaluation_store.py).
+    - dataset: Optional dataset of the store to read.
     """
-    mixed_changes = []
-    for root, _, files in os.walk(root_dir):
-        for file in files:
-            if file == "truth.csv":
-                truth_file = os.path.join(root, file)
-                df = pd.read_csv(truth_file, header=0)
-                change_type = get_change_type(df)
-                if change_type == MIXED_CHANGE_LABEL:
-                    mixed_changes.append(os.path.basename(root))
-    return mixed_changes
+    return [
+        f"{project}_{commit_id}"
+        for project, commit_id, lines in evaluation_store.iter_commits(store_dir, dataset, treatments="truth")
+        if get_change_type(lines["truth"]) == MIXED_CHANGE_LABEL
+    ]
 
 
 def main():
@@ -67,12 +88,30 @@ def main():
                     "bug-fixing changes and non bug-fixing changes.",
     )
 
-    main_parser.add_argument(
+    source = main_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
         "-d",
         "--directory",
         help="Root directory containing the ground truth files (truth.csv).",
         metavar="PATH",
-        required=True,
+    )
+
+    source.add_argument(
+        "--store",
+        help="Evaluation store containing the ground truth (see evaluation_store.py).",
+        metavar="PATH",
+    )
+
+    main_parser.add_argument(
+        "--dataset",
+        help="Dataset of the evaluation store to read. Defaults to all the datasets.",
+        metavar="DATASET",
+    )
+
+    main_parser.add_argument(
+        "--rebuild-index",
+        help="Rebuild the index of the ground truth files even if it is up to date.",
+        action="store_true",
     )
 
     main_parser.add_argument(
@@ -85,12 +124,14 @@ def main():
 
     args = main_parser.parse_args()
 
-    directory = os.path.realpath(args.directory)
-    if not os.path.exists(args.directory):
-        raise ValueError(f"Directory {directory} does not exist.")
-
     # Find the commits with mixed changes and create columns for project name and short commit hash from the commit identifier column
-    mixed_changes = find_mixed_commits(directory)
+    if args.store:
+        mixed_changes = find_mixed_commits_in_store(args.store, args.dataset)
+    else:
+        directory = os.path.realpath(args.directory)
+        if not os.path.exists(args.directory):
+            raise ValueError(f"Directory {directory} does not exist.")
+        mixed_changes = find_mixed_commits(directory, args.rebuild_index)
     df_mixed_changes = pd.DataFrame({"commit_identifier": mixed_changes})
     df_mixed_changes[['project_name', 'short_commit']] = df_mixed_changes['commit_identifier'].str.split('_',
                                                                                                          expand=True)
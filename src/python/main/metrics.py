@@ -33,3 +33,26 @@ def count_tangled_file(ground_truth: pd.DataFrame) -> int:
     with more than one group.
     """
     return ground_truth.groupby("file")["group"].nunique().gt(1).sum()
+
+
+def is_tangled_patch_per_commit(dataframe: pd.DataFrame) -> pd.Series:
+    """
+    Like is_tangled_patch, but for every commit of a dataframe with the columns
+    'project' and 'commit_id'. Returns a boolean series indexed by (project, commit_id).
+    """
+    return dataframe.groupby(["project", "commit_id"])["group"].nunique().gt(1)
+
+
+def count_tangled_file_per_commit(dataframe: pd.DataFrame) -> pd.Series:
+    """
+    Like count_tangled_file, but for every commit of a dataframe with the columns
+    'project' and 'commit_id'. Returns a series indexed by (project, commit_id).
+    Commits without any file are missing.
+    """
+    return (
+        dataframe.groupby(["project", "commit_id", "file"])["group"]
+        .nunique()
+        .gt(1)
+        .groupby(["project", "commit_id"])
+        .sum()
+    )
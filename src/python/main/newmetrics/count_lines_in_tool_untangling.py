@@ -12,6 +12,7 @@ import os
 import pandas as pd
 
 from .. import evaluation_results
+from .. import evaluation_store
 
 FILE_NAME="flexeme.csv"
 COLUMNS = ['project', 'commit_id', 'tool_lines', 'truth_lines']
@@ -21,21 +22,47 @@ KEY_COLUMNS = ["file", "source", "target"]
 def remove_duplicate_lines(df: pd.DataFrame) -> pd.DataFrame:
     return df.drop_duplicates(subset=KEY_COLUMNS)
 
-def main(directory:str):
-    ground_truth_files = evaluation_results.retrieve_ground_truth_files(directory)
+def read_commits(directory: str):
+    """
+    Yields the project, commit id, ground truth, and tool untangling (or None) of
+    each commit with a ground truth in directory.
+    """
+    truth_files = evaluation_results.find_commit_files(directory)
+    tool_files = evaluation_results.find_commit_files(directory, FILE_NAME)
+    truth_df = evaluation_results.read_commit_files(truth_files)
+    tool_df = evaluation_results.read_commit_files(tool_files)
+
+    tool_dfs = {
+        (project, commit_id): flexeme_df
+        for project, commit_id, flexeme_df in evaluation_results.split_by_commit(tool_df, tool_files)
+    }
+    for project, commit_id, truth_df in evaluation_results.split_by_commit(truth_df, truth_files):
+        yield project, commit_id, truth_df, tool_dfs.get((project, commit_id))
+
+
+def read_store_commits(store_dir: str, dataset: str = None):
+    """
+    Like read_commits, but reads the commits from the evaluation store.
+    """
+    treatment = os.path.splitext(FILE_NAME)[0]
+    for project, commit_id, lines in evaluation_store.iter_commits(
+        store_dir, dataset, treatments=["truth", treatment]
+    ):
+        if "truth" in lines:
+            yield project, commit_id, lines["truth"], lines.get(treatment)
+
+
+def main(directory:str, store_dir: str = None, dataset: str = None):
+    if store_dir:
+        commits = read_store_commits(store_dir, dataset)
+    else:
+        commits = read_commits(directory)
 
     data = []
-    for truth_file in ground_truth_files:
-        truth_df = evaluation_results.read_ground_truth(truth_file)
+    for project, commit_id, truth_df, flexeme_df in commits:
         truth_df = remove_duplicate_lines(truth_df)
 
-        commit_folder = os.path.dirname(truth_file)
-        project, commit_id = os.path.basename(commit_folder).split("_")
-
-        flexeme_file = os.path.join(commit_folder, FILE_NAME)
-
-        if os.path.exists(flexeme_file):
-            flexeme_df = evaluation_results.read_tool_untangling(flexeme_file)
+        if flexeme_df is not None:
             flexeme_df = remove_duplicate_lines(flexeme_df)
         else:
             flexeme_df = pd.DataFrame(columns=evaluation_results.GROUND_TRUTH_COLUMNS)
@@ -57,12 +84,24 @@ if __name__ == "__main__":
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
 
-    parser.add_argument(
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
         "--directory",
         help="Path to the directory containing the ground truth files",
-        required=True,
         metavar="DIRECTORY",
     )
 
+    source.add_argument(
+        "--store",
+        help="Path to the evaluation store containing the ground truth (see evaluation_store.py)",
+        metavar="STORE_DIR",
+    )
+
+    parser.add_argument(
+        "--dataset",
+        help="Dataset of the evaluation store to read. Defaults to all the datasets",
+        metavar="DATASET",
+    )
+
     args = parser.parse_args()
-    main(args.directory)
+    main(args.directory, args.store, args.dataset)
@@ -2,21 +2,19 @@
 This module contains utility functions for parsing and exporting decomposition results.
 """
 
-import sys
-
 
 def export_tool_decomposition_as_csv(df, output_file):
     """
-    Export the dataframe to a CSV file. Print an error message if the dataframe is empty.
+    Export the dataframe to a CSV file.
 
     Args:
         df: The dataframe to be exported. The dataframe represents the decomposition results for a tool.
         output_file: The path to the CSV file to be created.
+    Raises:
+        ValueError: If the dataframe is empty.
     """
     if len(df) == 0:
-        print(
-            "No results generated. Verify decomposition results and paths.",
-            file=sys.stderr,
+        raise ValueError(
+            "No results generated. Verify decomposition results and paths."
         )
-        sys.exit(1)
     df.to_csv(output_file, index=False)
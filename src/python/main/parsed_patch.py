@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+
+"""
+A compact, memory-mapped representation of the changed lines of a diff.
+
+Parsing a diff is the main cost of the metrics and of the ground
+truth, and the same diffs are parsed by several scripts. A diff is parsed once
+into a ParsedPatch that is stored next to it (<name>.parsed for <name>.diff).
+Later readers map the stored file instead of parsing the diff again.
+
+A ParsedPatch contains:
+    - files: The path of each file of the diff.
+    - A hunk table: the file of each hunk, and the range of its lines in the line table.
+    - A line table: the file, hunk, line type, source line number (0 if missing),
+      target line number (0 if missing), 64-bit hash, and value of each non-blank
+      added or removed line, in the order of the diff.
+    - A string pool: the distinct texts of the lines (as returned by str(line)). The
+      value of a line is the index of its text in the pool, so a line takes 29 bytes
+      in the line table and a repeated text is stored once.
+
+Command Line Args:
+    diff_file: The diff to parse.
+Writes:
+    The ParsedPatch of the diff, next to it.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+
+import numpy as np
+import pandas as pd
+from unidiff.constants import LINE_TYPE_CONTEXT
+
+# parsed_patch.py can be run as a script, outside of the package.
+if __package__:
+    from . import unified_diff
+else:
+    import unified_diff
+
+MAGIC = b"PARSEDPATCH2\n"
+ALIGNMENT = 8
+# Arrays of a ParsedPatch and their type, in the order they are stored.
+ARRAYS = [
+    ("hunk_file", np.int32),
+    ("hunk_offsets", np.int64),
+    ("line_file", np.int32),
+    ("line_hunk", np.int32),
+    ("line_type", np.uint8),
+    ("source", np.int32),
+    ("target", np.int32),
+    ("hashes", np.uint64),
+    ("line_value", np.int32),
+    ("pool_offsets", np.int64),
+    ("pool", np.uint8),
+]
+
+
+def line_hash(text):
+    """
+    Returns the 64-bit hash of the text of a diff line.
+    """
+    return int.from_bytes(
+        hashlib.blake2b(text.encode(), digest_size=8).digest(), "little"
+    )
+
+
+class ParsedPatch:
+    """
+    The files, hunks, and non-blank changed lines of a diff. See the module docstring.
+    """
+
+    def __init__(self, files, arrays):
+        self.files = files
+        for name, _ in ARRAYS:
+            setattr(self, name, arrays[name])
+
+    def file_count(self):
+        """
+        Returns the number of files in the diff.
+        """
+        return len(self.files)
+
+    def hunk_count(self):
+        """
+        Returns the number of hunks with at least one non-blank changed line.
+        """
+        return int(np.count_nonzero(np.diff(self.hunk_offsets)))
+
+    def line_count(self):
+        """
+        Returns the number of non-blank changed lines.
+        """
+        return len(self.hashes)
+
+    def hunk_hashes(self):
+        """
+        Yields the line hashes of each hunk with at least one non-blank changed line.
+        """
+        for start, end in zip(self.hunk_offsets[:-1], self.hunk_offsets[1:]):
+            if start < end:
+                yield self.hashes[start:end]
+
+    def hunk_sizes(self):
+        """
+        Returns the number of non-blank changed lines of each hunk of the hunk table.
+        """
+        return np.diff(self.hunk_offsets)
+
+    def values(self):
+        """
+        Returns the texts of the string pool. The texts are interned, so that the
+        lines with the same text share it, also across ParsedPatches.
+        """
+        pool = self.pool.tobytes()
+        offsets = self.pool_offsets.tolist()
+        return [
+            sys.intern(pool[start:end].decode())
+            for start, end in zip(offsets[:-1], offsets[1:])
+        ]
+
+    def lines(self):
+        """
+        Returns the text of each non-blank changed line, as returned by str(line) in unidiff.
+        """
+        values = self.values()
+        return [values[value] for value in self.line_value.tolist()]
+
+    def lines_in(self, other):
+        """
+        Returns whether each non-blank changed line also occurs in the ParsedPatch
+        other, compared by hash.
+        """
+        return np.isin(self.hashes, other.hashes)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Converts the non-blank changed lines into a DataFrame, like
+        patch_to_csv.patch_to_dataframe(patch, ignore_blank_lines=True).
+
+        The dataframe has the following columns:
+            - file (category): Path of the file
+            - source (Int32): Line number when the line is removed, missing otherwise
+            - target (Int32): Line number when the line is added, missing otherwise
+        """
+        # Only the paths of the files with changed lines are categories, in order of
+        # appearance. A path can appear in several files of the diff.
+        file_ids, line_codes = np.unique(self.line_file, return_inverse=True)
+        path_codes = {}
+        file_codes = np.array(
+            [path_codes.setdefault(self.files[i], len(path_codes)) for i in file_ids],
+            dtype=np.int32,
+        )
+        source = np.array(self.source)
+        target = np.array(self.target)
+        return pd.DataFrame(
+            {
+                "file": pd.Categorical.from_codes(
+                    file_codes[line_codes], categories=list(path_codes)
+                ),
+                "source": pd.arrays.IntegerArray(source, source == 0),
+                "target": pd.arrays.IntegerArray(target, target == 0),
+            }
+        )
+
+
+def parse_patch(patch) -> ParsedPatch:
+    """
+    Returns the ParsedPatch of a unidiff.PatchSet or of a unified_diff.Patch.
+    """
+    files = []
+    hunk_file = []
+    hunk_offsets = [0]
+    line_file = []
+    line_hunk = []
+    line_types = []
+    sources = []
+    targets = []
+    line_values = []
+    # Index of each text in the string pool.
+    pool = {}
+    pool_texts = []
+    pool_hashes = []
+    pool_offsets = [0]
+
+    for file in patch:
+        file_id = len(files)
+        files.append(file.path)
+        for hunk in file:
+            hunk_id = len(hunk_file)
+            for line in hunk:
+                if line.line_type == LINE_TYPE_CONTEXT or not line.value.strip():
+                    continue
+                text = str(line)
+                value = pool.get(text)
+                if value is None:
+                    value = pool[text] = len(pool_texts)
+                    encoded = text.encode()
+                    pool_texts.append(encoded)
+                    pool_hashes.append(line_hash(text))
+                    pool_offsets.append(pool_offsets[-1] + len(encoded))
+                line_file.append(file_id)
+                line_hunk.append(hunk_id)
+                line_types.append(ord(line.line_type))
+                sources.append(line.source_line_no or 0)
+                targets.append(line.target_line_no or 0)
+                line_values.append(value)
+            hunk_file.append(file_id)
+            hunk_offsets.append(len(line_values))
+
+    line_values = np.asarray(line_values, dtype=np.int32)
+    arrays = {
+        "hunk_file": hunk_file,
+        "hunk_offsets": hunk_offsets,
+        "line_file": line_file,
+        "line_hunk": line_hunk,
+        "line_type": line_types,
+        "source": sources,
+        "target": targets,
+        "hashes": np.asarray(pool_hashes, dtype=np.uint64)[line_values],
+        "line_value": line_values,
+        "pool_offsets": pool_offsets,
+        "pool": np.frombuffer(b"".join(pool_texts), dtype=np.uint8),
+    }
+    return ParsedPatch(
+        files, {name: np.asarray(arrays[name], dtype=dtype) for name, dtype in ARRAYS}
+    )
+
+
+def parsed_file_name(diff_file):
+    """
+    Returns the file where the ParsedPatch of diff_file is stored.
+    """
+    return os.path.splitext(diff_file)[0] + ".parsed"
+
+
+def write_parsed_patch(parsed, parsed_file, diff_stat=None):
+    """
+    Writes a ParsedPatch to parsed_file, atomically.
+
+    The file is MAGIC, the length of a JSON header, the JSON header, and the arrays,
+    each aligned on 8 bytes. The header lists the files, the offset and length of
+    each array, the version of the diff parser, and the size and modification time
+    of the diff (diff_stat), if any.
+    """
+    header = {"files": parsed.files, "arrays": {}, "parser": unified_diff.VERSION}
+    if diff_stat is not None:
+        header["diff"] = [diff_stat.st_size, diff_stat.st_mtime_ns]
+
+    chunks = []
+    offset = 0
+    for name, dtype in ARRAYS:
+        data = np.ascontiguousarray(getattr(parsed, name), dtype=dtype).tobytes()
+        header["arrays"][name] = [offset, len(data) // np.dtype(dtype).itemsize]
+        padding = -len(data) % ALIGNMENT
+        chunks.append(data + b"\0" * padding)
+        offset += len(data) + padding
+
+    encoded_header = json.dumps(header).encode()
+    prefix_size = len(MAGIC) + 8 + len(encoded_header)
+    encoded_header += b" " * (-prefix_size % ALIGNMENT)
+
+    tmp_file = f"{parsed_file}.{os.getpid()}.tmp"
+    with open(tmp_file, "wb") as file:
+        file.write(MAGIC)
+        file.write(struct.pack("<Q", len(encoded_header)))
+        file.write(encoded_header)
+        file.writelines(chunks)
+    os.replace(tmp_file, parsed_file)
+
+
+def read_parsed_patch(parsed_file):
+    """
+    Returns the ParsedPatch stored in parsed_file, the [size, mtime] of its diff, and
+    the version of the parser that parsed it. The arrays are read-only views of the
+    memory-mapped file.
+
+    Raises:
+        ValueError: If the file does not contain a ParsedPatch.
+    """
+    with open(parsed_file, "rb") as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    if buffer[: len(MAGIC)] != MAGIC:
+        raise ValueError(f"Not a parsed patch: {parsed_file}")
+    (header_size,) = struct.unpack_from("<Q", buffer, len(MAGIC))
+    start = len(MAGIC) + 8
+    header = json.loads(buffer[start : start + header_size])
+    data_start = start + header_size
+
+    arrays = {}
+    for name, dtype in ARRAYS:
+        offset, length = header["arrays"][name]
+        arrays[name] = np.frombuffer(
+            buffer, dtype=dtype, count=length, offset=data_start + offset
+        )
+    return (
+        ParsedPatch(header["files"], arrays),
+        header.get("diff"),
+        header.get("parser"),
+    )
+
+
+def load_diff(diff_file) -> ParsedPatch:
+    """
+    Returns the ParsedPatch of a diff. The stored ParsedPatch is used if it was
+    written for the current version of the diff by the current version of the parser.
+    Otherwise, the diff is parsed and its ParsedPatch is stored for the next readers.
+
+    Raises:
+        FileNotFoundError: If the diff does not exist.
+    """
+    diff_stat = os.stat(diff_file)
+    parsed_file = parsed_file_name(diff_file)
+    try:
+        parsed, diff, parser = read_parsed_patch(parsed_file)
+        if (
+            diff == [diff_stat.st_size, diff_stat.st_mtime_ns]
+            and parser == unified_diff.VERSION
+        ):
+            return parsed
+    except (FileNotFoundError, ValueError):
+        pass
+    return write_parsed_diff(diff_file)
+
+
+def write_parsed_diff(diff_file) -> ParsedPatch:
+    """
+    Parses a diff, stores its ParsedPatch next to it, and returns it.
+    """
+    diff_stat = os.stat(diff_file)
+    parsed = parse_patch(unified_diff.from_filename(diff_file))
+    write_parsed_patch(parsed, parsed_file_name(diff_file), diff_stat)
+    return parsed
+
+
+def main():
+    """
+    Implement the logic of the script. See the module docstring.
+    """
+    args = sys.argv[1:]
+
+    if len(args) != 1:
+        print("usage: parsed_patch.py <path/to/diff/file>")
+        sys.exit(1)
+
+    write_parsed_diff(args[0])
+
+
+if __name__ == "__main__":
+    main()
@@ -9,36 +9,102 @@ Output: Writes out added (+) or removed(-) diff lines in the CSV format:
 """
 import os
 import sys
+from array import array
 
-from unidiff import PatchSet
+import numpy as np
+import pandas as pd
 from unidiff.constants import LINE_TYPE_CONTEXT
 
+# changed_lines.sh runs this module as a script, outside of the package.
+if __package__:
+    from . import unified_diff
+else:
+    import unified_diff
 
-def to_csv(patch: PatchSet):
+COL_NAMES = ["file", "source", "target"]
+
+
+def iter_changed_lines(patch: unified_diff.Patch, ignore_blank_lines=False):
     """
-    Takes in a PatchSet and prints out only added/removed lines (i.e. ignores all context lines).
+    Yields a tuple (file path, source line number, target line number) for each
+    added/removed line of the patch (i.e. ignores all context lines).
+    Since a line can only be either added or removed, one of the two line numbers
+    is always None.
+
+    Args:
+        patch: The unidiff.PatchSet or unified_diff.Patch to traverse.
+        ignore_blank_lines: If True, lines containing only whitespace are ignored.
     """
     for file in patch:
+        path = file.path
         for hunk in file:
             for line in hunk:
                 if line.line_type == LINE_TYPE_CONTEXT:
                     continue
-                yield f"{file.path},{line.source_line_no},{line.target_line_no}"
-                # ,\"{line.value.strip()}\"'
+                if ignore_blank_lines and not line.value.strip():
+                    continue
+                yield path, line.source_line_no, line.target_line_no
+
+
+def patch_to_dataframe(
+    patch: unified_diff.Patch, ignore_blank_lines=False
+) -> pd.DataFrame:
+    """
+    Converts the added/removed lines of a patch into a DataFrame, walking the patch
+    only once. The columns are accumulated in typed arrays and the DataFrame is
+    created at the end.
+
+    The dataframe has the following columns:
+        - file (category): Path of the file
+        - source (Int32): Line number when the line is removed, missing otherwise
+        - target (Int32): Line number when the line is added, missing otherwise
+
+    Args:
+        patch: The unidiff.PatchSet or unified_diff.Patch to convert.
+        ignore_blank_lines: If True, lines containing only whitespace are ignored.
+    """
+    file_ids = {}
+    file_codes = array("i")
+    sources = array("i")
+    targets = array("i")
+
+    for path, source, target in iter_changed_lines(patch, ignore_blank_lines):
+        file_codes.append(file_ids.setdefault(path, len(file_ids)))
+        # Missing line numbers are stored as 0, which is never a valid line number.
+        sources.append(source or 0)
+        targets.append(target or 0)
+
+    sources = np.frombuffer(sources, dtype=np.int32)
+    targets = np.frombuffer(targets, dtype=np.int32)
+    return pd.DataFrame(
+        {
+            "file": pd.Categorical.from_codes(
+                np.frombuffer(file_codes, dtype=np.int32), categories=list(file_ids)
+            ),
+            "source": pd.arrays.IntegerArray(sources.copy(), sources == 0),
+            "target": pd.arrays.IntegerArray(targets.copy(), targets == 0),
+        },
+        columns=COL_NAMES,
+    )
+
+
+def to_csv(patch: unified_diff.Patch):
+    """
+    Takes in a patch and prints out only added/removed lines (i.e. ignores all context lines).
+    """
+    for path, source, target in iter_changed_lines(patch):
+        yield f"{path},{source},{target}"
 
 
 def from_file(diff_file):
     """
     Takes in a diff filename and returns a CSV string of added/removed lines.
     """
-    result = ""
-
-    if os.path.exists(diff_file):
-        patch = PatchSet.from_filename(diff_file, encoding="latin-1")
-        for line in to_csv(patch):
-            result += line + "\n"
+    if not os.path.exists(diff_file):
+        return ""
 
-    return result
+    patch = unified_diff.from_filename(diff_file)
+    return "".join(line + "\n" for line in to_csv(patch))
 
 
 def main():
@@ -46,7 +112,7 @@ def main():
     Implement the logic of the script. See the module docstring.
     """
 
-    patch = PatchSet.from_string(sys.stdin.read())
+    patch = unified_diff.from_string(sys.stdin.read())
 
     for line in to_csv(patch):
         print(line)
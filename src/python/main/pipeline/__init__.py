@@ -0,0 +1,7 @@
+"""
+Runs the evaluation pipeline in long-lived Python worker processes.
+
+The stages of one commit form a DAG (see dag.py). Python stages are called as
+functions, and only the external tools (Defects4J, SmartCommit, Flexeme) are
+started as subprocesses (see d4j_stages.py).
+"""
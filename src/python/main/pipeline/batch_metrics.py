@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+
+"""
+Computes the metrics of a list of Defects4J bugs or LLTC4J commits in one process,
+with a pool of worker processes.
+
+This replaces running get_metrics_for_d4j_bug.sh or diff_metrics_lltc4j.py for each
+commit and concatenating their one-row CSV files: the metrics are computed by
+calling diff_metrics.py and diff_metrics_lltc4j.py directly.
+
+As before, the metrics of a commit are cached in <results_dir>/metrics/<commit>.csv,
+and a Defects4J bug is checked out and its diffs generated if its repository does
+not exist. The repository of an LLTC4J commit must already be cloned.
+
+Command Line Args:
+    - dataset: d4j or lltc4j.
+    - commits_file: For d4j, CSV file without header listing the project and the bug id
+      of each bug. For lltc4j, CSV file with the header vcs_url,commit_hash,parent_hash.
+    - results_dir: Directory where the results are stored and repositories checked out.
+    - workers: Optional number of worker processes. Defaults to the number of CPUs.
+Writes:
+    - <results_dir>/metrics.csv: The metrics of each commit, with a CSV header. The
+      file is replaced atomically once all the commits are processed.
+    - <results_dir>/metrics/<commit>.csv: The metrics of each commit.
+    - <results_dir>/logs/<commit>_metrics.log: The log of each commit.
+"""
+
+import argparse
+import csv
+import os
+import sys
+
+from .. import diff_metrics_lltc4j
+from ..batch_untangling_score import read_commits
+from . import d4j_stages
+from .dag import CACHED, OK, Stage, run_commits
+
+METRICS_HEADER = (
+    "project,vid,files_updated,hunks,average_hunk_size,"
+    "code_changed_lines,tangled_lines,tangled_hunks"
+)
+
+
+class Lltc4jCommit:
+    """
+    The paths of the artifacts of one LLTC4J commit in the results directory.
+    """
+
+    def __init__(self, vcs_url, commit_hash, parent_hash, results_dir):
+        self.project = project_name_from_url(vcs_url)
+        self.commit_hash = commit_hash
+        self.parent_hash = parent_hash
+        # Like get_commit_identifier in lltc4j_util.sh.
+        self.short_hash = commit_hash[:6]
+        self.name = f"{self.project}_{self.short_hash}"
+        self.repository = os.path.join(results_dir, "repositories", self.project)
+        self.diff_file = os.path.join(self.repository, f"VC_{self.short_hash}.diff")
+        self.metrics_file = os.path.join(results_dir, "metrics", f"{self.name}.csv")
+
+
+def project_name_from_url(vcs_url):
+    """
+    Returns the project name from a git repository's URL, like
+    get_project_name_from_url in lltc4j_util.sh.
+    """
+    return vcs_url.rsplit("/", 1)[-1].split(".", 1)[0]
+
+
+def read_lltc4j_commits(commits_file, results_dir):
+    """
+    Returns the LLTC4J commits listed in commits_file.
+    """
+    with open(commits_file, newline="") as file:
+        return [
+            Lltc4jCommit(
+                row["vcs_url"], row["commit_hash"], row["parent_hash"], results_dir
+            )
+            for row in csv.DictReader(file)
+        ]
+
+
+def write_atomically(file_name, content):
+    """
+    Writes content to file_name, replacing it atomically.
+    """
+    os.makedirs(os.path.dirname(file_name) or ".", exist_ok=True)
+    tmp_file = f"{file_name}.{os.getpid()}.tmp"
+    with open(tmp_file, "w") as file:
+        file.write(content)
+    os.replace(tmp_file, file_name)
+
+
+def write_metrics(metrics_results, rows):
+    """
+    Writes the metrics CSV file, with a header, atomically.
+    """
+    write_atomically(
+        metrics_results, "".join(f"{row}\n" for row in [METRICS_HEADER, *rows])
+    )
+
+
+def cached_metrics(commit):
+    """
+    Returns the metrics row stored for the commit, or None if there is none.
+    An empty file, left by a failed run of get_metrics_for_d4j_bug.sh, is not a row.
+    """
+    try:
+        with open(commit.metrics_file) as file:
+            row = file.read().rstrip("\n")
+    except FileNotFoundError:
+        return None
+    if not row:
+        return None
+    print(
+        "Calculating metrics .................................................. CACHED"
+    )
+    return row
+
+
+def d4j_metrics(commit):
+    """
+    Returns the metrics row of a Defects4J bug, generating its artifacts if its
+    repository does not exist.
+    """
+    row = cached_metrics(commit)
+    if row is not None:
+        return row
+    if not os.path.isdir(commit.repository):
+        d4j_stages.generate_artifacts(commit)
+    return d4j_stages.compute_metrics(commit)
+
+
+def lltc4j_metrics(commit):
+    """
+    Returns the metrics row of an LLTC4J commit, computed on its diff with its parent.
+
+    Raises:
+        FileNotFoundError: If the repository of the commit is not cloned.
+    """
+    if not os.path.isdir(commit.repository):
+        raise FileNotFoundError(f"Clone not found: {commit.repository}")
+    row = cached_metrics(commit)
+    if row is not None:
+        return row
+
+    with open(commit.diff_file, "w") as file:
+        d4j_stages.run_command(
+            [
+                "git",
+                "--git-dir",
+                os.path.join(commit.repository, ".git"),
+                "diff",
+                "-U0",
+                f"{commit.parent_hash}..{commit.commit_hash}",
+            ],
+            stdout=file,
+        )
+    row = diff_metrics_lltc4j.commit_metrics(
+        commit.diff_file, commit.project, commit.short_hash
+    )
+    write_atomically(commit.metrics_file, row + "\n")
+    print("Calculating metrics .................................................. OK")
+    return row
+
+
+STAGES = {
+    "d4j": [Stage("metrics", d4j_metrics, "metrics")],
+    "lltc4j": [Stage("metrics", lltc4j_metrics, "metrics")],
+}
+
+
+def main(dataset, commits_file, results_dir, workers):
+    """
+    Implement the logic of the script. See the module docstring.
+    """
+    if dataset == "d4j":
+        commits = [
+            d4j_stages.D4jCommit(project, vid, results_dir)
+            for project, vid in read_commits(commits_file)
+        ]
+    else:
+        commits = read_lltc4j_commits(commits_file, results_dir)
+    logs_dir = os.path.join(results_dir, "logs")
+    print(f"{sys.argv[0]}: logs will be stored in {logs_dir}/<commit>_metrics.log")
+
+    metrics = []
+    for commit, outcomes in zip(
+        commits, run_commits(STAGES[dataset], logs_dir, commits, workers)
+    ):
+        status, elapsed, row = outcomes["metrics"]
+        if status in (OK, CACHED):
+            metrics.append(row)
+        log_file = os.path.join(logs_dir, f"{commit.name}_metrics.log")
+        print(f"{commit.name:<20} {status} {elapsed:.0f}s [{log_file}]")
+
+    metrics_results = os.path.join(results_dir, "metrics.csv")
+    write_metrics(metrics_results, metrics)
+    print(f"Commit metrics were aggregated and saved in {metrics_results}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog=sys.argv[0],
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+
+    parser.add_argument(
+        "dataset",
+        help="Dataset of the commits",
+        choices=sorted(STAGES),
+    )
+
+    parser.add_argument(
+        "commits_file",
+        help="CSV file listing the commits (see above)",
+        metavar="COMMITS_FILE",
+    )
+
+    parser.add_argument(
+        "results_dir",
+        help="Directory where the results are stored and repositories checked out",
+        metavar="RESULTS_DIR",
+    )
+
+    parser.add_argument(
+        "--workers",
+        "-w",
+        help="Number of worker processes",
+        type=int,
+        default=os.cpu_count(),
+        metavar="WORKERS",
+    )
+
+    args = parser.parse_args()
+    main(args.dataset, args.commits_file, args.results_dir, args.workers)
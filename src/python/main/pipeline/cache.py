@@ -0,0 +1,154 @@
+"""
+Content-addressed cache of the pipeline stages.
+
+The key of a stage is the hash of the content of its inputs (e.g., diff files,
+tool jar), of its parameters (e.g., REMOVE_NON_CODE_CHANGES), and of the source
+of the scripts implementing it. The manifest of a commit records, for each
+stage, the key of its last successful run, the hash and size of its outputs,
+and its result. A stage is up to date if its key did not change and its
+outputs are the recorded ones, so a rerun only recomputes what changed.
+"""
+
+import hashlib
+import json
+import os
+
+CHUNK_SIZE = 1 << 20
+
+# Digests of the files read by this process, by (path, mtime, size). Large inputs
+# like the SmartCommit jar are hashed once per worker instead of once per commit.
+_file_digests = {}
+
+
+def file_digest(file):
+    """
+    Returns the SHA-256 hex digest of the content of a file.
+    """
+    stat = os.stat(file)
+    memo_key = (os.path.abspath(file), stat.st_mtime_ns, stat.st_size)
+    digest = _file_digests.get(memo_key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(file, "rb") as f:
+            while chunk := f.read(CHUNK_SIZE):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        _file_digests[memo_key] = digest
+    return digest
+
+
+def path_digest(path):
+    """
+    Returns the digest of the content of a file or of a directory tree, or None
+    if the path does not exist. The digest of a directory covers the relative path
+    and the content of each file it contains.
+    """
+    if os.path.isfile(path):
+        return file_digest(path)
+    if not os.path.isdir(path):
+        return None
+
+    sha = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            file = os.path.join(root, name)
+            sha.update(os.path.relpath(file, path).encode())
+            sha.update(b"\0")
+            sha.update(file_digest(file).encode())
+            sha.update(b"\0")
+    return sha.hexdigest()
+
+
+def path_size(path):
+    """
+    Returns the size of a file, or the total size of the files of a directory tree.
+    """
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(path)
+        for name in files
+    )
+
+
+def stage_key(name, inputs, params, scripts):
+    """
+    Returns the cache key of a stage.
+
+    Args:
+        name: The name of the stage.
+        inputs: The files and directories the stage reads. Missing inputs are part of the key.
+        params: A JSON-serializable dict of the other values the stage depends on.
+        scripts: The source files implementing the stage.
+    """
+    description = {
+        "stage": name,
+        "inputs": [path_digest(path) for path in inputs],
+        "params": params,
+        "scripts": [file_digest(script) for script in scripts],
+    }
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+
+class Manifest:
+    """
+    The cache entries of the stages of one commit, stored as a JSON file.
+    """
+
+    def __init__(self, manifest_file):
+        self.manifest_file = manifest_file
+        try:
+            with open(manifest_file) as file:
+                self.entries = json.load(file)
+        except FileNotFoundError:
+            self.entries = {}
+
+    def lookup(self, name, key, verify=False):
+        """
+        Returns the entry of a stage if its key is `key` and its recorded outputs are
+        still there, or None otherwise. Outputs are compared by size, or by content
+        if verify is True.
+        """
+        entry = self.entries.get(name)
+        if entry is None or entry["key"] != key:
+            return None
+        for path, (digest, size) in entry["outputs"].items():
+            if not os.path.exists(path) or path_size(path) != size:
+                return None
+            if verify and path_digest(path) != digest:
+                return None
+        return entry
+
+    def record(self, name, key, outputs, result=None):
+        """
+        Records a successful run of a stage. Only the outputs that exist are recorded.
+        """
+        self.entries[name] = {
+            "key": key,
+            "outputs": {
+                os.fspath(path): [path_digest(path), path_size(path)]
+                for path in outputs
+                if os.path.exists(path)
+            },
+            "result": result,
+        }
+        self.save()
+
+    def invalidate(self, name):
+        """
+        Removes the entry of a stage, e.g., when it failed.
+        """
+        if self.entries.pop(name, None) is not None:
+            self.save()
+
+    def save(self):
+        """
+        Writes the manifest atomically.
+        """
+        os.makedirs(os.path.dirname(self.manifest_file), exist_ok=True)
+        tmp_file = f"{self.manifest_file}.tmp"
+        with open(tmp_file, "w") as file:
+            json.dump(self.entries, file, indent=2, sort_keys=True)
+        os.replace(tmp_file, self.manifest_file)
@@ -0,0 +1,645 @@
+"""
+The stages of the evaluation of one Defects4J bug. They write the same files as
+generate_d4j_artifacts.sh, get_metrics_for_d4j_bug.sh, ground_truth_for_d4j_bug.sh,
+untangle_with_tools.sh, and score_bug.sh. Each stage declares what it reads
+so that it is cached in the manifest of the commit (see cache.py).
+
+Only Defects4J, the version control system, SmartCommit, and Flexeme are started
+as subprocesses; the Python scripts are called directly.
+"""
+
+import csv
+import importlib.metadata
+import os
+import shutil
+import subprocess
+import sys
+import time
+from functools import partial
+
+from .. import (
+    clean_artifacts,
+    d4j_diffs,
+    diff_metrics,
+    evaluation_store,
+    filename_untangling,
+    flexeme_results_to_csv,
+    ground_truth,
+    ground_truth_index,
+    parse_utils,
+    parsed_patch,
+    patch_to_csv,
+    smartcommit_results_to_csv,
+    unified_diff,
+    untangling_score,
+)
+from .dag import Stage
+
+ROOT_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")
+)
+BASH_DIR = os.path.join(ROOT_DIR, "src", "bash", "main")
+SMARTCOMMIT_JAR = os.path.join(ROOT_DIR, "lib", "smartcommitcore-1.0-all.jar")
+
+
+class D4jCommit:
+    """
+    The paths of the artifacts of one Defects4J bug in the output directory.
+    """
+
+    def __init__(self, project, vid, out_dir):
+        self.project = project
+        self.vid = vid
+        self.name = f"{project}_{vid}"
+        self.repository = os.path.join(out_dir, "repositories", self.name)
+        self.diff_dir = os.path.join(self.repository, "diff")
+        self.metrics_file = os.path.join(out_dir, "metrics", f"{self.name}.csv")
+        self.evaluation_dir = os.path.join(out_dir, "evaluation", self.name)
+        self.decomposition_dir = os.path.join(out_dir, "decomposition")
+        self.flexeme_dir = os.path.join(self.decomposition_dir, "flexeme", self.name)
+
+
+def remove_non_code_changes():
+    """
+    Returns whether the non-code changes are removed from the repository before untangling.
+    """
+    return os.environ.get("REMOVE_NON_CODE_CHANGES", "false") == "true"
+
+
+def run_command(args, cwd=None, stdout=None, env=None):
+    """
+    Runs an external command. Its output goes to the current standard output
+    (i.e., the log of the stage) unless stdout is given.
+
+    Raises:
+        subprocess.CalledProcessError: If the command fails.
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    subprocess.run(
+        args,
+        cwd=cwd,
+        stdout=stdout if stdout is not None else sys.stdout,
+        stderr=sys.stderr,
+        env=env,
+        check=True,
+    )
+
+
+def command_output(args, cwd=None):
+    """
+    Returns the standard output of an external command without the trailing newlines.
+
+    Raises:
+        subprocess.CalledProcessError: If the command fails.
+    """
+    sys.stderr.flush()
+    result = subprocess.run(
+        args,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=sys.stderr,
+        check=True,
+        text=True,
+    )
+    return result.stdout.rstrip("\n")
+
+
+def revision_ids(project, vid):
+    """
+    Returns the buggy and fixed revision ids of a Defects4J bug in the underlying
+    version control system. See print_revision_ids in d4j_utils.sh.
+
+    Raises:
+        ValueError: If the bug id is not in the active bugs of the project.
+    """
+    active_bugs = os.path.join(
+        os.environ["DEFECTS4J_HOME"],
+        "framework",
+        "projects",
+        project,
+        "active-bugs.csv",
+    )
+    with open(active_bugs, newline="") as file:
+        for row in csv.reader(file):
+            if row and row[0] == vid:
+                return row[1], row[2]
+    raise ValueError(f"Bug ID {vid} not found.")
+
+
+def fixed_commit(commit):
+    """
+    Returns the commit to untangle: the cleaned fixed commit when non-code changes
+    are removed, the original fixed commit otherwise.
+    """
+    if remove_non_code_changes():
+        return command_output(["git", "rev-parse", "HEAD~1"], cwd=commit.repository)
+    return revision_ids(commit.project, commit.vid)[1]
+
+
+def smartcommit_results_dir(commit):
+    """
+    Returns the directory where SmartCommit writes the results of the commit.
+    """
+    return os.path.join(
+        commit.decomposition_dir, "smartcommit", commit.name, fixed_commit(commit)
+    )
+
+
+def inverted_patch(commit):
+    """
+    Returns the Defects4J minimal bug-inducing patch of the commit.
+    """
+    return os.path.join(
+        os.environ["DEFECTS4J_HOME"],
+        "framework",
+        "projects",
+        commit.project,
+        "patches",
+        f"{commit.vid}.src.patch",
+    )
+
+
+def flexeme_version():
+    """
+    Returns the version of the installed Flexeme package, or None if it is not
+    installed in this Python environment.
+    """
+    try:
+        return importlib.metadata.version("flexeme")
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+def remove(path):
+    """
+    Removes a stale file or directory tree, if it exists.
+    """
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def generate_artifacts(commit):
+    """
+    Checks out the bug and generates the VC, NBF, and BF diffs and their cleaned versions.
+    """
+    # The checkout is modified when non-code changes are removed, so it is not reused.
+    remove(commit.repository)
+    os.makedirs(commit.repository)
+    run_command(
+        [
+            "defects4j",
+            "checkout",
+            "-p",
+            commit.project,
+            "-v",
+            f"{commit.vid}b",
+            "-w",
+            commit.repository,
+        ]
+    )
+
+    if remove_non_code_changes():
+        print("Untangling on code changes only")
+        run_command(
+            [
+                os.path.join(BASH_DIR, "clean-defects4j-repo.sh"),
+                commit.project,
+                commit.vid,
+            ],
+            cwd=commit.repository,
+        )
+        revision_buggy, revision_fixed, revision_original = (
+            command_output(["git", "rev-parse", revision], cwd=commit.repository)
+            for revision in ["HEAD", "HEAD~1", "HEAD~2"]
+        )
+    else:
+        print("Untangling on the original changes")
+        revision_original, revision_fixed = revision_ids(commit.project, commit.vid)
+        revision_buggy = command_output(
+            ["git", "rev-parse", "HEAD"], cwd=commit.repository
+        )
+
+    if not os.path.isfile(inverted_patch(commit)):
+        raise ValueError(
+            f"Bad project or bug id; file does not exist: {inverted_patch(commit)}"
+        )
+
+    # The diffs, their cleaned versions, and the ParsedPatch of each diff for the
+    # metrics and the ground truth.
+    d4j_diffs.generate_diffs(
+        commit.project,
+        commit.vid,
+        commit.repository,
+        commit.diff_dir,
+        revision_original,
+        revision_buggy,
+        revision_fixed,
+    )
+    print("Generating diff and code artifacts ................................... OK")
+
+
+def compute_metrics(commit):
+    """
+    Returns the CSV row of the metrics of the commit, and stores it in the metrics directory.
+    """
+    row = diff_metrics.commit_metrics(commit.project, commit.vid, commit.repository)
+    os.makedirs(os.path.dirname(commit.metrics_file), exist_ok=True)
+    with open(commit.metrics_file, "w") as file:
+        file.write(row + "\n")
+    print("Calculating metrics .................................................. OK")
+    return row
+
+
+def generate_ground_truth(commit):
+    """
+    Writes the ground truth of the commit to truth.csv and its summary to
+    truth_summary.csv (see ground_truth_index.py).
+    """
+    os.makedirs(commit.evaluation_dir, exist_ok=True)
+    ground_truth_df = ground_truth.classify_repository_diffs(commit.repository)
+    ground_truth_df.to_csv(
+        os.path.join(commit.evaluation_dir, "truth.csv"), index=False
+    )
+    ground_truth_index.write_summary(
+        ground_truth_df,
+        commit.project,
+        commit.vid,
+        os.path.join(commit.evaluation_dir, ground_truth_index.SUMMARY_FILE),
+    )
+    print("Calculating ground truth ............................................. OK")
+
+
+def untangle_with_smartcommit(commit):
+    """
+    Untangles the commit with SmartCommit and records the time taken in time.csv.
+    """
+    smartcommit_dir = os.path.join(commit.decomposition_dir, "smartcommit")
+    results_dir = smartcommit_results_dir(commit)
+    remove(results_dir)
+
+    os.makedirs(smartcommit_dir, exist_ok=True)
+    start = time.time()
+    run_command(
+        [
+            os.path.join(os.environ["JAVA11_HOME"], "bin", "java"),
+            "-jar",
+            SMARTCOMMIT_JAR,
+            "-r",
+            commit.repository,
+            "-c",
+            fixed_commit(commit),
+            "-o",
+            smartcommit_dir,
+        ]
+    )
+    elapsed = time.time() - start
+    with open(os.path.join(results_dir, "time.csv"), "w") as file:
+        file.write(f"{commit.project},{commit.vid},smartcommit,{elapsed}\n")
+    print("Untangling with SmartCommit .......................................... OK")
+
+
+def untangle_with_flexeme(commit):
+    """
+    Untangles the commit with Flexeme and records the time taken in time.csv.
+    """
+    graph_file = os.path.join(commit.flexeme_dir, "flexeme.dot")
+    remove(graph_file)
+
+    def export(prop):
+        return command_output(
+            ["defects4j", "export", "-p", prop, "-w", commit.repository]
+        )
+
+    sourcepath = f"{export('dir.src.classes')}:{export('dir.src.tests')}"
+    classpath = f"{export('cp.compile')}:{export('cp.test')}"
+
+    os.makedirs(commit.flexeme_dir, exist_ok=True)
+    start = time.time()
+    run_command(
+        [
+            os.path.join(BASH_DIR, "untangle_flexeme.sh"),
+            commit.repository,
+            fixed_commit(commit),
+            sourcepath,
+            classpath,
+            graph_file,
+        ],
+        # Make Flexeme deterministic.
+        env={**os.environ, "PYTHONHASHSEED": "0"},
+    )
+    elapsed = time.time() - start
+    with open(os.path.join(commit.flexeme_dir, "time.csv"), "w") as file:
+        file.write(f"{commit.project},{commit.vid},flexeme,{elapsed}\n")
+    print("Untangling with Flexeme .............................................. OK")
+
+
+def parse_smartcommit_results(commit):
+    """
+    Translates the SmartCommit results to smartcommit.csv.
+    """
+    os.makedirs(commit.evaluation_dir, exist_ok=True)
+    smartcommit_results_to_csv.convert_results(
+        smartcommit_results_dir(commit),
+        os.path.join(commit.evaluation_dir, "smartcommit.csv"),
+    )
+    print("Parsing SmartCommit results .......................................... OK")
+
+
+def parse_flexeme_results(commit):
+    """
+    Translates the Flexeme results to flexeme.csv.
+    """
+    result_out = os.path.join(commit.evaluation_dir, "flexeme.csv")
+    # No CSV file is written if the PDG has no changed nodes.
+    remove(result_out)
+    os.makedirs(commit.evaluation_dir, exist_ok=True)
+    flexeme_results_to_csv.convert_results(
+        os.path.join(commit.flexeme_dir, "flexeme.dot"), result_out
+    )
+    print("Parsing Flexeme results .............................................. OK")
+
+
+def untangle_by_file(commit):
+    """
+    Untangles the commit with the file-based approach.
+    """
+    filename_untangling.main(
+        os.path.join(commit.evaluation_dir, "truth.csv"),
+        os.path.join(commit.evaluation_dir, "file_untangling.csv"),
+    )
+    print("Untangling with file-based approach .................................. OK")
+
+
+def score(commit):
+    """
+    Returns the CSV row of the untangling scores of the commit, and stores it in scores.csv.
+    """
+    tool_scores = untangling_score.score_commit(commit.evaluation_dir)
+    row = untangling_score.format_scores(commit.project, commit.vid, tool_scores)
+    with open(os.path.join(commit.evaluation_dir, "scores.csv"), "w") as file:
+        file.write(row + "\n")
+    return row
+
+
+def diff_dir_files(names, commit):
+    """
+    Returns the paths of the given files in the diff directory of a commit.
+    """
+    return [os.path.join(commit.diff_dir, name) for name in names]
+
+
+def evaluation_dir_files(names, commit):
+    """
+    Returns the paths of the given files in the evaluation directory of a commit.
+    """
+    return [os.path.join(commit.evaluation_dir, name) for name in names]
+
+
+def store_lines(store_dir, commit):
+    """
+    Writes the ground truth and the untangling results of the commit to the
+    evaluation store in store_dir.
+    """
+    evaluation_store.write_commit_csv(store_dir, "d4j", commit.evaluation_dir)
+    print("Storing the changed lines ............................................ OK")
+
+
+def stored_files(store_dir, commit):
+    """
+    Returns the files of the commit in the evaluation store in store_dir.
+    """
+    return [
+        evaluation_store.commit_file(
+            store_dir, "d4j", treatment, commit.project, commit.vid
+        )
+        for treatment in evaluation_store.TREATMENTS
+    ]
+
+
+def store_params(store_dir, commit):
+    """
+    Returns the parameters of the storage of the lines of a commit.
+    """
+    return {"store": os.path.abspath(store_dir)}
+
+
+def store_stage(store_dir):
+    """
+    Returns the stage writing the lines of each commit to the evaluation store in
+    store_dir, after the other stages wrote them to CSV files.
+    """
+    return Stage(
+        "store",
+        partial(store_lines, store_dir),
+        "score",
+        requires=["ground_truth"],
+        after=["smartcommit_csv", "flexeme_csv", "file_untangling"],
+        inputs=in_evaluation_dir(
+            *(f"{treatment}.csv" for treatment in evaluation_store.TREATMENTS)
+        ),
+        params=partial(store_params, store_dir),
+        scripts=scripts(evaluation_store),
+        outputs=partial(stored_files, store_dir),
+    )
+
+
+def in_diff_dir(*names):
+    """
+    Returns a function returning the paths of the given files in the diff directory of a commit.
+    Unlike a lambda, the function can be sent to the worker processes.
+    """
+    return partial(diff_dir_files, names)
+
+
+def in_evaluation_dir(*names):
+    """
+    Returns a function returning the paths of the given files in the evaluation directory of a commit.
+    """
+    return partial(evaluation_dir_files, names)
+
+
+def scripts(*modules):
+    """
+    Returns the source files of the given modules.
+    """
+    return [module.__file__ for module in modules]
+
+
+def artifacts_inputs(commit):
+    """
+    Returns the files read to generate the artifacts of a commit.
+    """
+    return [inverted_patch(commit)]
+
+
+def artifacts_params(commit):
+    """
+    Returns the parameters of the generation of the artifacts of a commit.
+    """
+    return {"remove_non_code_changes": remove_non_code_changes()}
+
+
+def metrics_outputs(commit):
+    """
+    Returns the files written by the metrics of a commit.
+    """
+    return [commit.metrics_file]
+
+
+def smartcommit_inputs(commit):
+    """
+    Returns the files read by SmartCommit for a commit.
+    """
+    return diff_dir_files(DIFFS, commit) + [SMARTCOMMIT_JAR]
+
+
+def flexeme_graph(commit):
+    """
+    Returns the graph written by Flexeme for a commit.
+    """
+    return flexeme_outputs(commit)[:1]
+
+
+def untangling_params(commit):
+    """
+    Returns the parameters of the untangling of a commit: which changes are untangled,
+    and the untangled commit.
+    """
+    return {
+        "remove_non_code_changes": remove_non_code_changes(),
+        "commit": fixed_commit(commit),
+    }
+
+
+def smartcommit_outputs(commit):
+    """
+    Returns the files written by SmartCommit for a commit.
+    """
+    return [smartcommit_results_dir(commit)]
+
+
+def flexeme_outputs(commit):
+    """
+    Returns the files written by Flexeme for a commit.
+    """
+    return [
+        os.path.join(commit.flexeme_dir, "flexeme.dot"),
+        os.path.join(commit.flexeme_dir, "time.csv"),
+    ]
+
+
+def flexeme_params(commit):
+    """
+    Returns the parameters of the untangling of a commit with Flexeme.
+    """
+    return {**untangling_params(commit), "flexeme": flexeme_version()}
+
+
+DIFFS = d4j_diffs.DIFFS
+CLEAN_DIFFS = d4j_diffs.CLEAN_DIFFS
+TRUTH_DIFFS = ["VC_clean.diff", "BF.diff", "NBF.diff"]
+PARSED_DIFFS = [parsed_patch.parsed_file_name(diff) for diff in DIFFS + CLEAN_DIFFS]
+
+# Each stage is cached on the content of the files it reads and on the source of
+# the scripts implementing it. Most stages are cached on the Python files of this
+# package, since they call the Python scripts directly.
+STAGES = [
+    Stage(
+        "artifacts",
+        generate_artifacts,
+        "artifacts",
+        inputs=artifacts_inputs,
+        params=artifacts_params,
+        scripts=[
+            os.path.join(BASH_DIR, "d4j_utils.sh"),
+            os.path.join(BASH_DIR, "clean-defects4j-repo.sh"),
+            os.path.join(BASH_DIR, "clean-java-directory.sh"),
+            clean_artifacts.__file__,
+            d4j_diffs.__file__,
+            parsed_patch.__file__,
+            unified_diff.__file__,
+        ],
+        outputs=in_diff_dir(*DIFFS, *CLEAN_DIFFS, *PARSED_DIFFS),
+    ),
+    Stage(
+        "metrics",
+        compute_metrics,
+        "metrics",
+        requires=["artifacts"],
+        inputs=in_diff_dir(*CLEAN_DIFFS),
+        scripts=scripts(diff_metrics, parsed_patch, unified_diff),
+        outputs=metrics_outputs,
+    ),
+    Stage(
+        "ground_truth",
+        generate_ground_truth,
+        "ground_truth",
+        requires=["artifacts"],
+        inputs=in_diff_dir(*TRUTH_DIFFS),
+        scripts=scripts(ground_truth, parsed_patch, unified_diff, ground_truth_index),
+        outputs=in_evaluation_dir("truth.csv", ground_truth_index.SUMMARY_FILE),
+    ),
+    # The untangled commit is in the repository generated with the diffs.
+    Stage(
+        "smartcommit",
+        untangle_with_smartcommit,
+        "decompose",
+        requires=["artifacts"],
+        inputs=smartcommit_inputs,
+        params=untangling_params,
+        outputs=smartcommit_outputs,
+    ),
+    Stage(
+        "flexeme",
+        untangle_with_flexeme,
+        "decompose",
+        requires=["artifacts"],
+        inputs=in_diff_dir(*DIFFS),
+        params=flexeme_params,
+        scripts=[os.path.join(BASH_DIR, "untangle_flexeme.sh")],
+        outputs=flexeme_outputs,
+    ),
+    Stage(
+        "smartcommit_csv",
+        parse_smartcommit_results,
+        "decompose",
+        requires=["smartcommit"],
+        inputs=smartcommit_outputs,
+        scripts=scripts(
+            smartcommit_results_to_csv, patch_to_csv, unified_diff, parse_utils
+        ),
+        outputs=in_evaluation_dir("smartcommit.csv"),
+    ),
+    Stage(
+        "flexeme_csv",
+        parse_flexeme_results,
+        "decompose",
+        requires=["flexeme"],
+        inputs=flexeme_graph,
+        scripts=scripts(flexeme_results_to_csv, parse_utils),
+        outputs=in_evaluation_dir("flexeme.csv"),
+    ),
+    Stage(
+        "file_untangling",
+        untangle_by_file,
+        "score",
+        requires=["ground_truth"],
+        inputs=in_evaluation_dir("truth.csv"),
+        scripts=scripts(filename_untangling),
+        outputs=in_evaluation_dir("file_untangling.csv"),
+    ),
+    # A tool without results scores as if it put all the changes in one group.
+    Stage(
+        "score",
+        score,
+        "score",
+        requires=["ground_truth", "file_untangling"],
+        after=["smartcommit_csv", "flexeme_csv"],
+        inputs=in_evaluation_dir("truth.csv", *untangling_score.TOOL_CSV),
+        scripts=scripts(untangling_score),
+        outputs=in_evaluation_dir("scores.csv"),
+    ),
+]
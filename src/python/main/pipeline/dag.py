@@ -0,0 +1,213 @@
+"""
+Runs the stages of the pipeline as a DAG, one commit at a time per worker process.
+
+A stage is skipped when one of the stages it requires did not succeed, so a
+failing commit does not stop the other commits. The output of each stage is
+written to the log file of the stage in the logs directory.
+
+Stages that declare their inputs are cached in the manifest of the commit (see
+cache.py) and only run again when their inputs, parameters, or scripts change.
+"""
+
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stderr, redirect_stdout
+from functools import partial
+
+from .cache import Manifest, stage_key
+
+OK = "OK"
+CACHED = "CACHED"
+FAIL = "FAIL"
+SKIP = "SKIP"
+
+
+class Stage:
+    """
+    A step of the pipeline for one commit.
+
+    Attributes:
+        name: The name of the stage, used by other stages to depend on it.
+        run: The function running the stage. It is called with the commit and its
+            return value is the result of the stage.
+        log: The name of the log file of the stage, <commit name>_<log>.log.
+            Stages can share a log file.
+        requires: The stages that must succeed before this stage runs.
+        after: The stages that must run before this stage, whether they succeed or not.
+        inputs: Function returning the files and directories the stage reads for a
+            commit, or None if the stage is not cached.
+        params: Function returning a JSON-serializable dict of the other values the
+            stage depends on for a commit (e.g., flags, tool versions).
+        scripts: The source files implementing the stage.
+        outputs: Function returning the files and directories the stage writes for a commit.
+            The result of the stage must be JSON-serializable if the stage is cached.
+    """
+
+    def __init__(
+        self,
+        name,
+        run,
+        log,
+        requires=(),
+        after=(),
+        inputs=None,
+        params=None,
+        scripts=(),
+        outputs=None,
+    ):
+        self.name = name
+        self.run = run
+        self.log = log
+        self.requires = list(requires)
+        self.after = list(after)
+        self.inputs = inputs
+        self.params = params
+        self.scripts = list(scripts)
+        self.outputs = outputs
+
+    def is_cached(self):
+        """
+        Returns whether the runs of the stage are cached.
+        """
+        return self.inputs is not None
+
+
+def topological_order(stages):
+    """
+    Returns the stages sorted such that each stage comes after its dependencies.
+    Independent stages keep their order in the list.
+
+    Raises:
+        ValueError: If a stage depends on an unknown stage or if the dependencies have a cycle.
+    """
+    names = {stage.name for stage in stages}
+    for stage in stages:
+        for dependency in stage.requires + stage.after:
+            if dependency not in names:
+                raise ValueError(
+                    f"Stage {stage.name} depends on unknown stage {dependency}"
+                )
+
+    ordered = []
+    done = set()
+    remaining = list(stages)
+    while remaining:
+        ready = [
+            stage
+            for stage in remaining
+            if all(dependency in done for dependency in stage.requires + stage.after)
+        ]
+        if not ready:
+            cycle = ", ".join(stage.name for stage in remaining)
+            raise ValueError(f"Stages have cyclic dependencies: {cycle}")
+        ordered.extend(ready)
+        done.update(stage.name for stage in ready)
+        remaining = [stage for stage in remaining if stage.name not in done]
+    return ordered
+
+
+def run_stage(stage, commit, manifest, verify):
+    """
+    Runs one stage, unless its cache entry is up to date.
+
+    Returns:
+        The (status, result) pair of the stage.
+    """
+    if manifest is None or not stage.is_cached():
+        return OK, stage.run(commit)
+
+    params = stage.params(commit) if stage.params is not None else {}
+    key = stage_key(stage.name, stage.inputs(commit), params, stage.scripts)
+    entry = manifest.lookup(stage.name, key, verify)
+    if entry is not None:
+        print(
+            f"{stage.name} {key[:12]} .......................................... CACHED"
+        )
+        return CACHED, entry["result"]
+
+    manifest.invalidate(stage.name)
+    result = stage.run(commit)
+    outputs = stage.outputs(commit) if stage.outputs is not None else []
+    manifest.record(stage.name, key, outputs, result)
+    return OK, result
+
+
+def run_stages(stages, logs_dir, commit, manifest_dir=None, verify=False):
+    """
+    Runs the stages of one commit in topological order.
+
+    Args:
+        stages: The stages to run.
+        logs_dir: The directory of the log files.
+        commit: The commit passed to each stage. Its `name` attribute prefixes the log files.
+        manifest_dir: The directory of the manifests, <commit name>.json. If None, no stage is cached.
+        verify: Whether to compare the content of the cached outputs instead of their size.
+    Returns:
+        A dict mapping the name of each stage to its (status, elapsed seconds, result) tuple.
+        The result is None unless the status is OK or CACHED.
+    """
+    manifest = None
+    if manifest_dir is not None:
+        manifest = Manifest(os.path.join(manifest_dir, f"{commit.name}.json"))
+
+    outcomes = {}
+    logs = {}
+    try:
+        for stage in topological_order(stages):
+            if any(
+                outcomes[dependency][0] not in (OK, CACHED)
+                for dependency in stage.requires
+            ):
+                outcomes[stage.name] = (SKIP, 0.0, None)
+                continue
+
+            if stage.log not in logs:
+                log_file = os.path.join(logs_dir, f"{commit.name}_{stage.log}.log")
+                logs[stage.log] = open(log_file, "w")
+            log = logs[stage.log]
+
+            start = time.perf_counter()
+            with redirect_stdout(log), redirect_stderr(log):
+                try:
+                    status, result = run_stage(stage, commit, manifest, verify)
+                except (Exception, SystemExit):
+                    # A stage calling sys.exit fails, like a stage raising an exception.
+                    traceback.print_exc()
+                    result = None
+                    status = FAIL
+                log.flush()
+            outcomes[stage.name] = (status, time.perf_counter() - start, result)
+    finally:
+        for log in logs.values():
+            log.close()
+    return outcomes
+
+
+def run_commits(stages, logs_dir, commits, workers=1, manifest_dir=None, verify=False):
+    """
+    Runs the stages of each commit. Each worker process runs all the stages of one
+    commit before moving on to the next commit.
+
+    Args:
+        stages: The stages to run.
+        logs_dir: The directory of the log files.
+        commits: The commits to process.
+        workers: The number of worker processes. With 1 worker, the commits are processed in the current process.
+        manifest_dir: The directory of the manifests. If None, no stage is cached.
+        verify: Whether to compare the content of the cached outputs instead of their size.
+    Returns:
+        An iterator of the outcomes of each commit (see run_stages), in the order of commits.
+    """
+    os.makedirs(logs_dir, exist_ok=True)
+    # Fail before starting any worker if the DAG is invalid.
+    topological_order(stages)
+    run = partial(
+        run_stages, stages, logs_dir, manifest_dir=manifest_dir, verify=verify
+    )
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(run, commits)
+    else:
+        yield from map(run, commits)
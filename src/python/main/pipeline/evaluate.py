@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+"""
+Runs the whole evaluation pipeline (artifacts, metrics, ground truth, decomposition,
+and scores) on a list of Defects4J bugs, in long-lived worker processes.
+
+This replaces running generate_artifacts.sh, compute_metrics.sh, generate_ground_truth.sh,
+decompose.sh, and score.sh in sequence: each worker runs all the stages of one bug,
+calling the Python stages directly instead of starting a shell and a Python
+interpreter per stage and bug.
+
+Command Line Args:
+    - bugs_file: CSV file without header listing the project and the bug id of each bug.
+    - out_dir: Directory where the results are stored and repositories checked out.
+    - workers: Optional number of worker processes. Defaults to the number of CPUs.
+    - verify: Compare the content of the cached outputs to the manifests instead of their size.
+    - store: Optional evaluation store (see evaluation_store.py) where the ground truth
+      and the untangling results of each bug are also written, as dataset d4j.
+Writes:
+    The same files as the shell scripts, in particular:
+    - <out_dir>/metrics.csv: The metrics of each bug, with a CSV header.
+    - <out_dir>/decomposition_scores.csv: The scores of each scored bug, without a CSV header.
+    - <out_dir>/truth_index.csv: The summary of the ground truth of each bug
+      (see ground_truth_index.py).
+    - <out_dir>/logs/<project>_<bug_id>_<stage>.log: The logs of each stage.
+    - <out_dir>/manifests/<project>_<bug_id>.json: The cache entries of each stage.
+      A stage only runs again if its inputs, parameters, or scripts changed since
+      its last successful run, or if its outputs changed.
+"""
+
+import argparse
+import os
+import sys
+
+from .. import ground_truth_index
+from ..batch_untangling_score import read_commits
+from .batch_metrics import write_metrics
+from .d4j_stages import STAGES, D4jCommit, store_stage
+from .dag import CACHED, OK, run_commits
+
+
+def main(bugs_file, out_dir, workers, verify=False, store_dir=None):
+    """
+    Implement the logic of the script. See the module docstring.
+    """
+    stages = STAGES + [store_stage(store_dir)] if store_dir else STAGES
+    commits = [
+        D4jCommit(project, vid, out_dir) for project, vid in read_commits(bugs_file)
+    ]
+    logs_dir = os.path.join(out_dir, "logs")
+    manifest_dir = os.path.join(out_dir, "manifests")
+    print(
+        f"{sys.argv[0]}: logs will be stored in {logs_dir}/<project>_<bug_id>_<stage>.log"
+    )
+
+    metrics = []
+    scores = []
+    for commit, outcomes in zip(
+        commits, run_commits(stages, logs_dir, commits, workers, manifest_dir, verify)
+    ):
+        succeeded = {
+            name for name, (status, _, _) in outcomes.items() if status in (OK, CACHED)
+        }
+        failed = [name for name in outcomes if name not in succeeded]
+        elapsed = sum(seconds for _, seconds, _ in outcomes.values())
+        status = f"FAIL ({', '.join(failed)})" if failed else "OK"
+        print(f"{commit.name:<20} {status} {elapsed:.0f}s")
+
+        if "metrics" in succeeded:
+            metrics.append(outcomes["metrics"][2])
+        if "score" in succeeded:
+            scores.append(outcomes["score"][2])
+
+    metrics_results = os.path.join(out_dir, "metrics.csv")
+    write_metrics(metrics_results, metrics)
+    print(f"Commit metrics were aggregated and saved in {metrics_results}")
+
+    ground_truth_index.write_index(out_dir)
+    print(
+        "Ground truth summaries were indexed in "
+        f"{os.path.join(out_dir, ground_truth_index.INDEX_FILE)}"
+    )
+
+    scores_results = os.path.join(out_dir, "decomposition_scores.csv")
+    with open(scores_results, "w") as file:
+        file.writelines(row + "\n" for row in scores)
+    print(f"Scored {len(scores)} of {len(commits)} commits")
+    if not scores:
+        sys.exit(1)
+    print(f"Decomposition scores were aggregated and saved in {scores_results}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog=sys.argv[0],
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+
+    parser.add_argument(
+        "bugs_file",
+        help="CSV file without header listing the project and the bug id of each bug",
+        metavar="BUGS_FILE",
+    )
+
+    parser.add_argument(
+        "out_dir",
+        help="Directory where the results are stored and repositories checked out",
+        metavar="OUT_DIR",
+    )
+
+    parser.add_argument(
+        "--workers",
+        "-w",
+        help="Number of worker processes",
+        type=int,
+        default=os.cpu_count(),
+        metavar="WORKERS",
+    )
+
+    parser.add_argument(
+        "--verify",
+        help="Compare the content of the cached outputs instead of their size",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--store",
+        help="Evaluation store where the changed lines of each bug are also written",
+        metavar="STORE_DIR",
+    )
+
+    args = parser.parse_args()
+    main(args.bugs_file, args.out_dir, args.workers, args.verify, args.store)
@@ -20,13 +20,16 @@ import glob
 import json
 import os
 import sys
-from io import StringIO
+from array import array
 
+import numpy as np
 import pandas as pd
-from unidiff import PatchSet
+from unidiff.constants import LINE_TYPE_CONTEXT
+from unidiff.errors import UnidiffParseError
 
-from parse_utils import export_tool_decomposition_as_csv
-from patch_to_csv import to_csv
+from . import unified_diff
+from .parse_utils import export_tool_decomposition_as_csv
+from .patch_to_csv import iter_changed_lines
 
 
 def list_json_files(dir):
@@ -51,70 +54,137 @@ def main():
     result_dir = args[0]
     output_file = args[1]
 
+    try:
+        convert_results(result_dir, output_file)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+
+def convert_results(result_dir, output_file):
+    """
+    Translates the SmartCommit results in result_dir to the line level and writes them to output_file.
+
+    Raises:
+        ValueError: If no changed line belongs to a group.
+    """
     diff_dir = os.path.join(result_dir, "diffs")
     groups_dir = os.path.join(result_dir, "generated_groups")
 
-    diff_data = read_results(diff_dir)
-    result = generate_csv(diff_data, groups_dir)
+    hunk_lines = read_results(diff_dir, read_grouped_hunks(groups_dir))
+    result = generate_csv(hunk_lines, groups_dir)
+
+    export_tool_decomposition_as_csv(result, output_file)
+
 
-    export_csv(output_file, result)
+def read_grouped_hunks(groups_dir):
+    """
+    Returns the ids of the hunks that belong to at least one group, i.e., "<file id>:<hunk id>".
+
+    Args:
+        groups_dir: The path to the directory containing the JSON files with the groups.
+    """
+    grouped_hunks = set()
+    for group_file in list_json_files(groups_dir):
+        with open(group_file, "r") as group_file_io:
+            grouped_hunks.update(json.load(group_file_io)["diffHunkIDs"])
+    return grouped_hunks
 
 
-def read_results(diff_dir):
+def read_results(diff_dir, grouped_hunks=None):
     """
     Read the decomposition results from disk. Each JSON file in the diff directory contains the
-    diff data for a single file. We retrieve the hunk id, hunk header, raw diff, start line, and
-    end line for each hunk in the file. The file is indexed by its file id defined in the JSON.
+    diff data for a single file. The hunks of a file are parsed once, and the changed lines of
+    each hunk are indexed by the hunk id used in the groups, i.e., "<file id>:<hunk id>".
 
     Args:
         diff_dir: The path to the directory containing the JSON files with the diffs.
+        grouped_hunks: If given, only these hunks are parsed (see read_grouped_hunks). The
+            hunks that belong to no group are not part of the decomposition.
 
     Returns:
-        A dictionary mapping file ids to dictionaries mapping hunk ids to tuples containing the
-        hunk header, start line, end line, and raw diff.
+        A dictionary mapping hunk ids to the changed lines of the hunk, as (file, source, target)
+        tuples.
     """
-    diff_data = {}
+    hunk_lines = {}
     # Load diffs
     for diff_file in list_json_files(diff_dir):
         with open(diff_file, "r") as diff_file_io:
             data = json.load(diff_file_io)
-            classpath = data["currentRelativePath"]
             file_id = data["fileID"]
 
-            hunks = {}
-            diff_data[file_id] = hunks
-
-            hunks["rawHeaders"] = data["rawHeaders"]
-
-            # Save data for each hunk
-            for hunk_data in data["diffHunksMap"].values():
-                hunk_id = hunk_data["diffHunkID"]
-                start_line = hunk_data["currentHunk"]["startLine"]
-                end_line = hunk_data["currentHunk"]["endLine"]
-
-                hunks[hunk_id] = (
-                    classpath,
-                    start_line,
-                    end_line,
-                    hunk_data["rawDiffs"],
-                )
-    return diff_data
+            raw_hunks = {
+                hunk_data["diffHunkID"]: hunk_data["rawDiffs"]
+                for hunk_data in data["diffHunksMap"].values()
+                if grouped_hunks is None
+                or f"{file_id}:{hunk_data['diffHunkID']}" in grouped_hunks
+            }
+            if not raw_hunks:
+                continue
+            for hunk_id, lines in index_changed_lines(
+                data["rawHeaders"], raw_hunks
+            ).items():
+                hunk_lines[f"{file_id}:{hunk_id}"] = lines
+    return hunk_lines
+
+
+def index_changed_lines(raw_headers, raw_hunks):
+    """
+    Returns the changed lines of each hunk of a file. All hunks are parsed in a single
+    patch when they can be told apart in it, and one by one otherwise.
 
+    Args:
+        raw_headers: The header lines of the diff of the file.
+        raw_hunks: A dictionary mapping hunk ids to the lines of the hunk, header included.
 
-def generate_csv(diff_data, groups_dir):
+    Returns:
+        A dictionary mapping hunk ids to the changed lines of the hunk, as (file, source, target)
+        tuples.
+    """
+    # An empty last line would become a line of its own between two hunks.
+    if all(raw_hunk and raw_hunk[-1] for raw_hunk in raw_hunks.values()):
+        try:
+            patch = make_patch(
+                raw_headers,
+                [line for raw_hunk in raw_hunks.values() for line in raw_hunk],
+            )
+        except UnidiffParseError:
+            patch = None
+        if patch is not None and len(patch) == 1 and len(patch[0]) == len(raw_hunks):
+            path = patch[0].path
+            return {
+                hunk_id: [
+                    (path, line.source_line_no, line.target_line_no)
+                    for line in hunk
+                    if line.line_type != LINE_TYPE_CONTEXT
+                ]
+                for hunk_id, hunk in zip(raw_hunks, patch[0])
+            }
+
+    return {
+        hunk_id: list(iter_changed_lines(make_patch(raw_headers, raw_hunk)))
+        for hunk_id, raw_hunk in raw_hunks.items()
+    }
+
+
+def generate_csv(hunk_lines, groups_dir) -> pd.DataFrame:
     """
-    Generate the CSV file from the diff data and the groups.
+    Generate the line-level decomposition from the diff data and the groups.
 
     Args:
-        diff_data: The diff data loaded from the JSON files.
+        hunk_lines: The changed lines of each hunk, as returned by read_results.
         groups_dir: The path to the directory containing the JSON files with the groups.
 
     Returns:
-        A string containing the group data in CSV format.
+        A DataFrame with the columns file, source, target, and group.
     """
-    result = ""
+    files = []
+    # Missing line numbers are stored as 0, which is never a valid line number.
+    sources = array("i")
+    targets = array("i")
+    groups = []
 
-    # Print CSV for each group
+    # Collect the lines for each group
     for group_file in list_json_files(groups_dir):
         with open(group_file, "r") as group_file_io:
             data = json.load(group_file_io)
@@ -123,46 +193,42 @@ def generate_csv(diff_data, groups_dir):
             group_id = data["groupID"]
 
             for hunk in hunks:
-                patch = make_patch(diff_data, hunk)
-
                 # Break down the group for a hunk into its individual lines.
-                for line in to_csv(patch):
-                    result += f"{line},{group_id}\n"
-    return result
+                lines = hunk_lines[hunk]
+                for file, source, target in lines:
+                    files.append(file)
+                    sources.append(source or 0)
+                    targets.append(target or 0)
+                groups.extend([group_id] * len(lines))
+
+    sources = np.frombuffer(sources, dtype=np.int32)
+    targets = np.frombuffer(targets, dtype=np.int32)
+    return pd.DataFrame(
+        {
+            "file": files,
+            "source": pd.arrays.IntegerArray(sources.copy(), sources == 0),
+            "target": pd.arrays.IntegerArray(targets.copy(), targets == 0),
+            "group": groups,
+        },
+        columns=["file", "source", "target", "group"],
+    )
 
 
-def make_patch(diff_data, hunk) -> PatchSet:
+def make_patch(raw_headers, raw_diff) -> unified_diff.Patch:
     """
-    Make a patch from the diff data and the hunk id.
+    Make a patch from the header and the diff lines of a file.
 
     Args:
-        diff_data: The diff data loaded from the JSON files.
-        hunk: The hunk id of the hunk to make a patch from.
+        raw_headers: The header lines of the diff of the file.
+        raw_diff: The lines of the hunks to include in the patch.
 
     Returns:
-        A PatchSet object containing the patch for the hunk.
+        A unified_diff.Patch containing the patch for the hunks.
     """
-    file_id, hunk_id = hunk.split(":")
-    classpath, start_line, end_line, raw_diff = diff_data[file_id][hunk_id]
-    header_str = "\n".join(diff_data[file_id]["rawHeaders"])
+    header_str = "\n".join(raw_headers)
     diff_str = "\n".join(raw_diff)
 
-    return PatchSet.from_string(header_str + "\n" + diff_str)
-
-
-def export_csv(output_file, result):
-    """
-    Export the results to a CSV file.
-
-    Args:
-        output_file: The path to the CSV file to be created.
-        result: The string containing the results to be written to the CSV file.
-    """
-    df = pd.read_csv(
-        StringIO(result), names=["file", "source", "target", "group"], na_values="None"
-    )
-    df = df.convert_dtypes()  # Forces pandas to use ints in source and target columns.
-    export_tool_decomposition_as_csv(df, output_file)
+    return unified_diff.from_string(header_str + "\n" + diff_str)
 
 
 if __name__ == "__main__":
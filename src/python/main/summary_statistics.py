@@ -17,10 +17,9 @@ Returns:
 import sys
 from os import path
 
-from unidiff import PatchSet
 from unidiff.constants import LINE_TYPE_CONTEXT
 
-import diff_metrics
+from . import diff_metrics, unified_diff
 
 
 def count_lines_with_whitespace(patch):
@@ -66,9 +65,7 @@ def main():
         diff_sets = clean_diffs
     sizes = [0] * len(diff_sets)
     for i, diff_file in enumerate(diff_sets):
-        patch = PatchSet.from_filename(
-            path.join(repository, "diff", diff_file), encoding="latin-1"
-        )
+        patch = unified_diff.from_filename(path.join(repository, "diff", diff_file))
         if version == "whitespace":
             sizes[i] = count_lines_with_whitespace(patch)
         else:
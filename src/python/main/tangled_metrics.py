@@ -15,17 +15,24 @@ from pandas.api.types import CategoricalDtype
 
 from . import metrics
 from . import evaluation_results
+from . import evaluation_store
 
 
-def main(metrics_file: str, results_dir: str):
+def main(metrics_file: str, results_dir: str, store_dir=None, dataset=None):
     """
-    Implements the script logic.
+    Implements the script logic. The ground truth is read from the evaluation store
+    if store_dir is given, and from the CSV files in results_dir otherwise.
     """
     df_metrics = evaluation_results.read_metrics(metrics_file)
 
     # Calculate tangled patch and tangled files metrics.
-    ground_truth_files = evaluation_results.retrieve_ground_truth_files(results_dir)
-    df_supplemental_metrics = calculate_tangled_metrics(ground_truth_files)
+    if store_dir:
+        df_supplemental_metrics = calculate_tangled_metrics_for_dataset(
+            evaluation_store.read_lines(store_dir, dataset, treatments="truth")
+        )
+    else:
+        ground_truth_files = evaluation_results.find_commit_files(results_dir)
+        df_supplemental_metrics = calculate_tangled_metrics(ground_truth_files)
 
     # Merge the new metrics with the new metrics.
     df_metrics = df_metrics.merge(
@@ -53,15 +60,21 @@ def calculate_tangled_metrics(ground_truth_files) -> pd.DataFrame:
     - Tangled file
     Returns a dataframe with the results for each commit.
     """
-    data = []
     for file in ground_truth_files:
         if not os.path.exists(file):
             raise FileNotFoundError(f"File {file} does not exist.")
 
-        commit_folder = os.path.basename(os.path.dirname(file))
-        project, commit_id = commit_folder.split("_")
+    truth_df = evaluation_results.read_commit_files(ground_truth_files)
+    commits = [evaluation_results.commit_of(file) for file in ground_truth_files]
+    return calculate_tangled_metrics_for_dataset(truth_df, commits)
+
 
-        truth_df = evaluation_results.read_ground_truth(file)
+def calculate_tangled_metrics_for_commits(ground_truths) -> pd.DataFrame:
+    """
+    Calculates the tangled metrics for the (project, commit_id, ground truth) triple of each commit.
+    """
+    data = []
+    for project, commit_id, truth_df in ground_truths:
         is_tangled_patch = metrics.is_tangled_patch(truth_df)
         tangled_files = metrics.count_tangled_file(truth_df)
 
@@ -75,6 +88,38 @@ def calculate_tangled_metrics(ground_truth_files) -> pd.DataFrame:
     return result_df
 
 
+def calculate_tangled_metrics_for_dataset(truth_df, commits=None) -> pd.DataFrame:
+    """
+    Calculates the tangled metrics of every commit in the concatenated ground truth of
+    a dataset, with the columns project, commit_id, file, and group, in two groupby
+    passes. Returns the same dataframe as calculate_tangled_metrics_for_commits.
+
+    Arguments:
+        truth_df: The ground truth of all the commits.
+        commits: Optional (project, commit_id) pairs of the commits to report, in order.
+            Defaults to the commits in truth_df. Commits without lines are not tangled.
+    """
+    truth_df = truth_df.astype({"project": str, "commit_id": str})
+    is_tangled_patch = metrics.is_tangled_patch_per_commit(truth_df)
+    tangled_files = metrics.count_tangled_file_per_commit(truth_df)
+
+    if commits is None:
+        index = is_tangled_patch.index
+    else:
+        index = pd.MultiIndex.from_tuples(
+            [(project, str(commit_id)) for project, commit_id in commits],
+            names=["project", "commit_id"],
+        )
+    result_df = pd.DataFrame(
+        {
+            "is_tangled_patch": is_tangled_patch.reindex(index, fill_value=False),
+            "tangled_files": tangled_files.reindex(index, fill_value=0),
+        }
+    ).reset_index()
+    result_df["commit_id"] = result_df["commit_id"].astype(str)
+    return result_df
+
+
 def calculate_tangled_levels(dataframe: pd.DataFrame) -> pd.DataFrame:
     """
     Calculate the tangled level of each commit (row) in the dataframe. The tangled level is the finest level of tangled
@@ -120,13 +165,26 @@ if __name__ == "__main__":
         metavar="METRIC_FILE",
     )
 
-    parser.add_argument(
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
         "--results-dir",
         "-r",
         help="Path to the directory containing the results for an experiment",
-        required=True,
         metavar="RESULTS_DIR",
     )
 
+    source.add_argument(
+        "--store",
+        "-s",
+        help="Path to the evaluation store containing the ground truth (see evaluation_store.py)",
+        metavar="STORE_DIR",
+    )
+
+    parser.add_argument(
+        "--dataset",
+        help="Dataset of the evaluation store to read. Defaults to all the datasets",
+        metavar="DATASET",
+    )
+
     args = parser.parse_args()
-    main(args.metrics_file, args.results_dir)
+    main(args.metrics_file, args.results_dir, args.store, args.dataset)
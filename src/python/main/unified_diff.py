@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+
+"""
+A minimal parser of unified diffs, faster than unidiff.PatchSet on large diffs.
+
+The parser follows the parsing rules of unidiff and returns the same structure:
+a Patch is a list of PatchedFiles, a PatchedFile is a list of Hunks, and a Hunk is
+a list of Lines. It only keeps what the scripts of this package read: the file
+names and their path, the hunk headers, and the type, line numbers, and value of
+each line. The git patch info, timestamps, and file modes are skipped. The records
+use __slots__ and the lines of a hunk are parsed without regular expressions.
+
+Diffs that unidiff cannot parse raise the same UnidiffParseError.
+
+Command Line Args:
+    diff_file: The diff to parse.
+Prints:
+    The number of files, hunks, added lines, and removed lines of the diff.
+"""
+
+import io
+import sys
+
+from unidiff.constants import (
+    DEV_NULL,
+    LINE_TYPE_ADDED,
+    LINE_TYPE_CONTEXT,
+    LINE_TYPE_EMPTY,
+    LINE_TYPE_NO_NEWLINE,
+    LINE_TYPE_REMOVED,
+    LINE_VALUE_NO_NEWLINE,
+    RE_BINARY_DIFF,
+    RE_DIFF_GIT_DELETED_FILE,
+    RE_DIFF_GIT_HEADER,
+    RE_DIFF_GIT_HEADER_NO_PREFIX,
+    RE_DIFF_GIT_HEADER_URI_LIKE,
+    RE_DIFF_GIT_INDEX,
+    RE_DIFF_GIT_NEW_FILE,
+    RE_DIFF_GIT_NEW_MODE,
+    RE_DIFF_GIT_OLD_MODE,
+    RE_HUNK_EMPTY_BODY_LINE,
+    RE_HUNK_HEADER,
+    RE_NO_NEWLINE_MARKER,
+    RE_PATCH_FILE_PREFIX,
+    RE_SOURCE_FILENAME,
+    RE_TARGET_FILENAME,
+)
+from unidiff.errors import UnidiffParseError
+
+# Version of the parser. Bump it whenever the parsing changes, so that the parsed
+# diffs stored by parsed_patch.py are parsed again.
+VERSION = 1
+BODY_LINE_TYPES = frozenset(
+    [LINE_TYPE_ADDED, LINE_TYPE_REMOVED, LINE_TYPE_CONTEXT, LINE_TYPE_NO_NEWLINE]
+)
+
+
+class Line:
+    """
+    A line of a hunk. Missing line numbers are None, like in unidiff.
+    """
+
+    __slots__ = ["line_type", "source_line_no", "target_line_no", "value"]
+
+    def __init__(self, line_type, source_line_no, target_line_no, value):
+        self.line_type = line_type
+        self.source_line_no = source_line_no
+        self.target_line_no = target_line_no
+        self.value = value
+
+    def __str__(self):
+        return self.line_type + self.value
+
+    def __repr__(self):
+        return f"<Line: {self}>"
+
+
+class Hunk(list):
+    """
+    The lines of a hunk, and its header.
+    """
+
+    __slots__ = [
+        "source_start",
+        "source_length",
+        "target_start",
+        "target_length",
+        "section_header",
+    ]
+
+    def __init__(
+        self, source_start, source_length, target_start, target_length, section_header
+    ):
+        super().__init__()
+        self.source_start = source_start
+        self.source_length = source_length
+        self.target_start = target_start
+        self.target_length = target_length
+        self.section_header = section_header
+
+
+class PatchedFile(list):
+    """
+    The hunks of a file of the diff, and its source and target file names.
+    """
+
+    __slots__ = ["source_file", "target_file", "is_binary_file"]
+
+    def __init__(self, source_file, target_file, is_binary_file=False):
+        super().__init__()
+        self.source_file = source_file
+        self.target_file = target_file
+        self.is_binary_file = is_binary_file
+
+    @property
+    def is_rename(self):
+        """
+        Returns whether the file is renamed, like unidiff.PatchedFile.is_rename.
+        """
+        return (
+            self.source_file != DEV_NULL
+            and self.target_file != DEV_NULL
+            and self.source_file[2:] != self.target_file[2:]
+        )
+
+    @property
+    def path(self):
+        """
+        Returns the path of the file without the a/ or b/ prefix, like
+        unidiff.PatchedFile.path.
+        """
+        path = self.source_file
+        if path in (None, DEV_NULL) or (
+            self.is_rename and self.target_file not in (None, DEV_NULL)
+        ):
+            path = self.target_file
+
+        quoted = path.startswith('"') and path.endswith('"')
+        if quoted:
+            path = path[1:-1]
+        if RE_PATCH_FILE_PREFIX.match(path):
+            path = path[2:]
+        return f'"{path}"' if quoted else path
+
+
+class Patch(list):
+    """
+    The files of a diff.
+    """
+
+    __slots__ = []
+
+
+def parse_hunk(header, lines):
+    """
+    Returns the Hunk starting with the header line, reading its lines from the iterator.
+
+    Raises:
+        UnidiffParseError: If a line is not a hunk line or the hunk does not have the
+            number of lines of its header.
+    """
+    source_start, source_length, target_start, target_length, section_header = (
+        RE_HUNK_HEADER.match(header).groups()
+    )
+    source_start = int(source_start)
+    target_start = int(target_start)
+    source_length = 1 if source_length is None else int(source_length)
+    target_length = 1 if target_length is None else int(target_length)
+    hunk = Hunk(
+        source_start, source_length, target_start, target_length, section_header
+    )
+
+    source_line_no = source_start
+    target_line_no = target_start
+    source_end = source_start + source_length
+    target_end = target_start + target_length
+    append = hunk.append
+    for line in lines:
+        line_type = line[:1]
+        if line_type in BODY_LINE_TYPES:
+            value = line[1:]
+        else:
+            empty_line = RE_HUNK_EMPTY_BODY_LINE.match(line)
+            if not empty_line:
+                raise UnidiffParseError(f"Hunk diff line expected: {line}")
+            line_type = LINE_TYPE_CONTEXT
+            value = empty_line.group("value")
+
+        if line_type == LINE_TYPE_ADDED:
+            append(Line(line_type, None, target_line_no, value))
+            target_line_no += 1
+        elif line_type == LINE_TYPE_REMOVED:
+            append(Line(line_type, source_line_no, None, value))
+            source_line_no += 1
+        elif line_type == LINE_TYPE_CONTEXT:
+            append(Line(line_type, source_line_no, target_line_no, value))
+            source_line_no += 1
+            target_line_no += 1
+        else:
+            append(Line(line_type, None, None, value))
+
+        if source_line_no > source_end or target_line_no > target_end:
+            raise UnidiffParseError("Hunk is longer than expected")
+        if source_line_no == source_end and target_line_no == target_end:
+            break
+
+    if source_line_no < source_end or target_line_no < target_end:
+        raise UnidiffParseError("Hunk is shorter than expected")
+    return hunk
+
+
+def parse_diff(lines) -> Patch:
+    """
+    Returns the Patch of the lines of a diff, which end with their line terminator.
+
+    Raises:
+        UnidiffParseError: If unidiff.PatchSet cannot parse the diff.
+    """
+    patch = Patch()
+    current_file = None
+    # Whether the current line is in the header of a file, i.e., in unidiff's patch info.
+    in_header = False
+    # Filename of the last '---' line, consumed by the next '+++' line.
+    source_file = None
+
+    lines = iter(lines)
+    for line in lines:
+        if line.startswith("@@"):
+            if RE_HUNK_HEADER.match(line):
+                in_header = False
+                if current_file is None:
+                    raise UnidiffParseError(f"Unexpected hunk found: {line}")
+                current_file.append(parse_hunk(line, lines))
+                continue
+
+        git_header = (
+            RE_DIFF_GIT_HEADER.match(line)
+            or RE_DIFF_GIT_HEADER_URI_LIKE.match(line)
+            or RE_DIFF_GIT_HEADER_NO_PREFIX.match(line)
+        )
+        if git_header:
+            in_header = True
+            source_file = git_header.group("source")
+            current_file = PatchedFile(source_file, git_header.group("target"))
+            patch.append(current_file)
+            continue
+
+        if RE_DIFF_GIT_NEW_FILE.match(line):
+            if current_file is None or not in_header:
+                raise UnidiffParseError(f"Unexpected new file found: {line}")
+            current_file.source_file = DEV_NULL
+            continue
+
+        if RE_DIFF_GIT_DELETED_FILE.match(line):
+            if current_file is None or not in_header:
+                raise UnidiffParseError(f"Unexpected deleted file found: {line}")
+            current_file.target_file = DEV_NULL
+            continue
+
+        if (
+            current_file is not None
+            and in_header
+            and (
+                RE_DIFF_GIT_OLD_MODE.match(line)
+                or RE_DIFF_GIT_NEW_MODE.match(line)
+                or RE_DIFF_GIT_INDEX.match(line)
+            )
+        ):
+            continue
+
+        source_filename = RE_SOURCE_FILENAME.match(line)
+        if source_filename:
+            source_file = source_filename.group("filename")
+            if current_file is not None and not in_header:
+                current_file = None
+            continue
+
+        target_filename = RE_TARGET_FILENAME.match(line)
+        if target_filename:
+            target_file = target_filename.group("filename")
+            if current_file is not None and current_file.target_file != target_file:
+                raise UnidiffParseError(f"Target without source: {line}")
+            if current_file is None:
+                if source_file is None:
+                    raise UnidiffParseError(f"Target without source: {line}")
+                current_file = PatchedFile(source_file, target_file)
+                patch.append(current_file)
+                in_header = False
+                source_file = None
+            continue
+
+        if RE_NO_NEWLINE_MARKER.match(line):
+            if current_file is None:
+                raise UnidiffParseError(f"Unexpected marker: {line}")
+            if not current_file:
+                raise UnidiffParseError("Unexpected marker:" + LINE_VALUE_NO_NEWLINE)
+            current_file[-1].append(
+                Line(LINE_TYPE_NO_NEWLINE, None, None, LINE_VALUE_NO_NEWLINE + "\n")
+            )
+            continue
+
+        if line == "\n" and current_file:
+            current_file[-1].append(Line(LINE_TYPE_EMPTY, None, None, "\n"))
+            continue
+
+        # Any other line is part of the header of a file.
+        if not in_header:
+            current_file = None
+            in_header = True
+
+        binary_diff = RE_BINARY_DIFF.match(line)
+        if binary_diff:
+            source_file = binary_diff.group("source_filename")
+            if current_file is not None:
+                current_file.is_binary_file = True
+            else:
+                target_file = binary_diff.group("target_filename") or source_file
+                patch.append(PatchedFile(source_file, target_file, True))
+            in_header = False
+            current_file = None
+            continue
+
+        if line == "GIT binary patch\n":
+            if current_file is None:
+                raise UnidiffParseError(f"Unexpected binary patch marker: {line}")
+            current_file.is_binary_file = True
+            in_header = False
+            current_file = None
+    return patch
+
+
+def from_filename(diff_file, encoding="latin-1") -> Patch:
+    """
+    Returns the Patch of a diff file, read like unidiff.PatchSet.from_filename.
+    """
+    with open(diff_file, "r", encoding=encoding) as file:
+        return parse_diff(file)
+
+
+def from_string(data) -> Patch:
+    """
+    Returns the Patch of a diff, split into lines like unidiff.PatchSet.from_string.
+    """
+    return parse_diff(io.StringIO(data))
+
+
+def main():
+    """
+    Implement the logic of the script. See the module docstring.
+    """
+    args = sys.argv[1:]
+
+    if len(args) != 1:
+        print("usage: unified_diff.py <path/to/diff/file>")
+        sys.exit(1)
+
+    patch = from_filename(args[0])
+    lines = [line for file in patch for hunk in file for line in hunk]
+    print(
+        f"{len(patch)} files, {sum(len(file) for file in patch)} hunks, "
+        f"{sum(line.line_type == LINE_TYPE_ADDED for line in lines)} added lines, "
+        f"{sum(line.line_type == LINE_TYPE_REMOVED for line in lines)} removed lines"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -27,8 +27,10 @@ Returns:
 import sys
 from os import path
 
+import numpy as np
 import pandas as pd
-from sklearn import metrics
+
+TOOL_CSV = ["smartcommit.csv", "flexeme.csv", "file_untangling.csv"]
 
 
 def merge_nonbugfixing_changes(df: pd.DataFrame) -> pd.DataFrame:
@@ -74,6 +76,66 @@ def is_only_nonbugfixing_change(df: pd.DataFrame) -> pd.Series:
     return df.groupby("group_tool")["other_change"].all()
 
 
+def rand_index(labels_true, labels_pred) -> float:
+    """
+    Returns the Rand Index between two clusterings of the same elements.
+    Equivalent to sklearn.metrics.rand_score.
+
+    Args:
+        labels_true: The ground truth label of each element.
+        labels_pred: The predicted label of each element.
+    """
+    labels_true = np.asarray(labels_true)
+    if len(labels_true) < 2:
+        return 1.0
+    commits = np.zeros(len(labels_true), dtype=np.intp)
+    return float(rand_indices(labels_true, labels_pred, commits)[0])
+
+
+def rand_indices(labels_true, labels_pred, commits) -> np.ndarray:
+    """
+    Returns the Rand Index of the elements of each commit at once.
+
+    The pairs of elements that both clusterings put together or apart are counted
+    from a contingency table of the integer-coded labels of each commit.
+
+    Args:
+        labels_true: The ground truth label of each element.
+        labels_pred: The predicted label of each element.
+        commits: The commit of each element, as integers in [0, number of commits).
+    Returns:
+        An array with the Rand Index of each commit. Commits with less than 2
+        elements have a Rand Index of 1.
+    """
+    commits = np.asarray(commits, dtype=np.intp)
+    n_commits = commits.max() + 1 if len(commits) else 0
+    _, true_codes = np.unique(np.asarray(labels_true), return_inverse=True)
+    _, pred_codes = np.unique(np.asarray(labels_pred), return_inverse=True)
+    n_true = true_codes.max() + 1 if len(true_codes) else 0
+    n_pred = pred_codes.max() + 1 if len(pred_codes) else 0
+
+    def sum_of_squared_counts(codes, n_codes):
+        # Counts the elements of each non-empty (commit, code) cell and sums the squares per commit.
+        cells, counts = np.unique(commits * n_codes + codes, return_counts=True)
+        squares = np.zeros(n_commits, dtype=np.int64)
+        np.add.at(squares, cells // n_codes, counts.astype(np.int64) ** 2)
+        return squares
+
+    n_samples = np.bincount(commits, minlength=n_commits).astype(np.int64)
+    true_squares = sum_of_squared_counts(true_codes, n_true)
+    pred_squares = sum_of_squared_counts(pred_codes, n_pred)
+    contingency_squares = sum_of_squared_counts(
+        true_codes * n_pred + pred_codes, n_true * n_pred
+    )
+
+    # Ordered pairs of distinct elements, and those on which both clusterings agree.
+    pairs = n_samples * (n_samples - 1)
+    agreements = pairs - true_squares - pred_squares + 2 * contingency_squares
+    scores = np.ones(n_commits)
+    np.divide(agreements, pairs, out=scores, where=pairs > 0)
+    return scores
+
+
 def calculate_score_for_tool(truth_df, tool_df):
     """
     Evaluates the tool with Rand Index as metric. The tool classifies each line to a group label (as Strings).
@@ -118,7 +180,72 @@ def calculate_score_for_tool(truth_df, tool_df):
 
     # The adjusted rand score (not the same as the adjusted clusters above!)
     # gives a score of 0 when the fix is divided in multiple groups, which is unfair.
-    return metrics.rand_score(labels_true, labels_pred)
+    return rand_index(labels_true, labels_pred)
+
+
+def read_truth(root):
+    """
+    Returns the ground truth of the commit whose results are in root.
+
+    Raises:
+        FileNotFoundError: If the ground truth file does not exist.
+        ValueError: If the ground truth contains no bug-fixing changes.
+    """
+    # Convert ground truth into a DataFrame
+    truth_file = path.join(root, "truth.csv")
+    truth_df = pd.read_csv(truth_file).convert_dtypes()
+
+    # The script expects that bug-fixing changes are labelled as 'fix' in the <group> column.
+    if not (truth_df["group"] == "fix").any():
+        raise ValueError(
+            "Ground truth file contains no bug-fixing changes. Bug fix changes should be labelled as 'fix' in the "
+            "<group> column"
+        )
+    return truth_df
+
+
+def read_tool_results(root, tool_csv):
+    """
+    Returns the untangling results of a tool (e.g., flexeme.csv) for the commit whose
+    results are in root, with group labels cast to strings, or None if there are none.
+    """
+    try:
+        tool_df = pd.read_csv(path.join(root, tool_csv)).convert_dtypes()
+    except FileNotFoundError:
+        return None
+    tool_df["group"] = tool_df["group"].astype("string")
+    return tool_df
+
+
+def score_commit(root, tools=TOOL_CSV):
+    """
+    Calculates the Rand Index of each tool for one commit.
+
+    Args:
+        root: Directory containing the ground truth and the untangling results of the commit.
+        tools: The result files of the tools to score. Defaults to all the tools.
+    Returns:
+        The Rand Index of each tool, in the order of tools (by default SmartCommit,
+        Flexeme, and the file-based approach).
+    Raises:
+        FileNotFoundError: If the ground truth file does not exist.
+        ValueError: If the ground truth contains no bug-fixing changes.
+    """
+    truth_df = read_truth(root)
+
+    # Cast each tool's group labels into String format and pair with ground
+    # truth to calculate Rand Index.
+    return [
+        calculate_score_for_tool(truth_df, read_tool_results(root, tool_csv))
+        for tool_csv in tools
+    ]
+
+
+def format_scores(project, vid, tool_scores):
+    """
+    Returns the CSV row of the scores of one commit, without a line terminator.
+    """
+    return f"{project},{vid},{tool_scores[0]},{tool_scores[1]},{tool_scores[2]}"
 
 
 def main(args):
@@ -138,40 +265,15 @@ def main(args):
     project = args[1]
     vid = args[2]
 
-    # Convert ground truth into a DataFrame
     try:
-        truth_file = path.join(root, "truth.csv")
-        truth_df = pd.read_csv(truth_file).convert_dtypes()
+        tool_scores = score_commit(root)
     except FileNotFoundError as e:
         print(f"Ground truth file not found: {e.filename}", file=sys.stderr)
         sys.exit(1)
-
-    # The script expects that bug-fixing changes are labelled as 'fix' in the <group> column.
-    if not (truth_df["group"] == "fix").any():
-        print(
-            "Ground truth file contains no bug-fixing changes. Bug fix changes should be labelled as 'fix' in the "
-            "<group> column",
-            file=sys.stderr,
-        )
+    except ValueError as e:
+        print(e, file=sys.stderr)
         sys.exit(1)
-
-    tool_csv = ["smartcommit.csv", "flexeme.csv", "file_untangling.csv"]
-
-    # Generate array of one RandIndex score (type='float') for each tool, initialized to 0.0.
-    tool_scores = [0.0] * len(tool_csv)
-
-    # Cast each tool's group labels into String format and pair with ground
-    # truth to calculate Rand Index.
-    for i, value in enumerate(tool_csv):
-        tool_decomposition_file = path.join(root, value)
-        try:
-            tool_df = pd.read_csv(tool_decomposition_file).convert_dtypes()
-            tool_df["group"] = tool_df["group"].astype("string")
-        except FileNotFoundError:
-            tool_df = None
-        # Add Rand Index in respective tool order
-        tool_scores[i] = calculate_score_for_tool(truth_df, tool_df)
-    print(f"{project},{vid},{tool_scores[0]},{tool_scores[1]},{tool_scores[2]}")
+    print(format_scores(project, vid, tool_scores))
 
 
 if __name__ == "__main__":
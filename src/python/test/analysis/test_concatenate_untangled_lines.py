@@ -1,7 +1,11 @@
 import pandas as pd
 import pytest
 
-from src.python.main.analysis.concatenate_untangled_lines import normalize_untangled_lines
+from src.python.main.analysis.concatenate_untangled_lines import (
+    column_names_dataset,
+    concatenate_untangled_lines_for_dataset,
+    normalize_untangled_lines,
+)
 
 
 @pytest.fixture
@@ -38,3 +42,31 @@ def test_normalize_untangled_lines(sample_data):
     # file3 = o
     assert result_df.shape[0] == 3
     assert result_df["group"].tolist() == ["x", "y", "o"]
+
+
+def write_csv(path, rows):
+    path.write_text("file,source,target,group\n" + "".join(f"{row}\n" for row in rows))
+
+
+def test_concatenate_untangled_lines_for_dataset(tmp_path):
+    lang = tmp_path / "Lang_1"
+    lang.mkdir()
+    write_csv(lang / "truth.csv", ["A.java,1,,fix", "A.java,,2,other"])
+    write_csv(lang / "flexeme.csv", ["A.java,,2,1", "B.java,3,,0"])
+    write_csv(lang / "smartcommit.csv", ["A.java,1,,group0", "A.java,,2,group1"])
+    # Commits without a ground truth and folders with invalid names are ignored.
+    (tmp_path / "Cli_2").mkdir()
+    write_csv(tmp_path / "Cli_2" / "flexeme.csv", ["A.java,1,,1"])
+    (tmp_path / "invalid").mkdir()
+
+    result_df = concatenate_untangled_lines_for_dataset(tmp_path)
+
+    assert result_df.columns.tolist() == column_names_dataset
+    assert result_df["project"].unique().tolist() == ["Lang"]
+    assert result_df["bug_id"].unique().tolist() == ["1"]
+    assert result_df["treatment"].tolist() == [
+        "flexeme", "flexeme", "smartcommit", "smartcommit", "filename", "filename", "truth", "truth"
+    ]
+    assert result_df["group"].tolist() == ["o", "1", "group0", "group1", "o", "o", "fix", "other"]
+    assert result_df["group"].dtype == "category"
+    assert concatenate_untangled_lines_for_dataset(tmp_path, workers=2).equals(result_df)
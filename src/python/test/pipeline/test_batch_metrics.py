@@ -0,0 +1,77 @@
+"""
+Tests for pipeline/batch_metrics.py
+"""
+
+import subprocess
+
+from src.python.main.diff_metrics_lltc4j import commit_metrics
+from src.python.main.pipeline.batch_metrics import (
+    METRICS_HEADER,
+    main,
+    project_name_from_url,
+)
+
+
+def git(repository, *args):
+    return subprocess.run(
+        ["git", "-C", repository, *args],
+        check=True,
+        stdout=subprocess.PIPE,
+        text=True,
+    ).stdout.strip()
+
+
+def test_project_name_from_url():
+    assert project_name_from_url("https://github.com/apache/giraph.git") == "giraph"
+    assert project_name_from_url("https://github.com/apache/commons-math") == (
+        "commons-math"
+    )
+
+
+def test_lltc4j_metrics(tmp_path):
+    """
+    Test that the metrics of the commits are aggregated in metrics.csv, and that
+    the commits without a clone or with stored metrics are not computed.
+    """
+    repository = tmp_path / "repositories" / "project"
+    repository.mkdir(parents=True)
+    git(repository, "init", "-q")
+    git(repository, "config", "user.email", "test@example.com")
+    git(repository, "config", "user.name", "test")
+    (repository / "A.java").write_text("a\nb\n")
+    git(repository, "add", "A.java")
+    git(repository, "commit", "-q", "-m", "parent")
+    parent_hash = git(repository, "rev-parse", "HEAD")
+    (repository / "A.java").write_text("a\nc\n")
+    (repository / "ATest.java").write_text("t\n")
+    git(repository, "add", "A.java", "ATest.java")
+    git(repository, "commit", "-q", "-m", "commit")
+    commit_hash = git(repository, "rev-parse", "HEAD")
+
+    cached_hash = "cafe00" + commit_hash[6:]
+    (tmp_path / "metrics").mkdir()
+    (tmp_path / "metrics" / "project_cafe00.csv").write_text("project,cafe00,cached\n")
+
+    commits_file = tmp_path / "commits.csv"
+    commits_file.write_text(
+        "vcs_url,commit_hash,parent_hash\n"
+        f"https://github.com/owner/project.git,{commit_hash},{parent_hash}\n"
+        f"https://github.com/owner/missing.git,{commit_hash},{parent_hash}\n"
+        f"https://github.com/owner/project.git,{cached_hash},{parent_hash}\n"
+    )
+
+    main("lltc4j", commits_file, tmp_path, 1)
+
+    short_hash = commit_hash[:6]
+    diff_file = repository / f"VC_{short_hash}.diff"
+    assert "+c" in diff_file.read_text()
+    assert (tmp_path / "metrics.csv").read_text().splitlines() == [
+        METRICS_HEADER,
+        commit_metrics(diff_file, "project", short_hash),
+        "project,cafe00,cached",
+    ]
+    assert (tmp_path / "metrics" / f"project_{short_hash}.csv").is_file()
+    assert (
+        "Clone not found"
+        in (tmp_path / "logs" / f"missing_{short_hash}_metrics.log").read_text()
+    )
@@ -0,0 +1,104 @@
+"""
+Tests for pipeline/cache.py
+"""
+
+import os
+
+from src.python.main.pipeline.cache import Manifest, stage_key
+from src.python.main.pipeline.dag import CACHED, OK, Stage, run_stages
+
+
+class Commit:
+    def __init__(self, name, root):
+        self.name = name
+        self.input_file = os.path.join(root, "input.txt")
+        self.output_file = os.path.join(root, "output.txt")
+
+
+def double(commit):
+    with open(commit.input_file) as file:
+        content = file.read()
+    with open(commit.output_file, "w") as file:
+        file.write(content * 2)
+    return len(content) * 2
+
+
+STAGES = [
+    Stage(
+        "double",
+        double,
+        "double",
+        inputs=lambda commit: [commit.input_file],
+        params=lambda commit: {"flag": os.environ.get("DOUBLE_FLAG")},
+        scripts=[__file__],
+        outputs=lambda commit: [commit.output_file],
+    )
+]
+
+
+def test_stage_key_depends_on_content(tmp_path):
+    """
+    Test that the key of a stage changes with the content of its inputs and its
+    parameters, but not with the path or the modification time of its inputs.
+    """
+    first = tmp_path / "first.diff"
+    second = tmp_path / "second.diff"
+    first.write_text("a")
+    second.write_text("a")
+    key = stage_key("stage", [first], {"flag": True}, [__file__])
+
+    assert stage_key("stage", [second], {"flag": True}, [__file__]) == key
+    assert stage_key("stage", [first], {"flag": False}, [__file__]) != key
+    assert stage_key("stage", [tmp_path / "missing"], {"flag": True}, []) != key
+    second.write_text("b")
+    assert stage_key("stage", [second], {"flag": True}, [__file__]) != key
+
+
+def test_stage_runs_again_only_when_inputs_change(tmp_path):
+    """
+    Test that a stage is cached until its input or its output changes.
+    """
+    commit = Commit("commit", tmp_path)
+    manifest_dir = tmp_path / "manifests"
+    with open(commit.input_file, "w") as file:
+        file.write("ab")
+
+    def run():
+        outcomes = run_stages(STAGES, tmp_path, commit, manifest_dir)
+        status, _, result = outcomes["double"]
+        return status, result
+
+    assert run() == (OK, 4)
+    assert run() == (CACHED, 4)
+    assert (tmp_path / "commit_double.log").read_text().endswith("CACHED\n")
+
+    with open(commit.input_file, "w") as file:
+        file.write("abc")
+    assert run() == (OK, 6)
+    assert run() == (CACHED, 6)
+
+    # Outputs modified in place are detected by size, or by content when verified.
+    with open(commit.output_file, "w") as file:
+        file.write("abcabC")
+    assert run() == (CACHED, 6)
+    outcomes = run_stages(STAGES, tmp_path, commit, manifest_dir, verify=True)
+    assert outcomes["double"][0] == OK
+    os.remove(commit.output_file)
+    assert run() == (OK, 6)
+
+
+def test_failed_stage_is_not_cached(tmp_path):
+    """
+    Test that the entry of a stage is removed when it fails.
+    """
+    commit = Commit("commit", tmp_path)
+    manifest_dir = tmp_path / "manifests"
+    with open(commit.input_file, "w") as file:
+        file.write("ab")
+    run_stages(STAGES, tmp_path, commit, manifest_dir)
+    os.remove(commit.input_file)
+
+    outcomes = run_stages(STAGES, tmp_path, commit, manifest_dir)
+
+    assert outcomes["double"][0] == "FAIL"
+    assert Manifest(manifest_dir / "commit.json").entries == {}
@@ -0,0 +1,129 @@
+"""
+Tests for pipeline/dag.py
+"""
+
+import pickle
+import sys
+
+import pytest
+
+from src.python.main.pipeline import d4j_stages
+from src.python.main.pipeline.dag import (
+    FAIL,
+    OK,
+    SKIP,
+    Stage,
+    run_commits,
+    topological_order,
+)
+
+
+class Commit:
+    def __init__(self, name):
+        self.name = name
+
+
+def generate(commit):
+    print(f"generating {commit.name}")
+    if commit.name == "broken":
+        raise ValueError("no artifacts")
+    return commit.name.upper()
+
+
+def untangle(commit):
+    print(f"untangling {commit.name}", file=sys.stderr)
+    if commit.name == "exiting":
+        sys.exit(1)
+
+
+def score(commit):
+    return 1.0
+
+
+STAGES = [
+    Stage("score", score, "score", requires=["generate"], after=["untangle"]),
+    Stage("untangle", untangle, "decompose", requires=["generate"]),
+    Stage("generate", generate, "artifacts"),
+]
+
+
+def test_topological_order():
+    """
+    Test that stages come after their dependencies and that cycles are detected.
+    """
+    assert [stage.name for stage in topological_order(STAGES)] == [
+        "generate",
+        "untangle",
+        "score",
+    ]
+
+    with pytest.raises(ValueError):
+        topological_order([Stage("a", score, "a", requires=["b"])])
+    with pytest.raises(ValueError):
+        topological_order(
+            [
+                Stage("a", score, "a", after=["b"]),
+                Stage("b", score, "b", requires=["a"]),
+            ]
+        )
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_failed_stage_skips_its_dependents(tmp_path, workers):
+    """
+    Test that a failing stage only skips the stages of the same commit that require it,
+    and that the output of each stage goes to its log file.
+    """
+    commits = [Commit("ok"), Commit("broken")]
+
+    outcomes = list(run_commits(STAGES, tmp_path, commits, workers))
+
+    statuses = [
+        {name: status for name, (status, _, _) in outcome.items()}
+        for outcome in outcomes
+    ]
+    assert statuses == [
+        {"generate": OK, "untangle": OK, "score": OK},
+        {"generate": FAIL, "untangle": SKIP, "score": SKIP},
+    ]
+    assert outcomes[0]["generate"][2] == "OK"
+    assert outcomes[0]["score"][2] == 1.0
+    assert (tmp_path / "ok_artifacts.log").read_text() == "generating ok\n"
+    assert (tmp_path / "ok_decompose.log").read_text() == "untangling ok\n"
+    assert "ValueError: no artifacts" in (tmp_path / "broken_artifacts.log").read_text()
+    assert not (tmp_path / "broken_decompose.log").exists()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_exiting_stage_fails(tmp_path, workers):
+    """
+    Test that a stage calling sys.exit fails like a stage raising an exception, without
+    stopping the other commits.
+    """
+    commits = [Commit("exiting"), Commit("ok")]
+
+    outcomes = list(run_commits(STAGES, tmp_path, commits, workers))
+
+    statuses = [
+        {name: status for name, (status, _, _) in outcome.items()}
+        for outcome in outcomes
+    ]
+    assert statuses == [
+        {"generate": OK, "untangle": FAIL, "score": OK},
+        {"generate": OK, "untangle": OK, "score": OK},
+    ]
+    assert "SystemExit: 1" in (tmp_path / "exiting_decompose.log").read_text()
+
+
+def test_d4j_stages_can_be_sent_to_workers():
+    """
+    Test that the Defects4J stages can be pickled, as run_commits does with several workers.
+    """
+    stages = pickle.loads(pickle.dumps(d4j_stages.STAGES))
+    commit = d4j_stages.D4jCommit("Lang", "1", "out")
+
+    metrics = next(stage for stage in stages if stage.name == "metrics")
+    assert metrics.inputs(commit) == d4j_stages.in_diff_dir(*d4j_stages.CLEAN_DIFFS)(
+        commit
+    )
+    assert metrics.outputs(commit) == [commit.metrics_file]
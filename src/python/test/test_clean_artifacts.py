@@ -2,6 +2,12 @@
 Test the clean_artifacts module.
 """
 
+import io
+import os
+import shutil
+import subprocess
+
+import pytest
 from unidiff import (
     PatchSet,
     LINE_TYPE_CONTEXT,
@@ -132,3 +138,173 @@ index 8422d40..fb47f45 100644
     fixed_patch = clean_artifacts.fix_hunk_info(clean_patch)
     assert fixed_patch[0][0].source_length == 7
     assert fixed_patch[0][0].target_length == 12
+
+
+DIFF_TO_CLEAN = """diff --git a/src/main/java/A.java b/src/main/java/A.java
+index 8422d40..e2c9801 100644
+--- a/src/main/java/A.java
++++ b/src/main/java/A.java
+@@ -1,3 +1,3 @@ class A {
+ int a;
+-int b;
++int b;
+-// comment
++import java.util.List;
+@@ -10 +10,2 @@
+-return a;
++return b;
++
+\\ No newline at end of file
+diff --git a/src/test/java/ATest.java b/src/test/java/ATest.java
+index 8422d40..e2c9801 100644
+--- a/src/test/java/ATest.java
++++ b/src/test/java/ATest.java
+@@ -1 +1 @@
+-int a;
++int b;
+diff --git a/README.md b/README.md
+index 8422d40..e2c9801 100644
+--- a/README.md
++++ b/README.md
+@@ -1 +1 @@
+-A
++B
+diff --git a/src/main/java/B.java b/src/main/java/C.java
+similarity index 100%
+rename from src/main/java/B.java
+rename to src/main/java/C.java
+diff --git a/src/main/java/D.java b/src/main/java/D.java
+new file mode 100644
+index 0000000..e2c9801
+--- /dev/null
++++ b/src/main/java/D.java
+@@ -0,0 +1,2 @@
++/* block
++int d;
+diff --git a/lib/E.java b/lib/E.java
+index 8422d40..e2c9801 100644
+Binary files a/lib/E.java and b/lib/E.java differ
+"""
+
+
+def test_stream_clean_diff_matches_patchset(tmp_path):
+    """
+    Test that streaming a diff produces the same cleaned diff as parsing it into a PatchSet.
+    """
+    diff_file = tmp_path / "VC.diff"
+    diff_file.write_text(DIFF_TO_CLEAN, encoding="latin-1")
+    clean_artifacts.stream_clean_diff(diff_file, tmp_path / "stream.diff")
+    clean_artifacts.patchset_clean_diff(diff_file, tmp_path / "patchset.diff")
+
+    cleaned_diff = (tmp_path / "stream.diff").read_text(encoding="latin-1")
+    assert cleaned_diff == (tmp_path / "patchset.diff").read_text(encoding="latin-1")
+    assert "ATest.java" not in cleaned_diff
+    assert "README.md" not in cleaned_diff
+    assert "@@ -1,3 +1,3 @@ class A {\n int a;\n-\n+\n-\n+\n" in cleaned_diff
+
+
+def test_clean_diff_falls_back_to_patchset(tmp_path):
+    """
+    Test that a diff the streaming cleaner does not support is cleaned with a PatchSet.
+    """
+    diff_file = tmp_path / "VC.diff"
+    diff_file.write_text(
+        DIFF_TO_CLEAN
+        + """diff --git a/src/main/java/F.java b/src/main/java/F.java
+index 8422d40..e2c9801 100644
+GIT binary patch
+literal 5
+McmZ?wbYWou00ZFyq5uE@
+
+""",
+        encoding="latin-1",
+    )
+    with open(diff_file, encoding="latin-1") as diff:
+        with pytest.raises(clean_artifacts.UnsupportedDiffError):
+            clean_artifacts.DiffCleaner(io.StringIO()).clean(diff)
+    clean_artifacts.patchset_clean_diff(diff_file, tmp_path / "patchset.diff")
+    clean_artifacts.clean_diff(str(diff_file))
+
+    assert (tmp_path / "VC_clean.diff").read_text(encoding="latin-1") == (
+        tmp_path / "patchset.diff"
+    ).read_text(encoding="latin-1")
+
+
+JAVA_TO_CLEAN = """package a;  \r
+import java.util.List;
+/**
+ * Javadoc
+ */
+public class A { // trailing
+    String s = "http://x /* not */"; /* inline */ int b;
+    char c = '"'; char d = '\\''; int e = 1; /* multi
+       line */ int f = 2;
+\t// indented comment
+
+    String t = "a\\"b//c";
+  /* a */ /* b */ int  g;
+    int h = 4 / 2 /* div */ / 1;
+    String u = "end\\\\"; // c
+}"""
+
+CLEANED_JAVA = """package a;
+import java.util.List;
+public class A {
+    String s = "http://x /* not */"; int b;
+    char c = '"'; char d = '\\''; int e = 1;
+               int f = 2;
+    String t = "a\\"b//c";
+                  int g;
+    int h = 4 / 2 / 1;
+    String u = "end\\\\";
+}
+"""
+
+
+def test_strip_java_comments():
+    """
+    Test that comments, blank lines, and trailing whitespace are removed from Java source
+    the way the C preprocessor removes them.
+    """
+    assert clean_artifacts.strip_java_comments(JAVA_TO_CLEAN) == CLEANED_JAVA
+    assert clean_artifacts.strip_java_comments(CLEANED_JAVA) == CLEANED_JAVA
+    with pytest.raises(ValueError):
+        clean_artifacts.strip_java_comments("int a; /* unterminated\n")
+
+
+@pytest.mark.skipif(shutil.which("cpp") is None, reason="requires cpp")
+def test_strip_java_comments_matches_clean_java_file(tmp_path):
+    """
+    Test that cleaning a Java file in Python is equivalent to clean-java-file.sh.
+    """
+    java_file = tmp_path / "A.java"
+    java_file.write_text(JAVA_TO_CLEAN, encoding="latin-1")
+    script = os.path.join(
+        os.path.dirname(__file__), "..", "..", "bash", "main", "clean-java-file.sh"
+    )
+    subprocess.run([script, str(java_file)], check=True)
+
+    assert java_file.read_text(encoding="latin-1") == CLEANED_JAVA
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_clean_java_directory(tmp_path, workers):
+    """
+    Test that only the Java files that are not clean are rewritten, outside of .git.
+    """
+    for name in ["src/A.java", "src/b/B.java", ".git/C.java"]:
+        os.makedirs(os.path.dirname(tmp_path / name), exist_ok=True)
+        (tmp_path / name).write_text(JAVA_TO_CLEAN, encoding="latin-1")
+    (tmp_path / "src" / "Clean.java").write_text(CLEANED_JAVA, encoding="latin-1")
+    (tmp_path / "src" / "Broken.java").write_text("/* a", encoding="latin-1")
+    (tmp_path / "README.md").write_text("// not Java", encoding="latin-1")
+    os.utime(tmp_path / "src" / "Clean.java", ns=(0, 0))
+
+    assert clean_artifacts.clean_java_directory(str(tmp_path), workers) == 2
+
+    for name in ["src/A.java", "src/b/B.java", "src/Clean.java"]:
+        assert (tmp_path / name).read_text(encoding="latin-1") == CLEANED_JAVA
+    assert os.stat(tmp_path / "src" / "Clean.java").st_mtime_ns == 0
+    assert (tmp_path / ".git" / "C.java").read_bytes() == JAVA_TO_CLEAN.encode("latin-1")
+    assert (tmp_path / "src" / "Broken.java").read_text(encoding="latin-1") == "/* a"
+    assert (tmp_path / "README.md").read_text(encoding="latin-1") == "// not Java"
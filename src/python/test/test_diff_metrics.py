@@ -0,0 +1,123 @@
+"""
+Tests for diff_metrics.py
+"""
+
+import pytest
+from unidiff import PatchSet
+
+from src.python.main.diff_metrics import (
+    PatchStats,
+    count_parsed_tangled_hunks,
+    count_tangled_hunks,
+    get_hunks_in_patch,
+    lines_in_patch,
+    tangled_lines_from_counts,
+)
+from src.python.main.parsed_patch import parse_patch
+
+
+def diff(*hunks):
+    """
+    Returns the PatchSet of a diff of A.java with the given hunks, each a list of
+    changed lines.
+    """
+    text = "diff --git a/A.java b/A.java\n--- a/A.java\n+++ b/A.java\n"
+    for i, lines in enumerate(hunks):
+        removed = sum(line.startswith("-") for line in lines)
+        added = len(lines) - removed
+        start = 1 + 100 * i
+        text += f"@@ -{start},{removed} +{start},{added} @@\n"
+        text += "".join(line + "\n" for line in lines)
+    return PatchSet.from_string(text)
+
+
+def assert_tangled_hunks(original_diff, fix_diff, expected):
+    assert count_tangled_hunks(original_diff, fix_diff) == expected
+    assert (
+        count_parsed_tangled_hunks(parse_patch(original_diff), parse_patch(fix_diff))
+        == expected
+    )
+
+
+def test_tangled_hunks():
+    """
+    Test that only the hunks with fix and non-fix lines are tangled.
+    """
+    original_diff = diff(["-a", "+b"], ["-c", "+d"], ["-e", "+f"])
+    fix_diff = diff(["-a", "+b"], ["-c"])
+
+    assert_tangled_hunks(original_diff, fix_diff, 1)
+    assert_tangled_hunks(original_diff, diff(), 0)
+    assert_tangled_hunks(diff(), fix_diff, 0)
+    assert_tangled_hunks(original_diff, original_diff, 0)
+
+
+def test_duplicated_lines_in_hunk():
+    """
+    Test that every occurrence of a line in a hunk of the original diff is a fix
+    line if the line occurs once in the bug-fixing diff.
+    """
+    original_diff = diff(["+a", "+a", "+b"])
+
+    assert_tangled_hunks(original_diff, diff(["+a"]), 1)
+    assert_tangled_hunks(original_diff, diff(["+a", "+b"]), 0)
+    assert_tangled_hunks(diff(["+a", "+a"]), diff(["+a"]), 0)
+
+
+def test_duplicated_lines_across_hunks():
+    """
+    Test that a line occurring in several hunks is a fix line in each of them, and
+    that the same text removed and added are different lines.
+    """
+    original_diff = diff(["-a", "+b"], ["-a", "+c"], ["+a"])
+    fix_diff = diff(["-a"])
+
+    assert_tangled_hunks(original_diff, fix_diff, 2)
+    assert_tangled_hunks(original_diff, diff(["-a", "-a", "-a"]), 2)
+
+
+def test_patch_stats():
+    """
+    Test that PatchStats counts the non-empty hunks and the non-blank changed lines
+    in one walk, like the list-based traversal, for PatchSets and ParsedPatches.
+    """
+    patch = PatchSet.from_string("""diff --git a/A.java b/A.java
+--- a/A.java
++++ b/A.java
+@@ -1,2 +1,3 @@
+ a
+-b
++c
++
+@@ -10 +10,0 @@
+-
+diff --git a/ATest.java b/ATest.java
+--- a/ATest.java
++++ b/ATest.java
+@@ -5 +5 @@
+-d
++e
+""")
+
+    for stats in [
+        PatchStats.from_patch(patch),
+        PatchStats.from_parsed_patch(parse_patch(patch)),
+    ]:
+        assert stats.files == 2
+        assert stats.test_files == 1
+        assert stats.hunks == len(get_hunks_in_patch(patch)) == 2
+        assert stats.changed_lines == len(lines_in_patch(patch)) == 4
+        assert stats.average_hunk_size() == 2
+
+    assert PatchStats.from_patch(PatchSet.from_string("")).average_hunk_size() == ""
+
+
+def test_tangled_lines_from_counts():
+    """
+    Test that the tangled lines are half the lines of the bug-fixing and non bug-fixing
+    diffs missing from the original diff, and that an odd count is an error.
+    """
+    assert tangled_lines_from_counts(10, 6, 6) == 1
+    assert tangled_lines_from_counts(10, 4, 6) == 0
+    with pytest.raises(ValueError):
+        tangled_lines_from_counts(10, 6, 5)
@@ -0,0 +1,70 @@
+"""
+Tests for evaluation_results.py
+"""
+
+import os
+
+from src.python.main.evaluation_results import (
+    find_commit_files,
+    load_ground_truth,
+    read_commit_files,
+    split_by_commit,
+)
+
+
+def write_truth(commit_dir, rows):
+    os.makedirs(commit_dir, exist_ok=True)
+    with open(os.path.join(commit_dir, "truth.csv"), "w") as file:
+        file.write("file,source,target,group\n")
+        file.writelines(f"{row}\n" for row in rows)
+
+
+def test_find_commit_files_stops_at_max_depth(tmp_path):
+    write_truth(tmp_path / "evaluation" / "Lang_1", ["A.java,1,,fix"])
+    write_truth(tmp_path / "evaluation" / "Cli_2", [])
+    # Ground truth files in the checked out repositories are not visited.
+    write_truth(tmp_path / "repositories" / "Lang_1" / "src" / "Lang_3", [])
+
+    assert find_commit_files(str(tmp_path)) == [
+        str(tmp_path / "evaluation" / "Cli_2" / "truth.csv"),
+        str(tmp_path / "evaluation" / "Lang_1" / "truth.csv"),
+    ]
+    assert len(find_commit_files(str(tmp_path), max_depth=4)) == 3
+    assert find_commit_files(str(tmp_path), max_depth=1) == []
+
+
+def test_load_ground_truth(tmp_path):
+    write_truth(tmp_path / "Lang_1", ["A.java,1,,fix", "A.java,,2,other"])
+    write_truth(tmp_path / "Cli_2", [])
+    write_truth(tmp_path / "Cli_10", ["B.java,3.0,,1"])
+
+    df = load_ground_truth(str(tmp_path), workers=2)
+
+    assert df.columns.tolist() == [
+        "project",
+        "commit_id",
+        "file",
+        "source",
+        "target",
+        "group",
+    ]
+    assert df["commit_id"].tolist() == ["10", "1", "1"]
+    assert df["source"].tolist()[:2] == [3, 1]
+    assert str(df["source"].dtype) == "Int64"
+    assert df["group"].tolist() == ["1", "fix", "other"]
+
+
+def test_split_by_commit_keeps_empty_commits(tmp_path):
+    write_truth(tmp_path / "Lang_1", ["A.java,1,,fix", "A.java,,2,other"])
+    write_truth(tmp_path / "Cli_2", [])
+    files = find_commit_files(str(tmp_path))
+
+    commits = list(split_by_commit(read_commit_files(files), files))
+
+    assert [(project, commit_id) for project, commit_id, _ in commits] == [
+        ("Cli", "2"),
+        ("Lang", "1"),
+    ]
+    assert len(commits[0][2]) == 0
+    assert commits[1][2].columns.tolist() == ["file", "source", "target", "group"]
+    assert commits[1][2]["target"].tolist()[1] == 2
@@ -0,0 +1,130 @@
+"""
+Tests for evaluation_store.py
+"""
+
+import io
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from src.python.main import evaluation_store, tangled_metrics
+from src.python.main.newmetrics import count_lines_in_tool_untangling
+
+TRUTH = """file,source,target,group
+A.java,3,,fix
+A.java,,4,other
+B.java,1,,fix
+"""
+
+FLEXEME = """file,source,target,group
+A.java,3,,0
+C.java,,2,1
+"""
+
+
+@pytest.fixture
+def evaluation_dir(tmp_path):
+    """
+    An evaluation directory with 3 commits. Chart_10 has no Flexeme results.
+    """
+    evaluation_dir = tmp_path / "evaluation"
+    for commit in ["Lang_1", "Lang_2", "Chart_10"]:
+        commit_dir = evaluation_dir / commit
+        commit_dir.mkdir(parents=True)
+        (commit_dir / "truth.csv").write_text(TRUTH)
+        (commit_dir / "scores.csv").write_text("Lang,1,0.5,0.5,0.5\n")
+        if commit != "Chart_10":
+            (commit_dir / "flexeme.csv").write_text(FLEXEME)
+    return evaluation_dir
+
+
+def test_convert_and_filter(evaluation_dir, tmp_path):
+    """
+    Test that the converted store contains the lines of the CSV files, and that
+    the lines can be filtered by their keys.
+    """
+    store_dir = tmp_path / "store"
+    evaluation_store.convert(evaluation_dir, "d4j", store_dir)
+
+    lines = evaluation_store.read_lines(store_dir)
+    assert len(lines) == 3 * 3 + 2 * 2
+    assert set(lines["treatment"]) == {"truth", "flexeme"}
+
+    truth = evaluation_store.read_lines(
+        store_dir, "d4j", treatments="truth", projects="Lang", commits=[2]
+    )
+    assert (
+        truth[evaluation_store.LINE_COLUMNS]
+        .astype(object)
+        .equals(
+            pd.read_csv(evaluation_dir / "Lang_2" / "truth.csv")
+            .astype({"source": "Int32", "target": "Int32"})
+            .astype(object)
+        )
+    )
+    assert truth["commit_id"].unique().tolist() == ["2"]
+    assert evaluation_store.read_lines(store_dir, "lltc4j").empty
+
+
+def test_commit_lines_replace_compacted_lines(evaluation_dir, tmp_path):
+    """
+    Test that the lines written for a commit replace its converted lines, also
+    after compaction.
+    """
+    store_dir = tmp_path / "store"
+    evaluation_store.convert(evaluation_dir, "d4j", store_dir)
+    evaluation_store.write_commit(
+        store_dir,
+        "d4j",
+        "truth",
+        "Lang",
+        "2",
+        pd.DataFrame(
+            {"file": ["Z.java"], "source": [None], "target": [9], "group": ["fix"]}
+        ),
+    )
+
+    def read_truth():
+        return evaluation_store.read_lines(store_dir, treatments="truth", commits="2")
+
+    assert read_truth()["file"].tolist() == ["Z.java"]
+    all_lines = evaluation_store.read_lines(store_dir)
+    evaluation_store.compact(store_dir)
+    assert not os.path.exists(store_dir / "commits" / "dataset=d4j")
+    assert read_truth()["file"].tolist() == ["Z.java"]
+    assert evaluation_store.read_lines(store_dir).equals(all_lines)
+
+
+def test_analysis_reads_the_store(evaluation_dir, tmp_path, capsys):
+    """
+    Test that the analysis scripts compute the same results from the store and
+    from the CSV files.
+    """
+    store_dir = tmp_path / "store"
+    evaluation_store.convert(evaluation_dir, "d4j", store_dir)
+
+    count_lines_in_tool_untangling.main(str(evaluation_dir))
+    from_csv = pd.read_csv(io.StringIO(capsys.readouterr().out))
+    count_lines_in_tool_untangling.main(None, str(store_dir), "d4j")
+    from_store = pd.read_csv(io.StringIO(capsys.readouterr().out))
+    keys = ["project", "commit_id"]
+    assert from_store.sort_values(keys, ignore_index=True).equals(
+        from_csv.sort_values(keys, ignore_index=True)
+    )
+
+    files = tangled_metrics.calculate_tangled_metrics(
+        [
+            str(evaluation_dir / commit / "truth.csv")
+            for commit in os.listdir(evaluation_dir)
+        ]
+    )
+    store = tangled_metrics.calculate_tangled_metrics_for_commits(
+        (project, commit_id, lines["truth"])
+        for project, commit_id, lines in evaluation_store.iter_commits(store_dir)
+    )
+    assert store.sort_values(keys, ignore_index=True).equals(
+        files.sort_values(keys, ignore_index=True)
+    )
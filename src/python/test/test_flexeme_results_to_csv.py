@@ -0,0 +1,106 @@
+"""
+Tests for flexeme_results_to_csv.py
+"""
+
+import networkx as nx
+import pytest
+
+from src.python.main.flexeme_results_to_csv import (
+    UnsupportedDotError,
+    changed_nodes_to_dataframe,
+    read_nodes,
+    scan_dot_nodes,
+)
+
+PDG = """digraph "" {
+graph [rankdir=LR];
+node [shape=box];
+// A comment.
+0 [label="0: int a = 1;", color=green, span="3-5", filepath="A.java"];
+1 [label="1: b(\\"x\\");"];
+"2" [label="1: c();", color=red, span="7-7", cluster="B.java"]
+1 -> 0 [key=0, label="ctrl"];
+0 -> "2" -> 3;
+subgraph cluster_B { 4 [label="0: d", color=red, span="1-1", filepath="B.java"]; }
+1 [color=red, span="2-2", filepath="A.java"];
+}
+"""
+
+
+def test_changed_nodes_are_expanded_to_lines():
+    """
+    Test that each line of a changed node is labelled with the group of the node.
+    """
+    nodes = [
+        (
+            "0",
+            {
+                "label": '"0: a"',
+                "color": "green",
+                "span": '"3-5"',
+                "filepath": '"A.java"',
+            },
+        ),
+        ("1", {"label": '"1: b"'}),
+        (
+            "2",
+            {"label": '"1: c"', "color": "red", "span": '"7-7"', "cluster": '"B.java"'},
+        ),
+        (
+            "3",
+            {
+                "label": '"2: d"',
+                "color": "blue",
+                "span": '"1-1"',
+                "filepath": '"A.java"',
+            },
+        ),
+    ]
+
+    df = changed_nodes_to_dataframe(nodes)
+
+    assert df.to_csv(index=False) == (
+        "file,source,target,group\n"
+        "A.java,,3,0\n"
+        "A.java,,4,0\n"
+        "A.java,,5,0\n"
+        "B.java,7,,1\n"
+    )
+
+
+def test_no_changed_nodes():
+    """
+    Test that a graph without changed nodes has no lines.
+    """
+    assert changed_nodes_to_dataframe([("0", {"label": '"0: a"'})]) is None
+
+
+def test_scan_dot_nodes_reads_nodes_like_pydot(tmp_path):
+    """
+    Test that the scanned changed nodes and their attributes are the ones read by pydot.
+    """
+    dot_file = tmp_path / "flexeme.dot"
+    dot_file.write_text(PDG)
+    graph = nx.nx_pydot.read_dot(dot_file)
+
+    nodes = scan_dot_nodes(PDG)
+
+    assert nodes == [
+        (node, data) for node, data in graph.nodes(data=True) if "color" in data
+    ]
+    assert [node for node, _ in nodes] == ["0", "1", "2"]
+
+
+def test_read_nodes_falls_back_to_pydot(tmp_path):
+    """
+    Test that a DOT file the scanner does not support is read with pydot.
+    """
+    dot = PDG.replace('label="0: d"', "label=<d>")
+    dot_file = tmp_path / "flexeme.dot"
+    dot_file.write_text(dot)
+    with pytest.raises(UnsupportedDotError):
+        scan_dot_nodes(dot)
+
+    nodes = dict(read_nodes(dot_file))
+
+    assert nodes["2"]["cluster"] == '"B.java"'
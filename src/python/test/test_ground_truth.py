@@ -2,6 +2,9 @@
 Test the ground truth module.
 """
 
+import random
+from collections import deque
+
 import unidiff
 from src.python.main import ground_truth
 
@@ -176,3 +179,77 @@ index 8422d40..682191b 100644
     assert ground_truth_df.iloc[1]["group"] == "fix"
     assert ground_truth_df.iloc[2]["group"] == "other"
     # + b = 4 is tangled: contains both a fix and a variable renaming
+
+
+def test_tangled_line_is_duplicated_at_the_end():
+    """
+    Test that a tangled line is labelled 'fix' in place and duplicated at the
+    end of the ground truth with the label 'other'.
+    """
+    original_diff = unidiff.PatchSet.from_string(
+        """
+diff --git a/test/before.txt b/test/after.txt
+index 8422d40..e2c9801 100644
+--- a/test/before.txt
++++ b/test/after.txt
+@@ -1,2 +1,2 @@
+- a = 3
++ b = 4
+ B"""
+    )
+    nonfix_diff = unidiff.PatchSet.from_string(
+        """
+diff --git a/test/before.txt b/test/patch.txt
+index 8422d40..682191b 100644
+--- a/test/before.txt
++++ b/test/patch.txt
+@@ -1,2 +1,2 @@
+- a = 3
++ b = 3
+ B"""
+    )
+    fix_diff = unidiff.PatchSet.from_string(
+        """
+diff --git a/test/before.txt b/test/patch.txt
+index 8422d40..682191b 100644
+--- a/test/before.txt
++++ b/test/patch.txt
+@@ -1,1 +1,1 @@
+- b = 3
++ b = 4
+"""
+    )
+    ground_truth_df = ground_truth.classify_diff_lines(
+        original_diff, fix_diff, nonfix_diff
+    )
+    assert ground_truth_df.to_csv(index=False) == (
+        "file,source,target,group\n"
+        "test/after.txt,1,,other\n"
+        "test/after.txt,,1,fix\n"
+        "test/after.txt,,1,other\n"
+    )
+
+
+def test_line_queue_behaves_like_deque():
+    """
+    Test that LineQueue returns the same results as a deque for the operations
+    used by the alignment.
+    """
+    rng = random.Random(0)
+    lines = [rng.choice(["+a\n", "+b\n", "-a\n", "-c\n"]) for _ in range(200)]
+    expected = deque(lines)
+    queue = ground_truth.LineQueue(lines)
+
+    while expected:
+        assert len(queue) == len(expected)
+        assert queue.peek() == expected[0]
+        line = rng.choice(["+a\n", "+b\n", "-a\n", "-c\n", "+d\n"])
+        assert (line in queue) == (line in expected)
+        if rng.random() < 0.5:
+            queue.popleft()
+            expected.popleft()
+        elif line in expected:
+            queue.remove(line)
+            expected.remove(line)
+    assert len(queue) == 0
+    assert queue.peek() is None
@@ -0,0 +1,98 @@
+"""
+Tests for ground_truth_index.py
+"""
+
+import os
+
+import pandas as pd
+
+from src.python.main import ground_truth_index
+from src.python.main.lltc4j.select_mixed_changes_scores import find_mixed_commits
+
+# Diff order: a modification of lines 1-2, a deletion at line 10, and an addition in B.java.
+# The line 10 is tangled: it is in both groups.
+TRUTH = [
+    "A.java,1,,fix",
+    "A.java,2,,fix",
+    "A.java,,1,fix",
+    "A.java,10,,fix",
+    "B.java,,4,other",
+    "B.java,,5,other",
+    "A.java,10,,other",
+]
+
+
+def write_commit(evaluation_dir, commit, rows):
+    commit_dir = os.path.join(evaluation_dir, commit)
+    os.makedirs(commit_dir, exist_ok=True)
+    truth_file = os.path.join(commit_dir, "truth.csv")
+    with open(truth_file, "w") as file:
+        file.write("file,source,target,group\n")
+        file.writelines(f"{row}\n" for row in rows)
+    return truth_file
+
+
+def test_summarize(tmp_path):
+    truth_file = write_commit(tmp_path, "Lang_1", TRUTH)
+    truth_df = pd.read_csv(truth_file).assign(project="Lang", commit_id="1")
+
+    index_df = ground_truth_index.summarize(truth_df, [("Lang", "1"), ("Lang", "2")])
+
+    assert index_df.to_dict("records") == [
+        {
+            "project": "Lang",
+            "commit_id": "1",
+            "lines": 7,
+            "fix_lines": 4,
+            "other_lines": 3,
+            "tangled_lines": 1,
+            "files": 2,
+            "hunks": 3,
+            "change_type": "mixed",
+        },
+        {
+            "project": "Lang",
+            "commit_id": "2",
+            "lines": 0,
+            "fix_lines": 0,
+            "other_lines": 0,
+            "tangled_lines": 0,
+            "files": 0,
+            "hunks": 0,
+            "change_type": "empty",
+        },
+    ]
+
+
+def test_index_uses_the_summaries_and_the_ground_truth(tmp_path):
+    evaluation_dir = tmp_path / "evaluation"
+    truth_file = write_commit(evaluation_dir, "Lang_1", TRUTH)
+    ground_truth_index.write_summary(
+        pd.read_csv(truth_file),
+        "Lang",
+        "1",
+        os.path.join(os.path.dirname(truth_file), ground_truth_index.SUMMARY_FILE),
+    )
+    write_commit(evaluation_dir, "Lang_2", ["A.java,1,,fix"])
+    write_commit(evaluation_dir, "Cli_3", ["A.java,1,,other", "A.java,,1,other"])
+
+    index_df = ground_truth_index.load_index(str(tmp_path))
+
+    assert index_df["commit_id"].tolist() == ["3", "1", "2"]
+    assert index_df["change_type"].tolist() == ["other", "mixed", "fix"]
+    assert index_df["hunks"].tolist() == [1, 3, 1]
+    assert os.path.exists(tmp_path / ground_truth_index.INDEX_FILE)
+    assert ground_truth_index.load_index(str(tmp_path)).equals(index_df)
+    assert find_mixed_commits(str(tmp_path)) == ["Lang_1"]
+
+    # A new commit makes the index out of date.
+    write_commit(evaluation_dir, "Cli_4", TRUTH)
+    assert find_mixed_commits(str(tmp_path)) == ["Cli_4", "Lang_1"]
+
+    # So does a rewritten ground truth, even without a summary.
+    write_commit(evaluation_dir, "Lang_2", ["A.java,1,,fix", "A.java,,1,other"])
+    assert find_mixed_commits(str(tmp_path)) == ["Cli_4", "Lang_1", "Lang_2"]
+
+    # And a removed commit.
+    os.remove(os.path.join(evaluation_dir, "Cli_4", "truth.csv"))
+    assert find_mixed_commits(str(tmp_path)) == ["Lang_1", "Lang_2"]
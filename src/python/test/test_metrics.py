@@ -5,7 +5,12 @@ Tests for calculating metrics
 import pytest
 import pandas as pd
 
-from src.python.main.metrics import is_tangled_patch, count_tangled_file
+from src.python.main.metrics import (
+    count_tangled_file,
+    count_tangled_file_per_commit,
+    is_tangled_patch,
+    is_tangled_patch_per_commit,
+)
 
 
 def convert_ground_truth_to_legacy(df: pd.DataFrame) -> pd.DataFrame:
@@ -135,3 +140,31 @@ def test_count_tangled_file(
     assert count_tangled_file(one_tangled_file) == 1
     assert count_tangled_file(multiple_tangled_files) == 2
     assert count_tangled_file(one_tangled_file_and_one_not_tangled_file) == 1
+
+
+def test_tangled_metrics_per_commit(
+    tangled_patch,
+    single_concern_patch,
+    multiple_tangled_files,
+    one_tangled_file_and_one_not_tangled_file,
+):
+    """
+    Test that the dataset-level metrics match the metrics of each commit.
+    """
+    commits = [
+        tangled_patch,
+        single_concern_patch,
+        multiple_tangled_files,
+        one_tangled_file_and_one_not_tangled_file,
+    ]
+    dataset = pd.concat(
+        [df.assign(project="p", commit_id=str(i)) for i, df in enumerate(commits)],
+        ignore_index=True,
+    )
+
+    assert is_tangled_patch_per_commit(dataset).tolist() == [
+        is_tangled_patch(df) for df in commits
+    ]
+    assert count_tangled_file_per_commit(dataset).tolist() == [
+        count_tangled_file(df) for df in commits
+    ]
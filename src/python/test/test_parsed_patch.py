@@ -0,0 +1,142 @@
+"""
+Tests for parsed_patch.py
+"""
+
+import os
+
+from unidiff import PatchSet
+
+from src.python.main import unified_diff
+from src.python.main.parsed_patch import (
+    load_diff,
+    parse_patch,
+    parsed_file_name,
+    read_parsed_patch,
+)
+from src.python.main.patch_to_csv import patch_to_dataframe
+
+DIFF = """diff --git a/A.java b/A.java
+index 8422d40..e2c9801 100644
+--- a/A.java
++++ b/A.java
+@@ -1,2 +1,3 @@
+ a
+-b
++c
++
+@@ -10 +10,0 @@
+-
+diff --git a/B.java b/B.java
+index 8422d40..e2c9801 100644
+--- a/B.java
++++ b/B.java
+@@ -5 +5 @@
+-é
++b
+"""
+
+
+def test_parsed_patch_has_the_changed_lines(tmp_path):
+    """
+    Test that the stored ParsedPatch contains the non-blank changed lines of the diff,
+    like the PatchSet.
+    """
+    diff_file = tmp_path / "VC.diff"
+    diff_file.write_text(DIFF, encoding="latin-1")
+    patch = PatchSet.from_filename(diff_file, encoding="latin-1")
+
+    parsed = load_diff(diff_file)
+
+    assert parsed.files == ["A.java", "B.java"]
+    assert parsed.file_count() == 2
+    assert parsed.hunk_count() == 2
+    assert parsed.lines() == ["-b\n", "+c\n", "-é\n", "+b\n"]
+    assert parsed.source.tolist() == [2, 0, 5, 0]
+    assert parsed.target.tolist() == [0, 2, 0, 5]
+    assert len(set(parsed.hashes.tolist())) == 4
+    assert parsed.to_dataframe().equals(
+        patch_to_dataframe(patch, ignore_blank_lines=True)
+    )
+
+
+def test_load_diff_reparses_modified_diffs(tmp_path):
+    """
+    Test that the stored ParsedPatch is reused until the diff changes.
+    """
+    diff_file = tmp_path / "VC.diff"
+    diff_file.write_text(DIFF, encoding="latin-1")
+    load_diff(diff_file)
+    parsed_file = parsed_file_name(diff_file)
+    assert parsed_file == os.path.join(tmp_path, "VC.parsed")
+    mtime = os.stat(parsed_file).st_mtime_ns
+
+    assert load_diff(diff_file).line_count() == 4
+    assert os.stat(parsed_file).st_mtime_ns == mtime
+
+    diff_file.write_text(DIFF.replace("+b", "+dd"), encoding="latin-1")
+    assert load_diff(diff_file).lines()[-1] == "+dd\n"
+    assert read_parsed_patch(parsed_file)[0].lines()[-1] == "+dd\n"
+
+
+def test_empty_patch(tmp_path):
+    """
+    Test that a diff without changes has an empty ParsedPatch.
+    """
+    diff_file = tmp_path / "VC.diff"
+    diff_file.write_text("")
+
+    parsed = load_diff(diff_file)
+
+    assert parsed.file_count() == 0
+    assert parsed.hunk_count() == 0
+    assert parsed.lines() == []
+    assert len(parsed.to_dataframe()) == 0
+    assert parse_patch(PatchSet.from_string("")).line_count() == 0
+
+
+def test_parsed_patch_pools_the_line_values():
+    """
+    Test that the lines with the same text share their value in the string pool and
+    have the same hash, and that the lines are looked up in another ParsedPatch.
+    """
+    parsed = parse_patch(PatchSet.from_string(DIFF.replace("-é", "-b")))
+    other = parse_patch(PatchSet.from_string(DIFF.replace("+c", "+d")))
+
+    assert parsed.values() == ["-b\n", "+c\n", "+b\n"]
+    assert parsed.line_value.tolist() == [0, 1, 0, 2]
+    assert parsed.lines() == ["-b\n", "+c\n", "-b\n", "+b\n"]
+    assert parsed.hashes[0] == parsed.hashes[2]
+    assert parsed.line_type.tolist() == [ord("-"), ord("+"), ord("-"), ord("+")]
+    assert parsed.line_file.tolist() == [0, 0, 1, 1]
+    assert parsed.line_hunk.tolist() == [0, 0, 2, 2]
+    assert parsed.hunk_sizes().tolist() == [2, 0, 2]
+    assert parsed.lines_in(other).tolist() == [True, False, True, True]
+
+
+def test_load_diff_reparses_other_formats(tmp_path):
+    """
+    Test that a stored file that is not a ParsedPatch of this format is replaced.
+    """
+    diff_file = tmp_path / "VC.diff"
+    diff_file.write_text(DIFF, encoding="latin-1")
+    parsed_file = parsed_file_name(diff_file)
+    with open(parsed_file, "wb") as file:
+        file.write(b"PARSEDPATCH1\n")
+
+    assert load_diff(diff_file).line_count() == 4
+    assert read_parsed_patch(parsed_file)[0].line_count() == 4
+
+
+def test_load_diff_reparses_with_a_new_parser(tmp_path, monkeypatch):
+    """
+    Test that a stored ParsedPatch written by another version of the parser is replaced.
+    """
+    diff_file = tmp_path / "VC.diff"
+    diff_file.write_text(DIFF, encoding="latin-1")
+    parsed_file = parsed_file_name(diff_file)
+    load_diff(diff_file)
+
+    monkeypatch.setattr(unified_diff, "VERSION", unified_diff.VERSION + 1)
+    assert read_parsed_patch(parsed_file)[2] != unified_diff.VERSION
+    assert load_diff(diff_file).line_count() == 4
+    assert read_parsed_patch(parsed_file)[2] == unified_diff.VERSION
@@ -0,0 +1,55 @@
+"""
+Test the patch_to_csv module.
+"""
+
+from unidiff import PatchSet
+
+from src.python.main import patch_to_csv
+
+PATCH = """
+diff --git a/A.java b/A.java
+--- a/A.java
++++ b/A.java
+@@ -1,2 +1,3 @@
+ a
+-b
++c
++
+diff --git a/B.java b/B.java
+--- a/B.java
++++ b/B.java
+@@ -5,1 +5,0 @@
+-d
+"""
+
+
+def test_patch_to_dataframe_matches_to_csv():
+    """
+    Test that the DataFrame contains the same changed lines as the CSV lines.
+    """
+    patch = PatchSet.from_string(PATCH)
+    df = patch_to_csv.patch_to_dataframe(patch)
+
+    assert list(patch_to_csv.to_csv(patch)) == [
+        "A.java,2,None",
+        "A.java,None,2",
+        "A.java,None,3",
+        "B.java,5,None",
+    ]
+    assert df.to_csv(index=False) == (
+        "file,source,target\nA.java,2,\nA.java,,2\nA.java,,3\nB.java,5,\n"
+    )
+    assert str(df["file"].dtype) == "category"
+    assert str(df["source"].dtype) == "Int32"
+    assert str(df["target"].dtype) == "Int32"
+
+
+def test_patch_to_dataframe_ignores_blank_lines():
+    """
+    Test that blank lines are ignored on demand.
+    """
+    patch = PatchSet.from_string(PATCH)
+    df = patch_to_csv.patch_to_dataframe(patch, ignore_blank_lines=True)
+
+    assert df["target"].dropna().tolist() == [2]
+    assert len(df) == 3
@@ -0,0 +1,98 @@
+"""
+Tests for smartcommit_results_to_csv.py
+"""
+
+import json
+
+from src.python.main.smartcommit_results_to_csv import (
+    convert_results,
+    generate_csv,
+    index_changed_lines,
+    read_results,
+)
+
+RAW_HEADERS = [
+    "diff --git a/A.java b/A.java",
+    "index 8422d40..e2c9801 100644",
+    "--- a/A.java",
+    "+++ b/A.java",
+]
+RAW_HUNKS = {
+    "h0": ["@@ -1,2 +1,2 @@", " a", "-b", "+c"],
+    "h1": ["@@ -10 +10,2 @@", "-d", "+e", "+f"],
+}
+
+
+def test_hunks_are_parsed_together_or_one_by_one():
+    """
+    Test that the changed lines of the hunks are the same when the hunks cannot be
+    parsed in a single patch.
+    """
+    lines = index_changed_lines(RAW_HEADERS, RAW_HUNKS)
+
+    assert lines == {
+        "h0": [("A.java", 2, None), ("A.java", None, 2)],
+        "h1": [("A.java", 10, None), ("A.java", None, 10), ("A.java", None, 11)],
+    }
+    # An empty last line prevents parsing the hunks in a single patch.
+    raw_hunks = {hunk_id: raw_hunk + [""] for hunk_id, raw_hunk in RAW_HUNKS.items()}
+    assert index_changed_lines(RAW_HEADERS, raw_hunks) == lines
+
+
+def test_groups_are_translated_to_lines(tmp_path):
+    """
+    Test that each changed line of a hunk is labelled with the groups of the hunk.
+    """
+    (tmp_path / "diffs").mkdir()
+    (tmp_path / "generated_groups").mkdir()
+    diff = {
+        "currentRelativePath": "A.java",
+        "fileID": "f0",
+        "rawHeaders": RAW_HEADERS,
+        "diffHunksMap": {
+            str(i): {"diffHunkID": hunk_id, "rawDiffs": raw_hunk}
+            for i, (hunk_id, raw_hunk) in enumerate(RAW_HUNKS.items())
+        },
+    }
+    (tmp_path / "diffs" / "f0.json").write_text(json.dumps(diff))
+    group = {"groupID": "group0", "diffHunkIDs": ["f0:h1", "f0:h0"]}
+    (tmp_path / "generated_groups" / "group0.json").write_text(json.dumps(group))
+
+    df = generate_csv(read_results(tmp_path / "diffs"), tmp_path / "generated_groups")
+
+    assert df.to_csv(index=False) == (
+        "file,source,target,group\n"
+        "A.java,10,,group0\n"
+        "A.java,,10,group0\n"
+        "A.java,,11,group0\n"
+        "A.java,2,,group0\n"
+        "A.java,,2,group0\n"
+    )
+
+
+def test_hunks_in_no_group_are_not_parsed(tmp_path):
+    """
+    Test that a hunk that belongs to no group is not parsed, so that it cannot fail the
+    conversion.
+    """
+    (tmp_path / "diffs").mkdir()
+    (tmp_path / "generated_groups").mkdir()
+    raw_hunks = dict(RAW_HUNKS, h2=["@@ -20,2 +20,2 @@", "not a hunk line"])
+    diff = {
+        "currentRelativePath": "A.java",
+        "fileID": "f0",
+        "rawHeaders": RAW_HEADERS,
+        "diffHunksMap": {
+            str(i): {"diffHunkID": hunk_id, "rawDiffs": raw_hunk}
+            for i, (hunk_id, raw_hunk) in enumerate(raw_hunks.items())
+        },
+    }
+    (tmp_path / "diffs" / "f0.json").write_text(json.dumps(diff))
+    group = {"groupID": "group0", "diffHunkIDs": ["f0:h0"]}
+    (tmp_path / "generated_groups" / "group0.json").write_text(json.dumps(group))
+
+    convert_results(tmp_path, tmp_path / "smartcommit.csv")
+
+    assert (tmp_path / "smartcommit.csv").read_text() == (
+        "file,source,target,group\nA.java,2,,group0\nA.java,,2,group0\n"
+    )
@@ -0,0 +1,162 @@
+"""
+Tests for unified_diff.py
+"""
+
+import pytest
+from unidiff import PatchSet
+from unidiff.errors import UnidiffParseError
+
+from src.python.benchmark.bench_clean_artifacts import generate_diff
+from src.python.main import unified_diff
+from src.python.test.test_clean_artifacts import DIFF_TO_CLEAN
+from src.python.test.test_parsed_patch import DIFF
+from src.python.test.test_patch_to_csv import PATCH
+
+GIT_FILES = """diff --git a/New.java b/New.java
+new file mode 100644
+index 0000000..e2c9801
+--- /dev/null
++++ b/New.java
+@@ -0,0 +1,2 @@
++a
++b
+\\ No newline at end of file
+diff --git a/Old.java b/Old.java
+deleted file mode 100644
+index e2c9801..0000000
+--- a/Old.java
++++ /dev/null
+@@ -1 +0,0 @@
+-a
+diff --git a/Mode.sh b/Mode.sh
+old mode 100644
+new mode 100755
+diff --git a/From.java b/To.java
+similarity index 90%
+rename from From.java
+rename to To.java
+index 8422d40..e2c9801 100644
+--- a/From.java
++++ b/To.java
+@@ -3,3 +3,3 @@ class From {
+ a
+-b
++c
+ d
+
+diff --git a/image.png b/image.png
+index 8422d40..e2c9801 100644
+Binary files a/image.png and b/image.png differ
+diff --git a/data.bin b/data.bin
+index 8422d40..e2c9801 100644
+GIT binary patch
+literal 5
+McmZQz00000
+
+diff --git "a/With space.java" "b/With space.java"
+index 8422d40..e2c9801 100644
+--- "a/With space.java"
++++ "b/With space.java"
+@@ -1,2 +1,2 @@
+-a
++b
+\\ No newline at end of file
+ \r
+"""
+
+PLAIN_FILES = """--- A.java\t2023-01-01 00:00:00
++++ A.java\t2023-01-02 00:00:00
+@@ -1 +1 @@ section
+-a
++b
+Only in b: C.java
+--- B.java
++++ B.java
+@@ -2,2 +2 @@
+-a
+ b
+"""
+
+MALFORMED_DIFFS = [
+    # A line that is not part of the hunk.
+    "--- a/A.java\n+++ b/A.java\n@@ -1,2 +1,2 @@\n-a\nb\n",
+    # A hunk with fewer lines than its header.
+    "--- a/A.java\n+++ b/A.java\n@@ -1,2 +1,2 @@\n-a\n",
+    # A hunk with more lines than its header.
+    "--- a/A.java\n+++ b/A.java\n@@ -1 +1,0 @@\n a\n",
+    # A target without a source.
+    "+++ b/A.java\n@@ -1 +1 @@\n-a\n+b\n",
+    # A hunk without a file.
+    "@@ -1 +1 @@\n-a\n+b\n",
+    # A marker without a hunk.
+    "diff --git a/A.java b/A.java\n\\ No newline at end of file\n",
+]
+
+
+def generated_diff(tmp_path):
+    """
+    Returns a diff generated for the benchmarks.
+    """
+    diff_file = tmp_path / "generated.diff"
+    generate_diff(2000, diff_file)
+    return diff_file.read_text(encoding="latin-1")
+
+
+def assert_same_patch(patch, expected):
+    """
+    Asserts that a unified_diff.Patch has the files, hunks, and lines of a PatchSet.
+    """
+    assert len(patch) == len(expected)
+    for file, expected_file in zip(patch, expected):
+        assert file.source_file == expected_file.source_file
+        assert file.target_file == expected_file.target_file
+        assert file.path == expected_file.path
+        assert file.is_rename == expected_file.is_rename
+        assert file.is_binary_file == expected_file.is_binary_file
+        assert len(file) == len(expected_file)
+        for hunk, expected_hunk in zip(file, expected_file):
+            assert hunk.source_start == expected_hunk.source_start
+            assert hunk.source_length == expected_hunk.source_length
+            assert hunk.target_start == expected_hunk.target_start
+            assert hunk.target_length == expected_hunk.target_length
+            assert hunk.section_header == expected_hunk.section_header
+            assert [
+                (line.line_type, line.source_line_no, line.target_line_no, line.value)
+                for line in hunk
+            ] == [
+                (line.line_type, line.source_line_no, line.target_line_no, line.value)
+                for line in expected_hunk
+            ]
+            assert [str(line) for line in hunk] == [str(line) for line in expected_hunk]
+
+
+@pytest.mark.parametrize(
+    "diff",
+    [DIFF, DIFF_TO_CLEAN, PATCH, GIT_FILES, PLAIN_FILES, "", generated_diff],
+)
+def test_parse_diff_like_unidiff(diff, tmp_path):
+    """
+    Test that a diff is parsed like unidiff, from a string and from a file.
+    """
+    if callable(diff):
+        diff = diff(tmp_path)
+    diff_file = tmp_path / "VC.diff"
+    diff_file.write_text(diff, encoding="latin-1")
+
+    assert_same_patch(unified_diff.from_string(diff), PatchSet.from_string(diff))
+    assert_same_patch(
+        unified_diff.from_filename(diff_file),
+        PatchSet.from_filename(diff_file, encoding="latin-1"),
+    )
+
+
+@pytest.mark.parametrize("diff", MALFORMED_DIFFS)
+def test_parse_malformed_diff_like_unidiff(diff):
+    """
+    Test that a diff that unidiff cannot parse raises the same error.
+    """
+    with pytest.raises(UnidiffParseError) as expected:
+        PatchSet.from_string(diff)
+    with pytest.raises(UnidiffParseError) as actual:
+        unified_diff.from_string(diff)
+    assert str(actual.value) == str(expected.value)
@@ -3,13 +3,17 @@ Tests for untangling_score.py
 """
 
 import os
+import random
 import sys
 import tempfile
 
+import numpy as np
 import pandas as pd
 import pytest
+from sklearn import metrics
 
-from src.python.main.untangling_score import main
+from src.python.main import batch_untangling_score
+from src.python.main.untangling_score import main, rand_index, rand_indices
 
 
 def test_main():
@@ -71,6 +75,115 @@ def test_no_fix_label():
             sys.stdout = old_stdout
 
 
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_scores_all_commits(workers):
+    """
+    Test that the batch entry point scores every commit like untangling_score.py and skips
+    commits that cannot be scored.
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for commit in ["Lang_8", "Csv_1"]:
+            os.mkdir(os.path.join(tmpdir, commit))
+            create_temporary_results(os.path.join(tmpdir, commit))
+        commits_file = os.path.join(tmpdir, "commits.csv")
+        with open(commits_file, "w") as file:
+            file.write("Lang,8\nLang,9\nCsv,1\n")
+        out_file = os.path.join(tmpdir, "decomposition_scores.csv")
+
+        batch_untangling_score.main(
+            tmpdir, commits_file, out_file, workers=workers, commit_scores=True
+        )
+
+        with open(out_file) as file:
+            assert file.read() == "Csv,1,1.0,1.0,1.0\nLang,8,1.0,1.0,1.0\n"
+        with open(os.path.join(tmpdir, "Lang_8", "scores.csv")) as file:
+            assert file.read() == "Lang,8,1.0,1.0,1.0\n"
+        assert not os.path.exists(os.path.join(tmpdir, "Lang_9"))
+
+
+def test_batch_cache_rescores_changed_tools():
+    """
+    Test that the batch entry point with a cache only rescores the tools whose inputs
+    changed, writes the same scores as without a cache, and keeps the scores of the
+    commits that are not scored again.
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for commit in ["Lang_8", "Csv_1"]:
+            os.mkdir(os.path.join(tmpdir, commit))
+            create_temporary_results(os.path.join(tmpdir, commit))
+        commits_file = os.path.join(tmpdir, "commits.csv")
+        with open(commits_file, "w") as file:
+            file.write("Lang,8\nCsv,1\n")
+        out_file = os.path.join(tmpdir, "decomposition_scores.csv")
+        cache_file = os.path.join(tmpdir, "cache.json")
+
+        batch_untangling_score.main(
+            tmpdir, commits_file, out_file, cache_file=cache_file
+        )
+        cache = batch_untangling_score.read_cache(cache_file)
+
+        # Flexeme puts every line of Lang_8 in the same group.
+        flexeme_file = os.path.join(tmpdir, "Lang_8", "flexeme.csv")
+        pd.read_csv(flexeme_file).assign(group="0").to_csv(flexeme_file, index=False)
+        with open(commits_file, "w") as file:
+            file.write("Lang,8\n")
+        batch_untangling_score.main(
+            tmpdir, commits_file, out_file, cache_file=cache_file
+        )
+        new_cache = batch_untangling_score.read_cache(cache_file)
+
+        with open(out_file) as file:
+            assert file.read() == (
+                "Csv,1,1.0,1.0,1.0\nLang,8,1.0,0.3333333333333333,1.0\n"
+            )
+        assert new_cache["Csv_1"] == cache["Csv_1"]
+        changed = [
+            tool
+            for tool, entry in new_cache["Lang_8"].items()
+            if entry != cache["Lang_8"][tool]
+        ]
+        assert changed == ["flexeme.csv"]
+
+        batch_untangling_score.main(tmpdir, commits_file, out_file)
+        with open(out_file) as file:
+            assert file.read() == (
+                "Csv,1,1.0,1.0,1.0\nLang,8,1.0,0.3333333333333333,1.0\n"
+            )
+
+
+def test_rand_index_matches_sklearn():
+    """
+    Test that rand_index computes the same score as sklearn.metrics.rand_score on random labels.
+    """
+    rng = random.Random(0)
+    for _ in range(500):
+        size = rng.randint(0, 60)
+        labels_true = [rng.choice(["fix", "other"]) for _ in range(size)]
+        labels_pred = [
+            f"group{rng.randint(0, rng.randint(0, 10))}" for _ in range(size)
+        ]
+        assert rand_index(labels_true, labels_pred) == metrics.rand_score(
+            labels_true, labels_pred
+        )
+
+
+def test_rand_indices_scores_each_commit():
+    """
+    Test that rand_indices scores many commits at once like rand_index scores each of them.
+    """
+    rng = np.random.default_rng(0)
+    commits = np.sort(rng.integers(0, 50, size=2000))
+    labels_true = rng.choice(["fix", "other"], size=len(commits))
+    labels_pred = rng.integers(0, 5, size=len(commits)).astype(str)
+
+    scores = rand_indices(labels_true, labels_pred, commits)
+
+    assert len(scores) == 50
+    for commit, score in enumerate(scores):
+        in_commit = commits == commit
+        assert score == rand_index(labels_true[in_commit], labels_pred[in_commit])
+
+
 def create_temporary_results(tmpdir):
     """
     Create temporary CSV files with sample dataframes.